@@ -34,8 +34,9 @@ def make_agent_tool(
     system_prompt: str,
     tools: list[Callable],
 ):
+    llm_with_tools = llm.bind_tools(tools)
+
     def agent_node(state: AgentsState):
-        llm_with_tools = llm.bind_tools(tools)
         response = llm_with_tools.invoke(
             f"""
             {system_prompt}
@@ -97,8 +98,10 @@ tools = [
 ]
 
 
+llm_with_tool_agents = llm.bind_tools(tools=tools)
+
+
 def supervisor(state: AgentsState):
-    llm_with_tool_agents = llm.bind_tools(tools=tools)
     result = llm_with_tool_agents.invoke(state["messages"])
     return {"messages": result}
 
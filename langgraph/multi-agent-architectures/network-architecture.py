@@ -23,8 +23,9 @@ llm = init_chat_model(
 
 
 def make_agent(prompt: str, tools: list[Callable]):
+    llm_with_tools = llm.bind_tools(tools)
+
     def agent_node(state: AgentsState):
-        llm_with_tools = llm.bind_tools(tools)
         response = llm_with_tools.invoke(
             f"""
             {prompt}
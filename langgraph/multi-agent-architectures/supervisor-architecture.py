@@ -29,8 +29,9 @@ llm = init_chat_model(
 
 
 def make_agent(prompt: str, tools: list[Callable]):
+    llm_with_tools = llm.bind_tools(tools)
+
     def agent_node(state: AgentsState):
-        llm_with_tools = llm.bind_tools(tools)
         response = llm_with_tools.invoke(
             f"""
             {prompt}
@@ -59,8 +60,10 @@ def make_agent(prompt: str, tools: list[Callable]):
     return agent_builder.compile()
 
 
+structured_llm = llm.with_structured_output(SupervisorOutput)
+
+
 def supervisor(state: AgentsState):
-    structured_llm = llm.with_structured_output(SupervisorOutput)
     print(state["messages"])
     response = structured_llm.invoke(
         f"""
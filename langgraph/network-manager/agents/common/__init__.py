@@ -1,13 +1,23 @@
+import copy
 import json
 import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Callable, Literal, Optional, Sequence
 
 from langchain.chat_models import init_chat_model
 from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable
+from langchain_core.tools import BaseTool, StructuredTool, tool
 from langgraph.graph import END, START, MessagesState, StateGraph
 from langgraph.prebuilt import ToolNode, tools_condition
+from langgraph.prebuilt.tool_node import msg_content_output
 from langgraph.types import Command
-from pydantic import BaseModel
+from network.encoding import estimate_tokens
+from network.metrics import LabeledCounter, start_metrics_server, tool_metrics
+from pydantic import BaseModel, ValidationError
 
 OLLAMA_BASE_URL: str = os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434")
 OLLAMA_MODEL: str = os.environ.get("OLLAMA_MODEL", "ollama:gpt-oss:latest")
@@ -23,6 +33,11 @@ class AgentState(MessagesState):
     resource_map: Optional[dict[str, Any]]
     supervisor_plan: Optional[str]
     next_agent: Optional[str]  # For routing decisions
+    # Routing supervision, reset at the start of every run
+    hop_count: Optional[int]
+    route_history: Optional[list[list[str]]]
+    session_started_at: Optional[float]
+    routing_stop_reason: Optional[str]
 
 
 def _stringify_message_content(content: Any) -> str:
@@ -42,16 +57,273 @@ def _stringify_message_content(content: Any) -> str:
     return str(content)
 
 
+def _message_key(message: BaseMessage) -> Optional[tuple[str, str, int]]:
+    if not message.id:
+        return None
+    content = message.content
+    if not isinstance(content, str):
+        content = json.dumps(content, sort_keys=True, default=str)
+    return (message.id, getattr(message, "type", ""), hash(content))
+
+
+def _history_line(message: BaseMessage) -> str:
+    role = getattr(message, "type", message.__class__.__name__)
+    return f"{role.upper()}: {_stringify_message_content(message.content)}"
+
+
+class HistoryRenderer:
+    """Renders conversation history, reusing what earlier renders produced.
+
+    Each message's line is cached by message id and content hash, and the
+    rendered history of recent conversations (keyed by their first message id)
+    is kept with the messages it was made from. When those messages are still
+    the start of the list, only the messages after them are formatted.
+    Messages are treated as immutable once they are in the state.
+    """
+
+    def __init__(self, max_lines: int = 4096, max_conversations: int = 64):
+        self.max_lines = max_lines
+        self.max_conversations = max_conversations
+        self._lock = threading.Lock()
+        self._lines: OrderedDict[tuple[str, str, int], str] = OrderedDict()
+        # First message id -> (messages, rendered history)
+        self._conversations: OrderedDict[str, tuple[list[BaseMessage], str]] = (
+            OrderedDict()
+        )
+
+    def render(self, messages: Sequence[BaseMessage]) -> str:
+        if not messages:
+            return ""
+        messages = list(messages)
+        conversation = messages[0].id
+        if conversation is None:
+            return "\n".join(self.line(message) for message in messages)
+
+        with self._lock:
+            cached = self._conversations.get(conversation)
+        start, text = 0, ""
+        if cached is not None:
+            cached_messages, cached_text = cached
+            # Same message objects compare by identity, so this stays cheap
+            if messages[: len(cached_messages)] == cached_messages:
+                start, text = len(cached_messages), cached_text
+
+        lines = [self.line(message) for message in messages[start:]]
+        if lines:
+            text = "\n".join([text, *lines] if text else lines)
+            with self._lock:
+                self._conversations[conversation] = (messages, text)
+                self._conversations.move_to_end(conversation)
+                while len(self._conversations) > self.max_conversations:
+                    self._conversations.popitem(last=False)
+        return text
+
+    def line(self, message: BaseMessage) -> str:
+        key = _message_key(message)
+        if key is None:
+            return _history_line(message)
+        with self._lock:
+            line = self._lines.get(key)
+            if line is not None:
+                self._lines.move_to_end(key)
+                return line
+        line = _history_line(message)
+        with self._lock:
+            self._lines[key] = line
+            while len(self._lines) > self.max_lines:
+                self._lines.popitem(last=False)
+        return line
+
+
+history_renderer = HistoryRenderer()
+
+_resource_map_lock = threading.Lock()
+# (copy of the last resource map, its JSON)
+_resource_map_json: tuple[dict[str, Any], str] = ({}, "Unavailable")
+
+
 def format_conversation_history(
     messages: Sequence[BaseMessage] | list[BaseMessage] | None,
 ) -> str:
-    if not messages:
-        return ""
-    lines: list[str] = []
-    for message in messages:
-        role = getattr(message, "type", message.__class__.__name__)
-        lines.append(f"{role.upper()}: {_stringify_message_content(message.content)}")
-    return "\n".join(lines)
+    return history_renderer.render(messages or [])
+
+
+def format_resource_map(resource_map: Optional[dict[str, Any]]) -> str:
+    """JSON for the prompt, serialized again only when the map changes."""
+    global _resource_map_json
+    if not resource_map:
+        return "Unavailable"
+    with _resource_map_lock:
+        cached_map, cached_json = _resource_map_json
+    if resource_map == cached_map:
+        return cached_json
+    rendered = json.dumps(resource_map, indent=2)
+    with _resource_map_lock:
+        _resource_map_json = (copy.deepcopy(resource_map), rendered)
+    return rendered
+
+
+# Conversation window: the last CONTEXT_RECENT_TURNS turns are inlined
+# verbatim, as long as they fit in the agent's token limit; older turns are
+# folded into a rolling summary. CONTEXT_MAX_TOKENS_<AGENT> (e.g.
+# CONTEXT_MAX_TOKENS_TECH_REPORTER) overrides CONTEXT_MAX_TOKENS per agent.
+CONTEXT_RECENT_TURNS = int(os.environ.get("CONTEXT_RECENT_TURNS", "6"))
+CONTEXT_MAX_TOKENS = int(os.environ.get("CONTEXT_MAX_TOKENS", "4000"))
+CONTEXT_SUMMARY_MAX_TOKENS = int(os.environ.get("CONTEXT_SUMMARY_MAX_TOKENS", "500"))
+
+# Characters of each not yet summarized message shown in the meantime
+_EXCERPT_CHARS = 200
+
+
+def context_max_tokens(agent_name: Optional[str]) -> int:
+    """History token limit for an agent's prompt (0 or less: no limit)."""
+    if agent_name:
+        override = os.environ.get(f"CONTEXT_MAX_TOKENS_{agent_name.upper()}")
+        if override:
+            return int(override)
+    return CONTEXT_MAX_TOKENS
+
+
+def _turn_starts(messages: Sequence[BaseMessage]) -> list[int]:
+    """Indices where turns start: a user message, or an agent reply that isn't
+    continuing after its own tool results. Tool calls and their results are
+    never split across turns."""
+    starts = []
+    for index, message in enumerate(messages):
+        kind = getattr(message, "type", "")
+        previous = getattr(messages[index - 1], "type", "") if index else ""
+        if index == 0 or kind == "human" or (kind == "ai" and previous != "tool"):
+            starts.append(index)
+    return starts
+
+
+class ConversationSummarizer:
+    """Rolling summaries of the older part of conversations.
+
+    Summaries are made in a background thread and cached per conversation
+    (keyed by its first message id) with the number of messages they cover.
+    When more messages have aged out of the window, the next summary folds
+    them into the previous one. Until it is ready, callers get the current
+    summary followed by short excerpts of the messages it doesn't cover yet.
+    """
+
+    def __init__(self, max_conversations: int = 64):
+        self.max_conversations = max_conversations
+        self._lock = threading.Lock()
+        # Conversation -> (messages covered, id of the last one, summary)
+        self._summaries: OrderedDict[str, tuple[int, str, str]] = OrderedDict()
+        self._pending: set[str] = set()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="conversation-summary"
+        )
+
+    def summary(self, older: Sequence[BaseMessage]) -> str:
+        """Summary of ``older``, scheduling an update if it is out of date."""
+        conversation = older[0].id
+        covered, text = self._cached(conversation, older)
+        rest = older[covered:]
+        if not rest:
+            return text
+        if conversation is not None:
+            self._schedule(conversation, list(older), covered, text)
+        excerpts = [
+            _history_line(message)[:_EXCERPT_CHARS].replace("\n", " ")
+            for message in rest
+        ]
+        return "\n".join([text, *excerpts] if text else excerpts)
+
+    def wait(self) -> None:
+        """Block until the scheduled summaries are done."""
+        self._executor.submit(lambda: None).result()
+
+    def _cached(
+        self, conversation: Optional[str], older: Sequence[BaseMessage]
+    ) -> tuple[int, str]:
+        if conversation is None:
+            return 0, ""
+        with self._lock:
+            cached = self._summaries.get(conversation)
+        if cached is None:
+            return 0, ""
+        covered, last_id, text = cached
+        if covered > len(older) or older[covered - 1].id != last_id:
+            # History was rewritten; start over
+            return 0, ""
+        return covered, text
+
+    def _schedule(
+        self, conversation: str, older: list[BaseMessage], covered: int, text: str
+    ) -> None:
+        with self._lock:
+            if conversation in self._pending:
+                return
+            self._pending.add(conversation)
+        self._executor.submit(self._fold, conversation, older, covered, text)
+
+    def _fold(
+        self, conversation: str, older: list[BaseMessage], covered: int, text: str
+    ) -> None:
+        prompt = f"""Update the summary of a network troubleshooting conversation with the new messages below.
+Keep every concrete fact: hosts, VMs, interfaces and their IDs, paths, measurements, TC settings, issues found, actions taken and their results, and what is still open. Drop greetings and repetition. Answer with the summary only, in at most {CONTEXT_SUMMARY_MAX_TOKENS * 3 // 4} words.
+
+Current summary: {text or "None yet."}
+
+New messages:
+{format_conversation_history(older[covered:])}"""
+        try:
+            summary = _stringify_message_content(llm.invoke(prompt).content).strip()
+        except Exception:
+            # Excerpts are used until a later turn retries
+            return
+        finally:
+            with self._lock:
+                self._pending.discard(conversation)
+        with self._lock:
+            self._summaries[conversation] = (len(older), older[-1].id, summary)
+            self._summaries.move_to_end(conversation)
+            while len(self._summaries) > self.max_conversations:
+                self._summaries.popitem(last=False)
+
+
+conversation_summarizer = ConversationSummarizer()
+
+
+def format_conversation_window(
+    messages: Sequence[BaseMessage] | list[BaseMessage] | None,
+    max_tokens: int = CONTEXT_MAX_TOKENS,
+    recent_turns: int = CONTEXT_RECENT_TURNS,
+) -> str:
+    """Conversation history for a prompt, with older turns summarized.
+
+    The last ``recent_turns`` turns are kept verbatim, fewer if they exceed
+    ``max_tokens`` (the latest turn is always kept). Everything before them is
+    replaced by the rolling summary from ``conversation_summarizer``.
+    """
+    messages = list(messages or [])
+    starts = _turn_starts(messages)
+    if recent_turns > 0 and len(starts) > recent_turns:
+        kept = starts[-recent_turns:]
+    else:
+        kept = starts
+
+    if max_tokens > 0 and kept:
+        tokens = [
+            estimate_tokens(history_renderer.line(m)) for m in messages[kept[0] :]
+        ]
+        total = sum(tokens)
+        while len(kept) > 1 and total > max_tokens:
+            total -= sum(tokens[: kept[1] - kept[0]])
+            tokens = tokens[kept[1] - kept[0] :]
+            kept = kept[1:]
+
+    start = kept[0] if kept else 0
+    recent = history_renderer.render(messages[start:])
+    if start == 0:
+        return recent
+    summary = conversation_summarizer.summary(messages[:start])
+    return (
+        f"Summary of the earlier conversation:\n{summary}\n\nRecent messages:\n{recent}"
+    )
 
 
 def get_user_query(state: AgentState) -> str:
@@ -64,14 +336,15 @@ def get_user_query(state: AgentState) -> str:
     return ""
 
 
-def render_prompt(prompt_template: str, state: AgentState) -> str:
-    conversation = format_conversation_history(state.get("messages", []))
-    resource_map = state.get("resource_map") or {}
+def render_prompt(
+    prompt_template: str, state: AgentState, agent_name: Optional[str] = None
+) -> str:
+    conversation = format_conversation_window(
+        state.get("messages", []), context_max_tokens(agent_name)
+    )
     prompt_context = {
         "user_query": get_user_query(state),
-        "resource_map": (
-            json.dumps(resource_map, indent=2) if resource_map else "Unavailable"
-        ),
+        "resource_map": format_resource_map(state.get("resource_map")),
         "messages": conversation or "No prior conversation.",
         "supervisor_plan": state.get("supervisor_plan")
         or state.get("reasoning")
@@ -80,30 +353,97 @@ def render_prompt(prompt_template: str, state: AgentState) -> str:
     return prompt_template.format(**prompt_context)
 
 
+def _measured_output(output: Any) -> str:
+    content = msg_content_output(output)
+    return content if isinstance(content, str) else json.dumps(content)
+
+
+def instrument_tool(agent_name: str, base_tool: BaseTool | Callable) -> BaseTool:
+    """Copy of a tool whose calls are recorded in ``network.metrics``.
+
+    Latency, started processes, topology cache hits/misses and output size
+    (as the ToolNode passes it to the model) are tracked per agent and tool.
+    Tools other than ``StructuredTool`` are returned unchanged.
+    """
+    if not isinstance(base_tool, BaseTool):
+        base_tool = tool(base_tool)
+    if not isinstance(base_tool, StructuredTool):
+        return base_tool
+    name, func, coroutine = base_tool.name, base_tool.func, base_tool.coroutine
+    update: dict[str, Any] = {}
+
+    if func is not None:
+
+        def measured_func(*args: Any, **kwargs: Any) -> Any:
+            with tool_metrics.track(agent_name, name) as record:
+                output = func(*args, **kwargs)
+                record.output = _measured_output(output)
+            return output
+
+        update["func"] = measured_func
+
+    if coroutine is not None:
+
+        async def measured_coroutine(*args: Any, **kwargs: Any) -> Any:
+            with tool_metrics.track(agent_name, name) as record:
+                output = await coroutine(*args, **kwargs)
+                record.output = _measured_output(output)
+            return output
+
+        update["coroutine"] = measured_coroutine
+
+    return base_tool.model_copy(update=update)
+
+
+def instrument_tools(
+    agent_name: str, tools: Sequence[BaseTool | Callable]
+) -> list[BaseTool]:
+    start_metrics_server()
+    return [instrument_tool(agent_name, base_tool) for base_tool in tools]
+
+
+# How agents hand back their routing decision in the same inference as their
+# reply: "tool" binds RoutingDecision as a tool, "json" constrains the reply to
+# an AgentReply object through Ollama's ``format``, and "marker" asks for a
+# ROUTING_DECISION line in the text. "auto" uses "tool" for agents with tools
+# and "json" for the others.
+ROUTING_MODE: str = os.environ.get("ROUTING_MODE", "auto")
+
+AgentName = Literal[
+    "network_manager",
+    "traffic_controller",
+    "tech_reporter",
+    "general_chatbot",
+    "__end__",
+]
+
+
 class RoutingDecision(BaseModel):
-    next_agent: Literal[
-        "network_manager",
-        "traffic_controller",
-        "tech_reporter",
-        "general_chatbot",
-        "__end__",
-    ]
+    """Decide where the conversation goes next, once your answer is complete."""
+
+    next_agent: AgentName
     reasoning: str
 
 
-def make_agent(
-    prompt: str,
-    tools: list[Callable],
-    agent_name: str,
-):
-    def agent_node(state: AgentState):
-        llm_with_tools = llm.bind_tools(tools)
+class AgentReply(BaseModel):
+    response: str
+    next_agent: AgentName
+    reasoning: str
+
 
-        # Add routing instructions to the prompt
-        # Note: We use quadruple braces {{{{ to escape JSON braces in the format string
-        routing_prompt = f"""{prompt}
+# Second inference for replies that carried no routing decision
+routing_llm = llm.with_structured_output(RoutingDecision)
 
-**Routing Decision:**
+
+# Sources other than the mode itself ("tool_call" in tool mode, "json" in json
+# mode, "marker" in marker mode) are fallbacks; "llm" costs a second inference
+routing_decisions = LabeledCounter(
+    "network_agent_routing_decisions_total",
+    ("agent", "mode", "source"),
+    "Routing decisions by agent, routing mode and where the decision came from",
+)
+
+ROUTING_GUIDE = """**Routing Decision:**
 After completing your response, decide where the conversation should go next:
 - If you need another agent's help, route to them directly (e.g., if you found an issue, route to "traffic_controller").
 - If the task is complete and the user is satisfied, route to "__end__" to end the conversation.
@@ -112,101 +452,184 @@ After completing your response, decide where the conversation should go next:
 - For general conversation, route to "general_chatbot".
 
 Available agents: network_manager, traffic_controller, tech_reporter, general_chatbot, __end__
+"""
 
+# Braces are doubled: the prompt goes through render_prompt's str.format
+ROUTING_FORMATS = {
+    "tool": """
+When your answer is complete, call the `RoutingDecision` tool with `next_agent` and `reasoning` in the same response as your answer. Don't call it while you still need results from other tools.
+""",
+    "json": """
+Reply with a single JSON object: {{"response": "<your full answer>", "next_agent": "agent_name", "reasoning": "why you're routing there"}}
+""",
+    "marker": """
 At the end of your response, include a routing decision in this format:
-ROUTING_DECISION: {{{{ "next_agent": "agent_name", "reasoning": "why you're routing there" }}}}
-"""
-        prompt_text = render_prompt(routing_prompt, state)
-        response = llm_with_tools.invoke(prompt_text)
+ROUTING_DECISION: {{ "next_agent": "agent_name", "reasoning": "why you're routing there" }}
+""",
+}
+
+
+def routing_mode(tools: Sequence[Any]) -> str:
+    if ROUTING_MODE == "auto":
+        return "tool" if tools else "json"
+    if ROUTING_MODE not in ROUTING_FORMATS:
+        raise ValueError(f"unknown ROUTING_MODE {ROUTING_MODE!r}")
+    return ROUTING_MODE
+
+
+def bind_agent_model(tools: Sequence[Any], mode: str) -> Runnable:
+    """The model an agent invokes on each turn, with its tools bound.
+
+    ``make_agent`` calls this once when the graph is built: converting tools
+    to schemas is the expensive part of binding, and the bound model is
+    immutable, so every turn, thread and conversation shares it.
+    """
+    if mode == "tool":
+        model = llm.bind_tools([*tools, RoutingDecision])
+    elif tools:
+        model = llm.bind_tools(tools)
+    else:
+        model = llm
+    if mode == "json":
+        model = model.bind(format=AgentReply.model_json_schema())
+    return model
+
+
+def _parse_routing_marker(content: str) -> tuple[Optional[RoutingDecision], str]:
+    """Routing decision from a ROUTING_DECISION marker, and the text without it."""
+    if "ROUTING_DECISION:" not in content:
+        return None, content
+
+    match = re.search(r"ROUTING_DECISION:\s*(\{.*?\})", content, re.DOTALL)
+    if match:
+        try:
+            decision = RoutingDecision.model_validate_json(match.group(1))
+        except ValidationError:
+            decision = None
+        return decision, content.replace(match.group(0), "").strip()
+
+    # Remove the marker even if regex didn't match
+    cleaned_lines = []
+    skip_next = False
+    for line in content.split("\n"):
+        if "ROUTING_DECISION:" in line:
+            skip_next = True
+            continue
+        if skip_next and line.strip().startswith("{"):
+            continue
+        skip_next = False
+        cleaned_lines.append(line)
+    return None, "\n".join(cleaned_lines).strip()
+
+
+def _parse_agent_reply(content: str) -> Optional[AgentReply]:
+    try:
+        return AgentReply.model_validate_json(content.strip())
+    except ValidationError:
+        return None
+
+
+def _ask_routing_decision(
+    content: str, state: AgentState, agent_name: str
+) -> tuple[RoutingDecision, str]:
+    """Second inference for when the reply carried no usable routing decision."""
+    routing_extraction_prompt = f"""Based on this agent's response, determine where the conversation should go next:
+
+Agent Response: {content}
+Conversation History: {format_conversation_window(state.get("messages", []), context_max_tokens(agent_name))}
 
-        # Try to extract routing decision from the response
-        routing_decision: RoutingDecision | None = None
-        response_content = _stringify_message_content(response.content)
-        match = None
+Decide the next agent or end the conversation."""
+    try:
+        result = routing_llm.invoke(routing_extraction_prompt)
+        if isinstance(result, RoutingDecision):
+            return result, "llm"
+        return RoutingDecision.model_validate(result), "llm"
+    except Exception:
+        # Default to ending if we can't determine routing
+        return (
+            RoutingDecision(
+                next_agent="__end__", reasoning="Unable to determine next step"
+            ),
+            "default",
+        )
 
-        # Look for routing decision in the response
-        if "ROUTING_DECISION:" in response_content:
-            try:
-                import re
 
-                match = re.search(
-                    r"ROUTING_DECISION:\s*(\{.*?\})", response_content, re.DOTALL
-                )
-                if match:
-                    routing_json = match.group(1)
-                    routing_decision = RoutingDecision.model_validate_json(routing_json)
-            except Exception:
-                pass
+def _set_content(response: BaseMessage, content: str) -> None:
+    if isinstance(response.content, str):
+        response.content = content
+    elif isinstance(response.content, list):
+        for chunk in response.content:
+            if isinstance(chunk, dict) and "text" in chunk:
+                chunk["text"] = content
+                break
 
-        # If no routing decision found, use LLM to extract it
-        if routing_decision is None:
-            structured_llm = llm.with_structured_output(RoutingDecision)
-            routing_extraction_prompt = f"""Based on this agent's response, determine where the conversation should go next:
 
-Agent Response: {response_content}
-Conversation History: {format_conversation_history(state.get("messages", []))}
+def make_agent(
+    prompt: str,
+    tools: list[Callable],
+    agent_name: str,
+):
+    mode = routing_mode(tools)
+    routing_prompt = f"""{prompt}
 
-Decide the next agent or end the conversation."""
-            try:
-                result = structured_llm.invoke(routing_extraction_prompt)
-                if isinstance(result, dict):
-                    routing_decision = RoutingDecision.model_validate(result)
-                elif isinstance(result, RoutingDecision):
-                    routing_decision = result
-                else:
-                    routing_decision = RoutingDecision.model_validate(result)
-            except Exception:
-                # Default to ending if we can't determine routing
-                routing_decision = RoutingDecision(
-                    next_agent="__end__", reasoning="Unable to determine next step"
-                )
+{ROUTING_GUIDE}{ROUTING_FORMATS[mode]}"""
 
-        # At this point, routing_decision is guaranteed to be a RoutingDecision
-        if not isinstance(routing_decision, RoutingDecision):
-            routing_decision = RoutingDecision(
-                next_agent="__end__", reasoning="Invalid routing decision"
-            )
-
-        # Clean the response content to remove routing decision marker
-        cleaned_content = response_content
-        if match:
-            cleaned_content = cleaned_content.replace(match.group(0), "").strip()
-        elif "ROUTING_DECISION:" in cleaned_content:
-            # Remove the marker even if regex didn't match
-            lines = cleaned_content.split("\n")
-            cleaned_lines = []
-            skip_next = False
-            for line in lines:
-                if "ROUTING_DECISION:" in line:
-                    skip_next = True
-                    continue
-                if skip_next and line.strip().startswith("{"):
-                    continue
-                skip_next = False
-                cleaned_lines.append(line)
-            cleaned_content = "\n".join(cleaned_lines).strip()
-
-        # Create a new response with cleaned content
-        if hasattr(response, "content") and isinstance(response.content, str):
-            response.content = cleaned_content
-        elif hasattr(response, "content") and isinstance(response.content, list):
-            # If content is a list, update it
-            for chunk in response.content:
-                if isinstance(chunk, dict) and "text" in chunk:
-                    chunk["text"] = cleaned_content
-                    break
-
-        # Store routing decision in state
-        next_agent_value = (
-            routing_decision.next_agent
-            if routing_decision.next_agent != "__end__"
-            else None
-        )
+    model = bind_agent_model(tools, mode)
+
+    def agent_node(state: AgentState):
+        prompt_text = render_prompt(routing_prompt, state, agent_name)
+        response = model.invoke(prompt_text)
+        content = _stringify_message_content(response.content)
+
+        decision: RoutingDecision | None = None
+        source = ""
+        if mode == "tool":
+            routing_calls = [
+                call
+                for call in response.tool_calls
+                if call["name"] == RoutingDecision.__name__
+            ]
+            if routing_calls:
+                # The routing call isn't a real tool; keep it away from the ToolNode
+                response.tool_calls = [
+                    call for call in response.tool_calls if call not in routing_calls
+                ]
+                try:
+                    decision = RoutingDecision.model_validate(routing_calls[-1]["args"])
+                    source = "tool_call"
+                except ValidationError:
+                    pass
+        elif mode == "json":
+            reply = _parse_agent_reply(content)
+            if reply is not None:
+                content = reply.response
+                decision = RoutingDecision(
+                    next_agent=reply.next_agent, reasoning=reply.reasoning
+                )
+                source = "json"
+
+        if response.tool_calls:
+            # The subgraph runs the tools and calls the agent again; routing is
+            # decided on its final reply
+            _set_content(response, content)
+            return {"messages": [response], "current_agent": agent_name}
+
+        # Whatever the mode, a ROUTING_DECISION marker in the text is honoured
+        marker_decision, content = _parse_routing_marker(content)
+        if decision is None and marker_decision is not None:
+            decision, source = marker_decision, "marker"
+        if decision is None:
+            decision, source = _ask_routing_decision(content, state, agent_name)
+        routing_decisions.inc(agent_name, mode, source)
+
+        _set_content(response, content)
         return {
             "messages": [response],
             "current_agent": agent_name,
-            "reasoning": routing_decision.reasoning,
-            "next_agent": next_agent_value,
+            "reasoning": decision.reasoning,
+            "next_agent": (
+                decision.next_agent if decision.next_agent != "__end__" else None
+            ),
         }
 
     agent_builder = StateGraph(AgentState)
@@ -214,7 +637,7 @@ Decide the next agent or end the conversation."""
     agent_builder.add_node("agent", agent_node)
     agent_builder.add_node(
         "tools",
-        ToolNode(tools=tools),
+        ToolNode(tools=instrument_tools(agent_name, tools)),
     )
 
     agent_builder.add_edge(START, "agent")
@@ -36,8 +36,11 @@ network_manager = make_agent(
     3.  **Diagnostics:** "Checked TC settings. Found 1Mbit limit on veth-sw4-sw3."
 
     **Tools Strategy:**
-    -   Always run `get_topology_summary()` first.
+    -   Always run `get_topology_summary()` first. It returns compact tables; BLOCKED links carry no traffic.
+    -   On later turns, call `get_topology_changes(since=<cursor>)` with the cursor from your last call instead of pulling the full topology again.
+    -   Use `get_forwarding_path()` to get the active path and its interfaces between two hosts.
     -   Then run `get_tc_settings()` on specific forwarding interfaces found in the path.
+    -   Only call `get_topology_info()`, `get_network_status()`, `get_all_tc_settings()` or `get_interface_throughput()` for details the summary lacks, and pass `fields` to get just those parts (e.g. `get_topology_info(fields=["topology.stp_info.br-sw2"])`, `get_all_tc_settings(shaped_only=True)`).
     """,
     tools=NETWORK_MANAGER_TOOLS,
     agent_name="network_manager",
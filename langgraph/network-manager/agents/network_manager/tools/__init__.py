@@ -1,25 +1,123 @@
-import re
-import subprocess
-from typing import Dict, List
-
-from langchain_core.tools import tool
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar, Union
+
+from langchain_core.tools import BaseTool, tool
+from network.aio import (
+    abuild_topology_summary,
+    acalculate_path_between,
+    acheck_interfaces,
+    acollect_all_topology_info,
+    aread_all_tc_settings,
+    aread_links,
+    aget_inventory,
+    aread_tc_settings,
+)
+from network.diff import achanges_since, changes_since
+from network.discovery import get_inventory
+from network.encoding import TOPOLOGY_SUMMARY_MAX_TOKENS, encode_topology
 from network.infrastructure import (
-    BRIDGES,
-    VETH_PAIRS,
     build_topology_summary,
+    calculate_path_between,
     collect_all_topology_info,
 )
+from network.netlink import interface_stats_from_link, is_up, read_links
+from network.projection import TOOL_OUTPUT_MAX_ITEMS, shape_output
+from network.sampler import get_sampler
+from network.watcher import get_watcher
+from network.models import Inventory, LinkRecord
+from network.tc import read_all_tc_settings, read_tc_settings
 
 from .models import (
-    AggregatedTopologyInfo,
+    ForwardingPath,
+    InterfaceRates,
     InterfaceState,
     InterfaceStats,
     NetworkStatus,
     NetworkSummary,
     TCIssue,
     TCSettings,
+    TopologyChanges,
 )
 
+AsyncImpl = TypeVar("AsyncImpl", bound=Callable[..., Awaitable])
+
+
+def _async_impl(sync_tool: BaseTool) -> Callable[[AsyncImpl], AsyncImpl]:
+    """Attach a native coroutine to a tool so ``ainvoke`` doesn't use a thread."""
+
+    def decorator(coroutine: AsyncImpl) -> AsyncImpl:
+        sync_tool.coroutine = coroutine
+        return coroutine
+
+    return decorator
+
+
+# Sections of get_topology_info returned when no fields are requested; the VM
+# configs repeat topology.vms and the routing table is rarely needed
+DEFAULT_TOPOLOGY_FIELDS = [
+    "topology",
+    "network_settings.bridges",
+    "network_settings.interfaces",
+]
+
+
+def _entry_fields(fields: Optional[List[str]]) -> Optional[List[str]]:
+    """Field paths applied to every entry of an interface -> value mapping."""
+    return [f"*.{field}" for field in fields] if fields else None
+
+
+def _network_status(
+    inventory: Inventory,
+    tc_status: Dict[str, TCSettings],
+    links: Dict[str, LinkRecord],
+) -> NetworkStatus:
+    interfaces = {}
+    for iface in inventory.interfaces():
+        record = links.get(iface)
+        if record is not None:
+            interfaces[iface] = InterfaceState(
+                exists=True,
+                state="UP" if is_up(record) else "DOWN",
+            )
+    return NetworkStatus(tc_settings=tc_status, interfaces=interfaces)
+
+
+def _tc_issues(tc_status: Dict[str, TCSettings]) -> List[TCIssue]:
+    issues = []
+    for iface, settings in tc_status.items():
+        if not settings.has_tc:
+            continue
+
+        details = []
+        if settings.bandwidth_limit:
+            details.append(f"bandwidth limit {settings.bandwidth_limit}")
+        if settings.delay_ms is not None:
+            details.append(f"delay {settings.delay_ms:g}ms")
+        if settings.jitter_ms is not None:
+            details.append(f"jitter {settings.jitter_ms:g}ms")
+        if settings.loss_percent is not None:
+            details.append(f"loss {settings.loss_percent:g}%")
+
+        issues.append(
+            TCIssue(
+                interface=iface,
+                type=(
+                    "bandwidth_limit" if settings.bandwidth_limit else "tc_configured"
+                ),
+                bandwidth_limit=settings.bandwidth_limit,
+                burst=settings.burst,
+                delay_ms=settings.delay_ms,
+                jitter_ms=settings.jitter_ms,
+                loss_percent=settings.loss_percent,
+                description=(
+                    f"Interface {iface} has TC configured: {', '.join(details)}"
+                    if details
+                    else f"Interface {iface} has TC configured"
+                ),
+            )
+        )
+    return issues
+
 
 @tool
 def get_tc_settings(interface: str) -> TCSettings:
@@ -45,6 +143,8 @@ def get_tc_settings(interface: str) -> TCSettings:
         - bandwidth_limit: Bandwidth limit if TBF is configured (e.g., '1Mbit')
         - burst: Burst size if configured (e.g., '32Kb')
         - has_netem: Boolean indicating if netem (delay/loss) is configured
+        - rate_bps / burst_bytes: Bandwidth limit in bits/s and burst in bytes
+        - delay_ms / jitter_ms / loss_percent: netem delay, jitter and packet loss
 
     Example:
         get_tc_settings('veth-sw1-sw2') might return:
@@ -56,69 +156,40 @@ def get_tc_settings(interface: str) -> TCSettings:
             'qdiscs': ['qdisc tbf 0: root refcnt 2 rate 1Mbit burst 32Kb ...']
         }
     """
-    result = subprocess.run(
-        ["tc", "qdisc", "show", "dev", interface],
-        capture_output=True,
-        text=True,
-        timeout=5,
-    )
+    return read_tc_settings(interface)
 
-    tc_info = {
-        "interface": interface,
-        "has_tc": False,
-        "qdiscs": [],
-        "bandwidth_limit": None,
-        "burst": None,
-    }
-
-    if result.returncode == 0 and result.stdout.strip():
-        lines = result.stdout.strip().split("\n")
-
-        for line in lines:
-            if re.search(r"\b(noqueue|pfifo_fast|mq|fq_codel)\b", line):
-                continue
-
-            if "tbf" in line:
-                tc_info["has_tc"] = True
-                tc_info["qdiscs"].append(line)
-                rate_match = re.search(r"rate\s+(\d+)(\w+)", line)
-                if rate_match:
-                    tc_info["bandwidth_limit"] = (
-                        f"{rate_match.group(1)}{rate_match.group(2)}"
-                    )
-                burst_match = re.search(r"burst\s+(\d+)(\w*)", line)
-                if burst_match:
-                    tc_info["burst"] = (
-                        f"{burst_match.group(1)}{burst_match.group(2) or 'b'}"
-                    )
-
-            elif "netem" in line:
-                tc_info["has_tc"] = True
-                tc_info["qdiscs"].append(line)
-                if "loss" in line or "delay" in line:
-                    tc_info["has_netem"] = True
-
-            elif "htb" in line:
-                tc_info["has_tc"] = True
-                tc_info["qdiscs"].append(line)
-
-    return TCSettings(**tc_info)
+
+@_async_impl(get_tc_settings)
+async def _aget_tc_settings(interface: str) -> TCSettings:
+    return await aread_tc_settings(interface)
 
 
 @tool
-def get_all_tc_settings() -> Dict[str, TCSettings]:
+def get_all_tc_settings(
+    shaped_only: bool = False,
+    fields: Optional[List[str]] = None,
+    max_items: int = TOOL_OUTPUT_MAX_ITEMS,
+) -> Dict[str, Any]:
     """Get traffic control (TC) settings for all network interfaces.
 
-    This tool scans all bridges and veth pair interfaces in the network to check for
-    any traffic control configurations.
+    This tool scans all bridges and veth pair interfaces discovered on the host to
+    check for any traffic control configurations.
 
     Use this tool when you need a comprehensive view of all TC settings across the network,
     such as when diagnosing network performance issues or identifying which links have
     bandwidth limits applied.
 
+    Args:
+        shaped_only: Only return interfaces that have TC configured.
+        fields: Settings to return per interface (e.g., ['bandwidth_limit',
+                'delay_ms']); all by default.
+        max_items: Maximum number of interfaces returned; an '_omitted' entry
+                   says how many were left out.
+
     Returns:
         Dictionary mapping interface names to their TC settings. Each interface entry
-        contains the same structure as get_tc_settings() output:
+        contains the same structure as get_tc_settings() output (unset fields are
+        left out):
         {
             'veth-sw1-sw2': {
                 'interface': 'veth-sw1-sw2',
@@ -131,62 +202,23 @@ def get_all_tc_settings() -> Dict[str, TCSettings]:
         }
 
     Note:
-        This tool checks all bridges (br-sw1 through br-sw4, br-wan, br-lan) and all
-        veth pair interfaces. It's more efficient than calling get_tc_settings() multiple times.
+        This tool checks every bridge and veth interface found on the host, so it
+        covers the whole network however many switches it has. It's more efficient
+        than calling get_tc_settings() multiple times.
     """
-    all_interfaces = BRIDGES + VETH_PAIRS
-    tc_status = {}
-
-    for iface in all_interfaces:
-        result = subprocess.run(
-            ["tc", "qdisc", "show", "dev", iface],
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-
-        tc_info = {
-            "interface": iface,
-            "has_tc": False,
-            "qdiscs": [],
-            "bandwidth_limit": None,
-            "burst": None,
-        }
-
-        if result.returncode == 0 and result.stdout.strip():
-            lines = result.stdout.strip().split("\n")
-
-            for line in lines:
-                if re.search(r"\b(noqueue|pfifo_fast|mq|fq_codel)\b", line):
-                    continue
-
-                if "tbf" in line:
-                    tc_info["has_tc"] = True
-                    tc_info["qdiscs"].append(line)
-                    rate_match = re.search(r"rate\s+(\d+)(\w+)", line)
-                    if rate_match:
-                        tc_info["bandwidth_limit"] = (
-                            f"{rate_match.group(1)}{rate_match.group(2)}"
-                        )
-                    burst_match = re.search(r"burst\s+(\d+)(\w*)", line)
-                    if burst_match:
-                        tc_info["burst"] = (
-                            f"{burst_match.group(1)}{burst_match.group(2) or 'b'}"
-                        )
-
-                elif "netem" in line:
-                    tc_info["has_tc"] = True
-                    tc_info["qdiscs"].append(line)
-                    if "loss" in line or "delay" in line:
-                        tc_info["has_netem"] = True
+    settings = read_all_tc_settings(get_inventory().interfaces(), shaped_only)
+    return shape_output(settings, _entry_fields(fields), max_items)
 
-                elif "htb" in line:
-                    tc_info["has_tc"] = True
-                    tc_info["qdiscs"].append(line)
 
-        tc_status[iface] = TCSettings(**tc_info)
-
-    return tc_status
+@_async_impl(get_all_tc_settings)
+async def _aget_all_tc_settings(
+    shaped_only: bool = False,
+    fields: Optional[List[str]] = None,
+    max_items: int = TOOL_OUTPUT_MAX_ITEMS,
+) -> Dict[str, Any]:
+    interfaces = (await aget_inventory()).interfaces()
+    settings = await aread_all_tc_settings(interfaces, shaped_only)
+    return shape_output(settings, _entry_fields(fields), max_items)
 
 
 @tool
@@ -219,52 +251,84 @@ def get_interface_stats(interface: str) -> InterfaceStats:
     Note:
         If the interface doesn't exist, returns {'interface': name, 'exists': False}
     """
-    result = subprocess.run(
-        ["ip", "-s", "link", "show", interface],
-        capture_output=True,
-        text=True,
-        timeout=5,
+    return interface_stats_from_link(interface, read_links().get(interface))
+
+
+@_async_impl(get_interface_stats)
+async def _aget_interface_stats(interface: str) -> InterfaceStats:
+    return interface_stats_from_link(interface, (await aread_links()).get(interface))
+
+
+def _interface_rates(
+    interface: Optional[str], window_seconds: float
+) -> Dict[str, InterfaceRates]:
+    sampler = get_sampler()
+    sampler.wait_for_samples(2)
+    if interface:
+        return {interface: sampler.rates(interface, window_seconds)}
+    return sampler.all_rates(window_seconds)
+
+
+@tool
+def get_interface_throughput(
+    interface: Optional[str] = None,
+    window_seconds: float = 60.0,
+    fields: Optional[List[str]] = None,
+    max_items: int = TOOL_OUTPUT_MAX_ITEMS,
+) -> Dict[str, Any]:
+    """Get recent throughput, packet and error rates for network interfaces.
+
+    A background sampler polls the counters of all bridges, veth pairs and vnet
+    interfaces every second and keeps a rolling history. This tool summarizes that
+    history, so unlike get_interface_stats() it shows how fast traffic is flowing
+    right now rather than cumulative totals.
+
+    Use this tool when you need to check:
+    - Whether a link is congested or idle
+    - Which interface carries the most traffic
+    - Whether errors or drops are increasing
+
+    Args:
+        interface: Interface to report (e.g., 'veth-sw1-sw2'). Omit to report all
+                   sampled interfaces.
+        window_seconds: How far back to look, in seconds (default 60).
+        fields: Values to return per interface, e.g. ['tx_bps.p95', 'rx_errors_per_sec'];
+                all by default.
+        max_items: Maximum number of interfaces returned.
+
+    Returns:
+        Dictionary mapping interface names to:
+        - exists: Whether the interface is being sampled
+        - samples: Number of samples in the window
+        - window_seconds: Time span actually covered
+        - rx_bps / tx_bps: Bits per second (mean, p50, p95, p99, max)
+        - rx_pps / tx_pps: Packets per second
+        - rx_errors_per_sec / tx_errors_per_sec, rx_dropped_per_sec / tx_dropped_per_sec
+
+    Note:
+        The sampler starts on first use; the first call waits for two samples.
+    """
+    return shape_output(
+        _interface_rates(interface, window_seconds), _entry_fields(fields), max_items
     )
 
-    if result.returncode == 0:
-        stats = {
-            "interface": interface,
-            "exists": True,
-            "rx_bytes": 0,
-            "tx_bytes": 0,
-            "rx_packets": 0,
-            "tx_packets": 0,
-            "rx_errors": 0,
-            "tx_errors": 0,
-        }
 
-        lines = result.stdout.split("\n")
-        for i, line in enumerate(lines):
-            if "RX:" in line and i + 1 < len(lines):
-                next_line = lines[i + 1]
-                rx_match = re.search(r"(\d+)\s+bytes", next_line)
-                if rx_match:
-                    stats["rx_bytes"] = int(rx_match.group(1))
-                rx_pkt = re.search(r"(\d+)\s+packets", next_line)
-                if rx_pkt:
-                    stats["rx_packets"] = int(rx_pkt.group(1))
-
-            if "TX:" in line and i + 1 < len(lines):
-                next_line = lines[i + 1]
-                tx_match = re.search(r"(\d+)\s+bytes", next_line)
-                if tx_match:
-                    stats["tx_bytes"] = int(tx_match.group(1))
-                tx_pkt = re.search(r"(\d+)\s+packets", next_line)
-                if tx_pkt:
-                    stats["tx_packets"] = int(tx_pkt.group(1))
-
-        return InterfaceStats(**stats)
-    else:
-        return InterfaceStats(interface=interface, exists=False)
+@_async_impl(get_interface_throughput)
+async def _aget_interface_throughput(
+    interface: Optional[str] = None,
+    window_seconds: float = 60.0,
+    fields: Optional[List[str]] = None,
+    max_items: int = TOOL_OUTPUT_MAX_ITEMS,
+) -> Dict[str, Any]:
+    # The first call blocks until the sampler thread has two samples
+    rates = await asyncio.to_thread(_interface_rates, interface, window_seconds)
+    return shape_output(rates, _entry_fields(fields), max_items)
 
 
 @tool
-def get_network_status() -> NetworkStatus:
+def get_network_status(
+    fields: Optional[List[str]] = None, max_items: int = TOOL_OUTPUT_MAX_ITEMS
+) -> Dict[str, Any]:
     """Get comprehensive network status including TC settings and interface states.
 
     This tool provides a complete overview of the network by checking:
@@ -274,6 +338,12 @@ def get_network_status() -> NetworkStatus:
     Use this tool when you need a high-level view of the entire network status,
     such as during initial diagnostics or when monitoring overall network health.
 
+    Args:
+        fields: Dotted paths of the parts to return, e.g. ['interfaces'] or
+                ['tc_settings.*.bandwidth_limit', 'interfaces.*.state']; '*'
+                matches every interface. Everything by default.
+        max_items: Maximum number of interfaces per section.
+
     Returns:
         Dictionary containing:
         - tc_settings: Dictionary of all TC settings (same format as get_all_tc_settings())
@@ -285,57 +355,22 @@ def get_network_status() -> NetworkStatus:
           }
 
     Note:
-        This tool checks the first 4 veth pairs and all bridges for interface state.
-        For complete TC information, it checks all interfaces sequentially.
+        This tool checks every discovered bridge and veth interface for its state.
+        TC information for all interfaces comes from a single host-wide qdisc read.
     """
-    all_interfaces = BRIDGES + VETH_PAIRS
-    tc_status = {}
-
-    for iface in all_interfaces:
-        result = subprocess.run(
-            ["tc", "qdisc", "show", "dev", iface],
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-
-        tc_info = {
-            "interface": iface,
-            "has_tc": False,
-            "qdiscs": [],
-            "bandwidth_limit": None,
-            "burst": None,
-        }
-
-        if result.returncode == 0 and result.stdout.strip():
-            lines = result.stdout.strip().split("\n")
-            for line in lines:
-                if re.search(r"\b(noqueue|pfifo_fast|mq|fq_codel)\b", line):
-                    continue
-                if "tbf" in line or "netem" in line or "htb" in line:
-                    tc_info["has_tc"] = True
-                    tc_info["qdiscs"].append(line)
-                    if "tbf" in line:
-                        rate_match = re.search(r"rate\s+(\d+)(\w+)", line)
-                        if rate_match:
-                            tc_info["bandwidth_limit"] = (
-                                f"{rate_match.group(1)}{rate_match.group(2)}"
-                            )
-
-        tc_status[iface] = TCSettings(**tc_info)
+    inventory = get_inventory()
+    status = _network_status(
+        inventory, read_all_tc_settings(inventory.interfaces()), read_links()
+    )
+    return shape_output(status, fields, max_items)
 
-    interfaces = {}
-    for iface in BRIDGES + VETH_PAIRS[:4]:
-        result = subprocess.run(
-            ["ip", "link", "show", iface], capture_output=True, text=True, timeout=2
-        )
-        if result.returncode == 0:
-            interfaces[iface] = InterfaceState(
-                exists=True,
-                state="UP" if "UP" in result.stdout else "DOWN",
-            )
 
-    return NetworkStatus(tc_settings=tc_status, interfaces=interfaces)
+@_async_impl(get_network_status)
+async def _aget_network_status(
+    fields: Optional[List[str]] = None, max_items: int = TOOL_OUTPUT_MAX_ITEMS
+) -> Dict[str, Any]:
+    status = _network_status(*await acheck_interfaces())
+    return shape_output(status, fields, max_items)
 
 
 @tool
@@ -358,6 +393,7 @@ def detect_tc_issues() -> List[TCIssue]:
         - type: Type of TC issue ('bandwidth_limit' or 'tc_configured')
         - bandwidth_limit: The bandwidth limit if TBF is configured (e.g., '1Mbit')
         - burst: Burst size if configured
+        - delay_ms / jitter_ms / loss_percent: netem settings if configured
         - description: Human-readable description of the issue
 
     Example:
@@ -376,75 +412,21 @@ def detect_tc_issues() -> List[TCIssue]:
         Only returns interfaces that actually have TC configured (has_tc=True).
         Interfaces without TC are not included in the results.
     """
-    issues = []
-    all_interfaces = BRIDGES + VETH_PAIRS
-    tc_status = {}
-
-    for iface in all_interfaces:
-        result = subprocess.run(
-            ["tc", "qdisc", "show", "dev", iface],
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-
-        tc_info = {
-            "interface": iface,
-            "has_tc": False,
-            "qdiscs": [],
-            "bandwidth_limit": None,
-            "burst": None,
-        }
-
-        if result.returncode == 0 and result.stdout.strip():
-            lines = result.stdout.strip().split("\n")
-            for line in lines:
-                if re.search(r"\b(noqueue|pfifo_fast|mq|fq_codel)\b", line):
-                    continue
-                if "tbf" in line or "netem" in line or "htb" in line:
-                    tc_info["has_tc"] = True
-                    tc_info["qdiscs"].append(line)
-                    if "tbf" in line:
-                        rate_match = re.search(r"rate\s+(\d+)(\w+)", line)
-                        if rate_match:
-                            tc_info["bandwidth_limit"] = (
-                                f"{rate_match.group(1)}{rate_match.group(2)}"
-                            )
-                        burst_match = re.search(r"burst\s+(\d+)(\w*)", line)
-                        if burst_match:
-                            tc_info["burst"] = (
-                                f"{burst_match.group(1)}{burst_match.group(2) or 'b'}"
-                            )
-
-        tc_status[iface] = tc_info
-
-    for iface, tc_info in tc_status.items():
-        if tc_info.get("has_tc") and tc_info.get("qdiscs"):
-            has_restriction = any(
-                "tbf" in qdisc or "netem" in qdisc or "htb" in qdisc
-                for qdisc in tc_info.get("qdiscs", [])
-            )
+    return _tc_issues(
+        read_all_tc_settings(get_inventory().interfaces(), shaped_only=True)
+    )
 
-            if has_restriction:
-                issues.append(
-                    TCIssue(
-                        interface=iface,
-                        type=(
-                            "bandwidth_limit"
-                            if tc_info.get("bandwidth_limit")
-                            else "tc_configured"
-                        ),
-                        bandwidth_limit=tc_info.get("bandwidth_limit"),
-                        burst=tc_info.get("burst"),
-                        description=f"Interface {iface} has TC bandwidth limiting configured",
-                    )
-                )
 
-    return issues
+@_async_impl(detect_tc_issues)
+async def _adetect_tc_issues() -> List[TCIssue]:
+    interfaces = (await aget_inventory()).interfaces()
+    return _tc_issues(await aread_all_tc_settings(interfaces, shaped_only=True))
 
 
 @tool
-def get_topology_info() -> AggregatedTopologyInfo:
+def get_topology_info(
+    fields: Optional[List[str]] = None, max_items: int = TOOL_OUTPUT_MAX_ITEMS
+) -> Dict[str, Any]:
     """Get complete network topology and configuration information.
 
     This tool collects comprehensive information about the network infrastructure including:
@@ -462,38 +444,76 @@ def get_topology_info() -> AggregatedTopologyInfo:
     - Diagnosing connectivity issues
     - Planning network changes
 
+    Args:
+        fields: Dotted paths of the parts to return; '*' matches every key and
+                lists are stepped through. By default 'topology',
+                'network_settings.bridges' and 'network_settings.interfaces'.
+                Examples:
+                - ['topology.active_links'] - forwarding links only
+                - ['topology.stp_info.br-sw2'] - STP ports of one bridge
+                - ['topology.vms.*.state', 'topology.vm_to_bridge']
+                - ['network_settings.routing'] - the host routing table
+                - ['vm_configs'] - full VM configs, including disks
+        max_items: Maximum entries per list or mapping (bridges, VMs, links...);
+                   an '_omitted' entry or '... N more' item says what was left out.
+
     Returns:
-        Dictionary containing:
-        - topology: Complete network topology including bridges, VMs, connections
-        - network_settings: Network interface settings and configurations
+        Dictionary with the requested parts of:
+        - topology: bridges, vms, vm_to_bridge, bridge_connections,
+          veth_connections, stp_info, active_links
+        - network_settings: bridges, interfaces, routing, iptables
         - vm_configs: VM configuration details for all VMs
+        Unset fields are left out; unmatched paths are listed in '_unknown_fields'.
 
     Note:
         This is a comprehensive data collection that may take a few seconds to complete.
         For a human-readable summary, use get_topology_summary() instead.
     """
-    return collect_all_topology_info()
+    get_watcher()
+    return shape_output(
+        collect_all_topology_info(), fields or DEFAULT_TOPOLOGY_FIELDS, max_items
+    )
 
 
-@tool
-def get_topology_summary() -> NetworkSummary:
-    """Get a structured summary of the network topology.
+@_async_impl(get_topology_info)
+async def _aget_topology_info(
+    fields: Optional[List[str]] = None, max_items: int = TOOL_OUTPUT_MAX_ITEMS
+) -> Dict[str, Any]:
+    get_watcher()
+    return shape_output(
+        await acollect_all_topology_info(),
+        fields or DEFAULT_TOPOLOGY_FIELDS,
+        max_items,
+    )
 
-    This tool generates a comprehensive, structured dictionary of the network topology
-    that is easy for LLMs to parse and understand. It includes:
-    - Bridge states and interfaces
-    - VM configurations and bridge connections
-    - Bridge-to-bridge connections via veth pairs
-    - STP port states (forwarding/blocking)
-    - Active links that actually carry traffic
-    - Example paths to various hosts
-    - Network path understanding and traffic flow
 
-    Use this tool when you need a clear, structured overview of the network structure
-    for analysis or when explaining the network to users.
+@tool
+def get_topology_summary(
+    compact: bool = True, max_tokens: int = TOPOLOGY_SUMMARY_MAX_TOKENS
+) -> Union[str, NetworkSummary]:
+    """Get a summary of the network topology.
+
+    By default this returns a compact text encoding: one table per section, with
+    switches referred to by short ids (s1, s2, ...), each port listed only where
+    it is used, and default values omitted. It includes:
+    - Bridges and their switch ids (state shown only if not UP)
+    - Switch-to-switch links via veth pairs, marked BLOCKED if STP blocks them
+    - Non-forwarding STP ports
+    - VMs with the switch and vnet port they attach to
+    - Example paths from the root switch, interface addresses and notes
+
+    Use this tool first to understand the network structure before tracing paths
+    or checking TC settings.
+
+    Args:
+        compact: Return the compact text encoding (default). Set to False for the
+                 full structured summary with every field.
+        max_tokens: Approximate size budget for the compact encoding. Notes,
+                    addresses and example paths are dropped first, then rows are
+                    trimmed; a final '# omitted' line says what was left out.
 
     Returns:
-        Dictionary containing:
+        The compact encoding as text, or with compact=False a dictionary containing:
         - bridges: List of bridge information with name, state, and interfaces
         - vms: List of VM information with name, state, vcpu, memory, and bridge connections
         - bridge_connections: List of bridge-to-bridge connections via veth pairs
@@ -502,20 +522,101 @@ def get_topology_summary() -> NetworkSummary:
         - example_paths: List of example paths to various hosts with interfaces used
         - network_notes: List of important notes about network behavior
         - key_interfaces: List of key interface settings
+    """
+    get_watcher()
+    summary = build_topology_summary()
+    return encode_topology(summary, max_tokens) if compact else summary
 
-    Note:
-        This summary is optimized for LLM consumption with structured data format
-        and includes important notes about STP behavior and traffic flow patterns.
+
+@_async_impl(get_topology_summary)
+async def _aget_topology_summary(
+    compact: bool = True, max_tokens: int = TOPOLOGY_SUMMARY_MAX_TOKENS
+) -> Union[str, NetworkSummary]:
+    get_watcher()
+    summary = await abuild_topology_summary()
+    return encode_topology(summary, max_tokens) if compact else summary
+
+
+@tool
+def get_forwarding_path(source: str, target: str) -> ForwardingPath:
+    """Get the active forwarding path between two hosts or switches.
+
+    This tool looks up the shortest path through FORWARDING links only, so BLOCKING
+    links are never part of the result. Paths are precomputed per topology snapshot
+    and STP changes are picked up from kernel events as they happen, so this is
+    cheap to call for any pair of VMs, not only from the root switch.
+
+    Use this tool when you need to know which interfaces traffic between two
+    endpoints actually crosses, e.g. before checking TC settings on the path.
+
+    Args:
+        source: VM name (e.g., 'host1') or switch (e.g., 's1', 'br-sw1').
+        target: VM name (e.g., 'host4') or switch.
+
+    Returns:
+        Dictionary containing:
+        - source / target: The endpoints that were requested
+        - switches: Switches traversed in order (e.g., ['s3', 's1', 's2'])
+        - hops: Each switch-to-switch hop with its egress interface and the
+          peer interface on the next switch
+        - interfaces: Every interface on the path in order, including the VMs'
+          vnet access ports
+        If no active path exists, switches/hops/interfaces are empty.
     """
-    return build_topology_summary()
+    get_watcher()
+    path = calculate_path_between(source, target)
+    return path or ForwardingPath(source=source, target=target)
+
+
+@_async_impl(get_forwarding_path)
+async def _aget_forwarding_path(source: str, target: str) -> ForwardingPath:
+    get_watcher()
+    path = await acalculate_path_between(source, target)
+    return path or ForwardingPath(source=source, target=target)
+
+
+@tool
+def get_topology_changes(since: Optional[int] = None) -> TopologyChanges:
+    """Get what changed in the network since a previous call.
+
+    Instead of pulling the whole topology again, use this tool on later turns to
+    see only the differences: bridges added/removed or going UP/DOWN, veth and
+    active link changes, STP port state flips (e.g. forwarding -> blocking), TC
+    qdiscs added, changed or removed, and VM state changes.
+
+    Args:
+        since: The 'cursor' returned by your previous call. Omit it on the first
+               call to get the current cursor without any changes.
+
+    Returns:
+        Dictionary containing:
+        - cursor: Pass this as 'since' next time
+        - changes: List of changes, each with seq, timestamp, kind ('bridge',
+          'veth', 'link', 'stp', 'tc' or 'vm'), subject, old and new values and a
+          description (e.g. 'STP port br-sw2 veth-sw2-sw4 changed: forwarding -> blocking')
+        - baseline: True if no earlier snapshot existed to compare against
+        - truncated: True if some changes after 'since' are no longer kept;
+          call get_topology_summary() again in that case
+    """
+    get_watcher()
+    return changes_since(since)
+
+
+@_async_impl(get_topology_changes)
+async def _aget_topology_changes(since: Optional[int] = None) -> TopologyChanges:
+    get_watcher()
+    return await achanges_since(since)
 
 
 NETWORK_MANAGER_TOOLS = [
     get_tc_settings,
     get_all_tc_settings,
     get_interface_stats,
+    get_interface_throughput,
     get_network_status,
     detect_tc_issues,
     get_topology_info,
     get_topology_summary,
+    get_forwarding_path,
+    get_topology_changes,
 ]
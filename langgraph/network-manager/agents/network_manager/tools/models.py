@@ -1,33 +1,17 @@
-from typing import Dict, List, Optional
-
-from network.models import AggregatedTopologyInfo, NetworkSummary
+from typing import Dict, Optional
+
+from network.models import (
+    AggregatedTopologyInfo,
+    ForwardingPath,
+    InterfaceRates,
+    InterfaceStats,
+    NetworkSummary,
+    TCSettings,
+    TopologyChanges,
+)
 from pydantic import BaseModel
 
 
-class TCSettings(BaseModel):
-    """Traffic control settings for a network interface."""
-
-    interface: str
-    has_tc: bool
-    qdiscs: List[str] = []
-    bandwidth_limit: Optional[str] = None
-    burst: Optional[str] = None
-    has_netem: Optional[bool] = None
-
-
-class InterfaceStats(BaseModel):
-    """Network interface statistics."""
-
-    interface: str
-    exists: bool
-    rx_bytes: int = 0
-    tx_bytes: int = 0
-    rx_packets: int = 0
-    tx_packets: int = 0
-    rx_errors: int = 0
-    tx_errors: int = 0
-
-
 class InterfaceState(BaseModel):
     """Interface state information."""
 
@@ -49,4 +33,7 @@ class TCIssue(BaseModel):
     type: str
     bandwidth_limit: Optional[str] = None
     burst: Optional[str] = None
+    delay_ms: Optional[float] = None
+    jitter_ms: Optional[float] = None
+    loss_percent: Optional[float] = None
     description: str
@@ -18,7 +18,10 @@ traffic_controller = make_agent(
       2.  **Determine Action:**
           -   **"Increase Bandwidth" / "Fix Slow"** -> Use `remove_tc`.
           -   **"Limit Speed"** -> Use `apply_bandwidth_limit`.
-      3.  **Safety Check:** ONLY modify interfaces that the `network_manager` identified as **Active/Forwarding**. Do not touch Blocking links.
+          -   **A whole path between two hosts** (e.g. "host1 to host4 is slow") -> Use one `shape_path` call with the two hosts and `remove` or `limit`.
+          -   **Several other interfaces** -> Use one `apply_tc_batch` call with an entry per interface instead of one call each. If it reports `rolled_back`, nothing was changed.
+      3.  **Verify:** After changing TC on a path, call `measure_path` for the same two hosts and report the measured throughput and RTT.
+      4.  **Safety Check:** ONLY modify interfaces that the `network_manager` identified as **Active/Forwarding**. Do not touch Blocking links.
 
       **Response:**
       -   Perform the tool execution.
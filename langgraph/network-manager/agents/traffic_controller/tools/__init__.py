@@ -1,11 +1,21 @@
-import re
 import subprocess
-from typing import List
+from typing import List, Literal
 
 from langchain_core.tools import tool
-from network.infrastructure import get_all_stp_info
-
-from .models import ActiveLink, TCOperationResult, TCSettings
+from network import probe, shaping
+from network.cache import topology_cache
+from network.infrastructure import collect_active_links
+from network.tc import read_tc_settings
+
+from .models import (
+    ActiveLink,
+    PathShapingResult,
+    ProbeResult,
+    ShapingSpec,
+    TCBatchResult,
+    TCOperationResult,
+    TCSettings,
+)
 
 
 @tool
@@ -31,6 +41,8 @@ def get_tc_settings(interface: str) -> TCSettings:
         - bandwidth_limit: Bandwidth limit if TBF is configured (e.g., '1Mbit')
         - burst: Burst size if configured (e.g., '32Kb')
         - has_netem: Boolean indicating if netem (delay/loss) is configured
+        - rate_bps / burst_bytes: Bandwidth limit in bits/s and burst in bytes
+        - delay_ms / jitter_ms / loss_percent: netem delay, jitter and packet loss
 
     Example:
         get_tc_settings('veth-sw1-sw2') might return:
@@ -42,53 +54,7 @@ def get_tc_settings(interface: str) -> TCSettings:
             'qdiscs': ['qdisc tbf 0: root refcnt 2 rate 1Mbit burst 32Kb ...']
         }
     """
-    result = subprocess.run(
-        ["tc", "qdisc", "show", "dev", interface],
-        capture_output=True,
-        text=True,
-        timeout=5,
-    )
-
-    tc_info = {
-        "interface": interface,
-        "has_tc": False,
-        "qdiscs": [],
-        "bandwidth_limit": None,
-        "burst": None,
-    }
-
-    if result.returncode == 0 and result.stdout.strip():
-        lines = result.stdout.strip().split("\n")
-
-        for line in lines:
-            if re.search(r"\b(noqueue|pfifo_fast|mq|fq_codel)\b", line):
-                continue
-
-            if "tbf" in line:
-                tc_info["has_tc"] = True
-                tc_info["qdiscs"].append(line)
-                rate_match = re.search(r"rate\s+(\d+)(\w+)", line)
-                if rate_match:
-                    tc_info["bandwidth_limit"] = (
-                        f"{rate_match.group(1)}{rate_match.group(2)}"
-                    )
-                burst_match = re.search(r"burst\s+(\d+)(\w*)", line)
-                if burst_match:
-                    tc_info["burst"] = (
-                        f"{burst_match.group(1)}{burst_match.group(2) or 'b'}"
-                    )
-
-            elif "netem" in line:
-                tc_info["has_tc"] = True
-                tc_info["qdiscs"].append(line)
-                if "loss" in line or "delay" in line:
-                    tc_info["has_netem"] = True
-
-            elif "htb" in line:
-                tc_info["has_tc"] = True
-                tc_info["qdiscs"].append(line)
-
-    return TCSettings(**tc_info)
+    return read_tc_settings(interface)
 
 
 @tool
@@ -123,58 +89,17 @@ def get_active_links() -> List[ActiveLink]:
         - BLOCKING links are excluded (they don't affect traffic)
         - Each link represents a bidirectional connection between two switches
     """
-    stp_info = get_all_stp_info()
-    port_states = {}
-    for bridge_name, bridge_stp in stp_info.bridges.items():
-        for port in bridge_stp.ports:
-            interface = port.interface
-            state = port.state.lower()
-            if interface:
-                port_states[interface] = state
-
-    active_links = []
-    processed_links = set()
-
-    for bridge_name, bridge_stp in stp_info.bridges.items():
-        for port in bridge_stp.ports:
-            interface = port.interface
-            state = port.state.lower()
-
-            if not interface or state != "forwarding":
-                continue
-
-            match = re.match(r"veth-(\w+)-(\w+)", interface)
-            if not match:
-                continue
-
-            from_node = match.group(1)
-            to_node = match.group(2)
-
-            link_key = tuple(sorted([from_node, to_node]))
-
-            if link_key in processed_links:
-                continue
-
-            forward_interface = interface
-            reverse_interface = f"veth-{to_node}-{from_node}"
-
-            forward_state = port_states.get(forward_interface, "").lower()
-            reverse_state = port_states.get(reverse_interface, "").lower()
-
-            if forward_state == "forwarding" and reverse_state == "forwarding":
-                active_links.append(
-                    ActiveLink(
-                        from_node=from_node,
-                        to=to_node,
-                        interface=forward_interface,
-                        reverse_interface=reverse_interface,
-                        state="forwarding",
-                        bridge=bridge_name,
-                    )
-                )
-                processed_links.add(link_key)
-
-    return active_links
+    return [
+        ActiveLink(
+            from_node=link.source,
+            to=link.target,
+            interface=link.interface,
+            reverse_interface=link.reverse_interface,
+            state=link.state,
+            bridge=link.bridge,
+        )
+        for link in collect_active_links()
+    ]
 
 
 @tool
@@ -207,12 +132,15 @@ def remove_tc(interface: str) -> TCOperationResult:
         - Returns success=True even if TC was not present (no error)
         - This operation is immediate and affects traffic flow
     """
-    result = subprocess.run(
-        ["sudo", "-n", "tc", "qdisc", "del", "dev", interface, "root"],
-        capture_output=True,
-        text=True,
-        timeout=15,
-    )
+    try:
+        result = subprocess.run(
+            ["sudo", "-n", "tc", "qdisc", "del", "dev", interface, "root"],
+            capture_output=True,
+            text=True,
+            timeout=15,
+        )
+    finally:
+        topology_cache.invalidate(f"tc:{interface}")
     success = (
         result.returncode == 0
         or "Cannot find" in result.stderr
@@ -271,19 +199,22 @@ def apply_bandwidth_limit(
         - The limit is applied immediately and affects all traffic on the interface
         - To remove the limit, use remove_tc() tool
     """
-    # Remove existing TC first
-    subprocess.run(
-        ["sudo", "-n", "tc", "qdisc", "del", "dev", interface, "root"],
-        capture_output=True,
-        text=True,
-        timeout=15,
-    )
-
-    cmd = ["sudo", "-n", "tc", "qdisc", "add", "dev", interface, "root", "tbf"]
-    cmd.extend(["rate", rate])
-    cmd.extend(["burst", burst if burst else "32Kb"])
-    cmd.extend(["latency", "50ms"])
-    result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+    try:
+        # Remove existing TC first
+        subprocess.run(
+            ["sudo", "-n", "tc", "qdisc", "del", "dev", interface, "root"],
+            capture_output=True,
+            text=True,
+            timeout=15,
+        )
+
+        cmd = ["sudo", "-n", "tc", "qdisc", "add", "dev", interface, "root", "tbf"]
+        cmd.extend(["rate", rate])
+        cmd.extend(["burst", burst if burst else "32Kb"])
+        cmd.extend(["latency", "50ms"])
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+    finally:
+        topology_cache.invalidate(f"tc:{interface}")
 
     if result.returncode == 0:
         success = True
@@ -302,9 +233,122 @@ def apply_bandwidth_limit(
     )
 
 
+@tool
+def apply_tc_batch(changes: List[ShapingSpec]) -> TCBatchResult:
+    """Apply or remove bandwidth limits on several interfaces in one transaction.
+
+    All changes run in a single `tc -batch` call. If any of them fails, every listed
+    interface is restored to the qdiscs it had before, so the network is never left
+    half-shaped. Prefer this over calling apply_bandwidth_limit / remove_tc once per
+    interface, e.g. when limiting or clearing every interface on a forwarding path.
+
+    Args:
+        changes: One entry per interface, each with:
+                 - interface: Interface name (e.g., 'veth-sw1-sw2')
+                 - action: 'limit' to apply a TBF bandwidth limit, 'remove' to clear TC
+                 - rate / burst / latency: TBF parameters for 'limit'
+                   (defaults '1Mbit', '32Kb', '50ms')
+                 Each interface may appear only once.
+
+    Returns:
+        Dictionary containing:
+        - success: True if every change was applied
+        - details: Human-readable description of the result
+        - interfaces: The interfaces in the batch
+        - commands: The tc batch lines that were run
+        - rolled_back: True if the batch failed and all interfaces were restored
+        - error: tc's error message if the batch failed or was refused
+
+    Note:
+        - Requires sudo privileges (passwordless sudo should be configured)
+        - Nothing is changed if an interface does not exist or has qdiscs other than
+          TBF/netem that could not be restored (e.g. HTB)
+    """
+    return shaping.apply_tc_batch(changes)
+
+
+@tool
+def shape_path(
+    source: str,
+    target: str,
+    action: Literal["limit", "remove"] = "remove",
+    rate: str = "1Mbit",
+    burst: str = "32Kb",
+) -> PathShapingResult:
+    """Apply or clear TC on every link of the forwarding path between two hosts.
+
+    The path is resolved from STP FORWARDING links only (BLOCKING links are never
+    touched), and every interface on it (both veth ends of each hop and the hosts'
+    vnet ports) is changed in one transactional batch. One call replaces looking up
+    active links and calling remove_tc / apply_bandwidth_limit hop by hop.
+
+    Use this tool when:
+    - A host is slow: shape_path('host1', 'host4', 'remove') clears every limit
+      between the two hosts
+    - Limiting the whole path: shape_path('host1', 'host4', 'limit', rate='10Mbit')
+
+    Args:
+        source: VM name (e.g., 'host1') or switch (e.g., 's1', 'br-sw1').
+        target: VM name (e.g., 'host4') or switch.
+        action: 'remove' to clear TC (default) or 'limit' to apply a TBF limit.
+        rate: Bandwidth rate for 'limit' (e.g., '1Mbit', '100Mbit').
+        burst: Burst size for 'limit' (e.g., '32Kb').
+
+    Returns:
+        Dictionary containing:
+        - source / target: The endpoints that were requested
+        - switches: Switches on the path (e.g., ['s3', 's1', 's2'])
+        - batch: The batch result (success, details, interfaces, commands,
+          rolled_back, error). If no active path exists, success is False.
+
+    Note:
+        - Requires sudo privileges (passwordless sudo should be configured)
+        - If any change fails, all interfaces on the path are restored
+    """
+    return shaping.shape_path(source, target, action, rate, burst)
+
+
+@tool
+def measure_path(source: str, target: str, duration: float = 3.0) -> ProbeResult:
+    """Measure achieved throughput, round-trip time and loss between two hosts.
+
+    Probe endpoints are attached to the switches at both ends of the active
+    forwarding path, a TCP stream is sent across it for `duration` seconds, and
+    then 20 UDP echo probes measure RTT and loss. The traffic crosses every
+    switch-to-switch hop of the path, so TC limits on those links show up.
+
+    Use this tool after apply_bandwidth_limit, remove_tc, apply_tc_batch or
+    shape_path to verify that the change took effect, e.g. that throughput is close
+    to the applied rate, or no longer limited after removing TC.
+
+    Args:
+        source: VM name (e.g., 'host1') or switch (e.g., 's1', 'br-sw1').
+        target: VM name (e.g., 'host4') or switch.
+        duration: Seconds of TCP streaming (default 3).
+
+    Returns:
+        Dictionary containing:
+        - switches: Switches on the measured path
+        - throughput / throughput_bps: Achieved TCP throughput (e.g., '0.96Mbit')
+        - rtt_ms: Round-trip time statistics (mean, p50, p95, p99, max)
+        - probes_sent / probes_received / loss_percent: UDP probe loss
+        - error: Why the measurement could not be made, if it failed
+
+    Note:
+        - Requires sudo privileges for ip netns (passwordless sudo should be configured)
+        - Each probe waits a few seconds for STP to let its probe ports forward;
+          the ports are removed again afterwards
+        - The hosts' own vnet ports are not on the probe path
+    """
+    return probe.measure_path(source, target, duration)
+
+
 TRAFFIC_CONTROLLER_TOOLS = [
     get_tc_settings,
     get_active_links,
     remove_tc,
     apply_bandwidth_limit,
+    apply_tc_batch,
+    shape_path,
+    measure_path,
 ]
@@ -1,19 +1,15 @@
-from typing import List, Optional
-
+from typing import Optional
+
+from network.models import (
+    PathShapingResult,
+    ProbeResult,
+    ShapingSpec,
+    TCBatchResult,
+    TCSettings,
+)
 from pydantic import BaseModel
 
 
-class TCSettings(BaseModel):
-    """Traffic control settings for a network interface."""
-
-    interface: str
-    has_tc: bool
-    qdiscs: List[str] = []
-    bandwidth_limit: Optional[str] = None
-    burst: Optional[str] = None
-    has_netem: Optional[bool] = None
-
-
 class ActiveLink(BaseModel):
     """Active network link based on STP forwarding state."""
 
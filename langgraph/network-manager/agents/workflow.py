@@ -1,9 +1,114 @@
+import os
+import re
+import time
+from typing import Optional
+
 from agents.common import AgentState
 from agents.general_chatbot.agent import general_chatbot
 from agents.network_manager.agent import network_manager
 from agents.tech_reporter.agent import tech_reporter
 from agents.traffic_controller.agent import traffic_controller
 from langgraph.graph import END, START, StateGraph
+from network.metrics import LabeledCounter
+
+# Per-run routing budgets: agent hand-offs, and seconds since the run started
+ROUTING_MAX_HOPS = int(os.environ.get("ROUTING_MAX_HOPS", "8"))
+ROUTING_TIME_BUDGET = float(os.environ.get("ROUTING_TIME_BUDGET", "300"))
+# A sequence of hand-offs repeated this many times in a row is a loop
+# (3 lets investigate -> shape -> verify -> shape again through; exact repeats
+# with the same reasoning are caught on their own)
+ROUTING_CYCLE_REPEATS = int(os.environ.get("ROUTING_CYCLE_REPEATS", "3"))
+
+REPORTER = "tech_reporter"
+
+routing_stops = LabeledCounter(
+    "network_agent_routing_stops_total",
+    ("reason", "target"),
+    "Runs whose routing was cut short, by budget or loop, and where they went",
+)
+
+
+def _reasoning_key(reasoning: Optional[str]) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", (reasoning or "").lower()))
+
+
+def detect_loop(history: list[list[str]]) -> Optional[str]:
+    """Describe the routing loop that the last hop closes, if any.
+
+    ``history`` holds ``[agent, next_agent, reasoning key]`` per hop. A loop is
+    a hop repeated with the same reasoning, or the same sequence of hand-offs
+    repeated ``ROUTING_CYCLE_REPEATS`` times in a row.
+    """
+    agent, next_agent, reasoning = history[-1]
+    if reasoning and history[-1] in history[:-1]:
+        return f"{agent} routed to {next_agent} again for the same reason"
+
+    hops = [(entry[0], entry[1]) for entry in history]
+    repeats = max(2, ROUTING_CYCLE_REPEATS)
+    for period in range(1, len(hops) // repeats + 1):
+        block = hops[-period:]
+        if all(
+            hops[-period * (i + 1) : len(hops) - period * i] == block
+            for i in range(1, repeats)
+        ):
+            cycle = " -> ".join([*(hop[0] for hop in block), block[-1][1]])
+            return f"hand-offs {cycle} repeated {repeats} times"
+    return None
+
+
+def start_session(state: AgentState):
+    """Reset the routing budgets for a new run."""
+    return {
+        "hop_count": 0,
+        "route_history": [],
+        "session_started_at": time.time(),
+        "routing_stop_reason": None,
+    }
+
+
+def supervise_routing(state: AgentState):
+    """Check the hand-off an agent asked for against the run's budgets.
+
+    When the hop or time budget is spent, or the hand-off closes a loop, the
+    run goes to the tech_reporter to summarize what was found so far (or ends,
+    if the reporter just spoke or already ran for this reason). The cause is
+    kept in ``routing_stop_reason`` and passed to the reporter as reasoning.
+    """
+    agent = state.get("current_agent") or ""
+    next_agent = state.get("next_agent")
+    if next_agent is None:
+        return {}
+    if state.get("routing_stop_reason"):
+        # The reporter has had its turn after the stop
+        return {"next_agent": None}
+
+    hops = (state.get("hop_count") or 0) + 1
+    history = [
+        *(state.get("route_history") or []),
+        [agent, next_agent, _reasoning_key(state.get("reasoning"))],
+    ]
+    update = {"hop_count": hops, "route_history": history}
+
+    elapsed = time.time() - (state.get("session_started_at") or time.time())
+    if hops > ROUTING_MAX_HOPS:
+        kind, reason = "hops", f"hop budget of {ROUTING_MAX_HOPS} hand-offs spent"
+    elif elapsed > ROUTING_TIME_BUDGET:
+        kind, reason = "time", f"time budget of {ROUTING_TIME_BUDGET:g}s spent"
+    else:
+        kind, reason = "loop", detect_loop(history)
+    if reason is None:
+        return update
+
+    target = None if agent == REPORTER else REPORTER
+    routing_stops.inc(kind, target or END)
+    update["routing_stop_reason"] = reason
+    update["next_agent"] = target
+    if target == REPORTER:
+        update["reasoning"] = (
+            f"Routing stopped ({reason}). Summarize the findings so far for the "
+            "user, including what is still unresolved."
+        )
+    return update
 
 
 def route_to_next_agent(state: AgentState):
@@ -17,18 +122,22 @@ def route_to_next_agent(state: AgentState):
 workflow = StateGraph(AgentState)
 
 # Add all agent nodes
+workflow.add_node("start_session", start_session)
 workflow.add_node("network_manager", network_manager)
 workflow.add_node("traffic_controller", traffic_controller)
 workflow.add_node("tech_reporter", tech_reporter)
 workflow.add_node("general_chatbot", general_chatbot)
+workflow.add_node("supervise_routing", supervise_routing)
 
 # Start with general_chatbot by default (can be changed based on initial routing logic)
-workflow.add_edge(START, "general_chatbot")
+workflow.add_edge(START, "start_session")
+workflow.add_edge("start_session", "general_chatbot")
 
-# Add conditional edges from each agent to route to the next agent or end
-workflow.add_conditional_edges("network_manager", route_to_next_agent)
-workflow.add_conditional_edges("traffic_controller", route_to_next_agent)
-workflow.add_conditional_edges("tech_reporter", route_to_next_agent)
-workflow.add_conditional_edges("general_chatbot", route_to_next_agent)
+# Every hand-off goes through the routing supervisor, then to the next agent or the end
+workflow.add_edge("network_manager", "supervise_routing")
+workflow.add_edge("traffic_controller", "supervise_routing")
+workflow.add_edge("tech_reporter", "supervise_routing")
+workflow.add_edge("general_chatbot", "supervise_routing")
+workflow.add_conditional_edges("supervise_routing", route_to_next_agent)
 
 graph = workflow.compile()
@@ -0,0 +1,102 @@
+"""Per-turn model binding overhead of the agents.
+
+``make_agent`` binds each agent's tools to the model once, when the graph is
+built. Before that, every agent turn called ``bind_tools`` and converted all
+of its tools to JSON schemas again. For each agent this reports:
+
+- ``tools``: tools bound to the model (including the routing tool),
+- ``schema_kib``: size of the tool schemas sent with every request,
+- ``bind_ms``: median time to bind them, i.e. what each turn saved.
+
+Usage::
+
+    python -m benchmarks.agents --repeats 50
+
+No model server is needed: binding doesn't contact it.
+"""
+
+import argparse
+import json
+import statistics
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from pydantic import BaseModel
+
+
+class BindingResult(BaseModel):
+    agent: str
+    mode: str
+    tools: int
+    schema_kib: float
+    bind_ms: float
+
+
+def agent_tools() -> Dict[str, Sequence[Callable]]:
+    from agents.network_manager.tools import NETWORK_MANAGER_TOOLS
+    from agents.traffic_controller.tools import TRAFFIC_CONTROLLER_TOOLS
+
+    return {
+        "network_manager": NETWORK_MANAGER_TOOLS,
+        "traffic_controller": TRAFFIC_CONTROLLER_TOOLS,
+        "tech_reporter": [],
+        "general_chatbot": [],
+    }
+
+
+def _median_ms(call: Callable[[], object], repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        call()
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+
+def measure(repeats: int) -> List[BindingResult]:
+    from agents.common import bind_agent_model, routing_mode
+
+    results = []
+    for agent, tools in agent_tools().items():
+        mode = routing_mode(tools)
+        model = bind_agent_model(tools, mode)
+        schemas = getattr(model, "kwargs", {}).get("tools", [])
+        results.append(
+            BindingResult(
+                agent=agent,
+                mode=mode,
+                tools=len(schemas),
+                schema_kib=round(len(json.dumps(schemas)) / 1024, 1),
+                bind_ms=round(
+                    _median_ms(lambda: bind_agent_model(tools, mode), repeats), 3
+                ),
+            )
+        )
+    return results
+
+
+def format_table(results: List[BindingResult]) -> str:
+    header = f"{'agent':<20} {'mode':<6} {'tools':>5} {'schema_kib':>10} {'bind_ms':>9}"
+    rows = [
+        f"{r.agent:<20} {r.mode:<6} {r.tools:>5} {r.schema_kib:>10} {r.bind_ms:>9}"
+        for r in results
+    ]
+    return "\n".join([header, *rows])
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.agents")
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--output", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = measure(args.repeats)
+    print(format_table(results))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump([result.model_dump() for result in results], f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
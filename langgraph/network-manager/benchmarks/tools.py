@@ -0,0 +1,241 @@
+"""Benchmarks for the network-manager tool layer.
+
+Each benchmarked call runs inside a ``network.lab`` simulator at several
+topology sizes (or against the host with ``--live``). For every size and call
+it reports:
+
+- ``cold_ms``: median wall time with an empty ``topology_cache``,
+- ``warm_ms``: wall time of a repeated call served from the cache,
+- ``spawns`` / ``warm_spawns``: processes started by the cold and warm call,
+- ``peak_kib``: peak Python memory allocated during a cold call (tracemalloc).
+
+Usage::
+
+    python -m benchmarks.tools run --sizes 4,32,128 --save-baseline
+    python -m benchmarks.tools run --baseline benchmarks/baseline.json
+
+With ``--baseline`` the run fails (exit status 1) if any call got more than
+``--tolerance`` slower cold, or started more processes, than in the baseline.
+The topology watcher is turned off while measuring so cold calls stay cold.
+Requires root (or passwordless sudo) for the simulator.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+DEFAULT_SIZES = "4,32,128"
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+BENCH_NAMESPACE = "nmbench"
+# Cold-time differences below this are noise, whatever the tolerance
+NOISE_FLOOR_MS = 25.0
+
+
+class BenchmarkResult(BaseModel):
+    tool: str
+    size: str
+    cold_ms: float
+    warm_ms: float
+    spawns: int
+    warm_spawns: int
+    peak_kib: float
+
+
+def benchmarked_calls() -> Dict[str, Callable[[], object]]:
+    """The calls that are measured, by name."""
+    from agents.network_manager.tools import (
+        detect_tc_issues,
+        get_all_tc_settings,
+        get_topology_summary,
+    )
+    from network.discovery import get_inventory
+    from network.infrastructure import calculate_path_to_host
+
+    return {
+        "get_topology_summary": lambda: get_topology_summary.invoke({}),
+        "get_all_tc_settings": lambda: get_all_tc_settings.invoke({}),
+        "detect_tc_issues": lambda: detect_tc_issues.invoke({}),
+        "calculate_path_to_host": lambda: [
+            calculate_path_to_host(vm) for vm in get_inventory().vms
+        ],
+    }
+
+
+def measure(size: str, repeats: int) -> List[BenchmarkResult]:
+    """Measure every call in the current network namespace."""
+    from network.cache import topology_cache
+    from network.metrics import counting
+
+    results = []
+    for name, call in benchmarked_calls().items():
+        cold_times = []
+        for _ in range(repeats):
+            topology_cache.clear()
+            with counting() as spawns:
+                started = time.perf_counter()
+                call()
+                cold_times.append((time.perf_counter() - started) * 1000)
+
+        with counting() as warm_spawns:
+            started = time.perf_counter()
+            call()
+            warm_ms = (time.perf_counter() - started) * 1000
+
+        topology_cache.clear()
+        tracemalloc.start()
+        try:
+            call()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        results.append(
+            BenchmarkResult(
+                tool=name,
+                size=size,
+                cold_ms=round(statistics.median(cold_times), 2),
+                warm_ms=round(warm_ms, 3),
+                spawns=spawns.subprocesses,
+                warm_spawns=warm_spawns.subprocesses,
+                peak_kib=round(peak / 1024, 1),
+            )
+        )
+    return results
+
+
+def run_size(switches: int, repeats: int) -> List[BenchmarkResult]:
+    """Bring up a simulated lab of ``switches`` switches and measure inside it."""
+    from network.lab import (
+        IP_COMMAND,
+        generate_layout,
+        lab_down,
+        lab_up,
+        libvirt_uri,
+    )
+
+    layout = generate_layout(
+        switches, hosts=max(1, switches // 2), namespace=BENCH_NAMESPACE
+    )
+    lab_down(layout)
+    with tempfile.TemporaryDirectory(prefix="network-bench-") as state_dir:
+        try:
+            lab_up(layout, state_dir=state_dir)
+            uri = libvirt_uri(state_dir)
+            result = subprocess.run(
+                IP_COMMAND
+                + ["netns", "exec", layout.namespace, "env", "TOPOLOGY_WATCHER=off"]
+                + [f"LIBVIRT_URI={uri}", f"LIBVIRT_DEFAULT_URI={uri}"]
+                + [sys.executable, "-m", "benchmarks.tools", "measure"]
+                + ["--size", str(switches), "--repeats", str(repeats)],
+                capture_output=True,
+                text=True,
+                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            )
+        finally:
+            lab_down(layout)
+    if result.returncode != 0:
+        raise RuntimeError(f"measuring {switches} switches failed: {result.stderr}")
+    return [BenchmarkResult(**entry) for entry in json.loads(result.stdout)]
+
+
+def find_regressions(
+    results: List[BenchmarkResult],
+    baseline: List[BenchmarkResult],
+    tolerance: float,
+) -> List[str]:
+    """Describe every result that is slower or spawns more than its baseline."""
+    previous = {(entry.tool, entry.size): entry for entry in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get((result.tool, result.size))
+        if before is None:
+            continue
+        limit = max(before.cold_ms * (1 + tolerance), before.cold_ms + NOISE_FLOOR_MS)
+        if result.cold_ms > limit:
+            regressions.append(
+                f"{result.tool} @ {result.size}: {result.cold_ms:.1f} ms "
+                f"(baseline {before.cold_ms:.1f} ms)"
+            )
+        if result.spawns > before.spawns:
+            regressions.append(
+                f"{result.tool} @ {result.size}: {result.spawns} processes "
+                f"(baseline {before.spawns})"
+            )
+    return regressions
+
+
+def format_table(results: List[BenchmarkResult]) -> str:
+    header = (
+        f"{'tool':<24} {'size':>6} {'cold ms':>10} {'warm ms':>9} "
+        f"{'spawns':>7} {'warm':>5} {'peak KiB':>9}"
+    )
+    rows = [
+        f"{r.tool:<24} {r.size:>6} {r.cold_ms:>10.1f} {r.warm_ms:>9.3f} "
+        f"{r.spawns:>7} {r.warm_spawns:>5} {r.peak_kib:>9.1f}"
+        for r in results
+    ]
+    return "\n".join([header] + rows)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="benchmark at several topology sizes")
+    run.add_argument("--sizes", default=DEFAULT_SIZES, help="switch counts")
+    run.add_argument("--repeats", type=int, default=5)
+    run.add_argument("--live", action="store_true", help="measure the host instead")
+    run.add_argument("--baseline", default=DEFAULT_BASELINE)
+    run.add_argument("--save-baseline", action="store_true")
+    run.add_argument("--tolerance", type=float, default=0.25)
+    run.add_argument("--output", help="write the results as JSON")
+
+    inner = commands.add_parser("measure", help=argparse.SUPPRESS)
+    inner.add_argument("--size", default="live")
+    inner.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.command == "measure":
+        results = measure(args.size, args.repeats)
+        print(json.dumps([result.model_dump() for result in results]))
+        return
+
+    if args.live:
+        results = measure("live", args.repeats)
+    else:
+        results = []
+        for size in args.sizes.split(","):
+            results.extend(run_size(int(size), args.repeats))
+    print(format_table(results))
+
+    dumped = json.dumps([result.model_dump() for result in results], indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(dumped + "\n")
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            f.write(dumped + "\n")
+        print(f"baseline saved to {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = [BenchmarkResult(**entry) for entry in json.load(f)]
+        regressions = find_regressions(results, baseline, args.tolerance)
+        if regressions:
+            print("regressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("no regressions against", args.baseline)
+
+
+if __name__ == "__main__":
+    main()
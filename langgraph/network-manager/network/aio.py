@@ -0,0 +1,287 @@
+"""Asyncio variants of the network collectors.
+
+Commands run through ``asyncio.create_subprocess_exec`` and independent reads
+are fanned out with ``asyncio.gather``, so several tool calls issued in one LLM
+turn overlap on the event loop instead of queuing behind blocking
+``subprocess.run`` calls. Parsing and caching are shared with the synchronous
+collectors, so both paths return identical models and populate the same
+``topology_cache`` entries.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+from network import libvirt_backend
+from network.cache import topology_cache
+from network.discovery import (
+    TOPOLOGY_DISCOVERY,
+    build_inventory,
+    inventory_tracker,
+    parse_domain_list,
+)
+from network.infrastructure import (
+    SNAPSHOT_DEPENDS_ON,
+    SNAPSHOT_MAX_WORKERS,
+    SNAPSHOT_WATCH_KEYS,
+    assemble_topology_snapshot,
+    build_path_index,
+    parse_routing_info,
+    parse_stp_info,
+    parse_vm_config,
+    stp_info_from_port_states,
+    summarize_topology,
+)
+from network.models import (
+    AggregatedTopologyInfo,
+    ForwardingPath,
+    Inventory,
+    LinkRecord,
+    NetworkSummary,
+    QdiscInfo,
+    RoutingInfo,
+    STPInfo,
+    TCSettings,
+    VMConfig,
+)
+from network.netlink import (
+    LINK_BACKENDS,
+    NETLINK_BACKEND,
+    parse_ip_links,
+    read_port_states,
+)
+from network.paths import PathIndex
+from network.tc import (
+    parse_qdiscs_json,
+    parse_qdiscs_text,
+    tc_settings_for,
+    tc_settings_from_qdiscs,
+)
+
+T = TypeVar("T")
+
+
+async def run_command(cmd: List[str], timeout: float = 5) -> Tuple[int, str, str]:
+    """Run a command without blocking the event loop.
+
+    Returns:
+        Tuple of (returncode, stdout, stderr). A missing executable or a timeout
+        yields returncode 127 or -1 respectively instead of raising.
+    """
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except FileNotFoundError as e:
+        return 127, "", str(e)
+
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        return -1, "", f"{cmd[0]} timed out after {timeout}s"
+    return process.returncode, stdout.decode(), stderr.decode()
+
+
+async def _aread_links_ip() -> Dict[str, LinkRecord]:
+    returncode, stdout, stderr = await run_command(
+        ["ip", "-json", "-s", "-d", "addr", "show"]
+    )
+    if returncode != 0:
+        raise RuntimeError(stderr.strip() or "ip -json addr show failed")
+    return parse_ip_links(stdout)
+
+
+async def aread_links(backend: Optional[str] = None) -> Dict[str, LinkRecord]:
+    """Async ``read_links``, trying backends in the same order.
+
+    The ``ip`` backend runs as an async subprocess; pyroute2 and sysfs are
+    in-process reads without a fork and run in a thread.
+    """
+    backend = backend or NETLINK_BACKEND
+    names = list(LINK_BACKENDS) if backend == "auto" else [backend]
+    for name in names:
+        try:
+            if name == "ip":
+                return await _aread_links_ip()
+            return await asyncio.to_thread(LINK_BACKENDS[name])
+        except Exception:
+            continue
+    return {}
+
+
+async def acollect_qdiscs() -> Dict[str, List[QdiscInfo]]:
+    """Async ``collect_qdiscs``."""
+    returncode, stdout, _ = await run_command(["tc", "-json", "qdisc", "show"])
+    if returncode == 0 and stdout.strip().startswith("["):
+        return parse_qdiscs_json(stdout)
+    returncode, stdout, _ = await run_command(["tc", "qdisc", "show"])
+    return parse_qdiscs_text(stdout) if returncode == 0 else {}
+
+
+async def aget_tc_snapshot() -> Dict[str, List[QdiscInfo]]:
+    return await topology_cache.aget_or_load("tc", acollect_qdiscs)
+
+
+async def aread_tc_settings(interface: str) -> TCSettings:
+    snapshot = await aget_tc_snapshot()
+    return tc_settings_from_qdiscs(interface, snapshot.get(interface, []))
+
+
+async def aread_all_tc_settings(
+    interfaces: Iterable[str], shaped_only: bool = False
+) -> Dict[str, TCSettings]:
+    return tc_settings_for(await aget_tc_snapshot(), interfaces, shaped_only)
+
+
+async def alist_domains() -> Optional[List[str]]:
+    names = await asyncio.to_thread(libvirt_backend.list_domain_names)
+    if names is not None:
+        return names
+    returncode, stdout, _ = await run_command(["virsh", "list", "--all", "--name"])
+    return parse_domain_list(stdout) if returncode == 0 else None
+
+
+async def adiscover(
+    links: Optional[Dict[str, LinkRecord]] = None,
+) -> Inventory:
+    """Async ``inventory_tracker.refresh``; reuses ``links`` if already read."""
+    if TOPOLOGY_DISCOVERY == "static":
+        return inventory_tracker.update(build_inventory({}, None))
+    if links is None:
+        links, domains = await asyncio.gather(aread_links(), alist_domains())
+    else:
+        domains = await alist_domains()
+    return inventory_tracker.update(build_inventory(links, domains))
+
+
+async def aget_inventory() -> Inventory:
+    """Async ``get_inventory``."""
+    inventory = topology_cache.peek("inventory")
+    return inventory if inventory is not None else await adiscover()
+
+
+async def aget_vm_config(vm_name: str) -> VMConfig:
+    config = await asyncio.to_thread(libvirt_backend.get_vm_config, vm_name)
+    if config is not None:
+        return config
+    returncode, dominfo, _ = await run_command(["virsh", "dominfo", vm_name])
+    if returncode != 0:
+        return parse_vm_config(vm_name, None, None)
+    returncode, domiflist, _ = await run_command(["virsh", "domiflist", vm_name])
+    return parse_vm_config(vm_name, dominfo, domiflist if returncode == 0 else None)
+
+
+async def aget_vm_configs(
+    vm_names: Iterable[str], semaphore: asyncio.Semaphore
+) -> Dict[str, VMConfig]:
+    """Bulk libvirt read in a thread, or bounded per-VM virsh calls."""
+    vm_names = list(vm_names)
+    configs = await asyncio.to_thread(libvirt_backend.get_vm_configs, vm_names)
+    if configs is not None:
+        return configs
+    return await _bounded_gather(semaphore, {v: aget_vm_config(v) for v in vm_names})
+
+
+async def aget_stp_info(bridge_name: str) -> STPInfo:
+    returncode, stdout, _ = await run_command(["brctl", "showstp", bridge_name])
+    if returncode != 0:
+        return STPInfo(bridge=bridge_name, ports=[])
+    return parse_stp_info(bridge_name, stdout)
+
+
+async def aget_all_stp_info(
+    bridges: Iterable[str], semaphore: asyncio.Semaphore
+) -> Dict[str, STPInfo]:
+    """Cached or sysfs port states, or bounded per-bridge brctl calls."""
+    cached = topology_cache.peek("stp")
+    if cached is not None:
+        return cached.bridges
+    port_states = await asyncio.to_thread(read_port_states)
+    if port_states is not None:
+        return stp_info_from_port_states(bridges, port_states)
+    return await _bounded_gather(semaphore, {b: aget_stp_info(b) for b in bridges})
+
+
+async def aget_routing_info() -> RoutingInfo:
+    returncode, stdout, _ = await run_command(["ip", "route", "show"], timeout=3)
+    return parse_routing_info(stdout) if returncode == 0 else RoutingInfo()
+
+
+async def _bounded_gather(
+    semaphore: asyncio.Semaphore, coroutines: Dict[str, object]
+) -> Dict[str, object]:
+    async def run(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    results = await asyncio.gather(*(run(c) for c in coroutines.values()))
+    return dict(zip(coroutines, results))
+
+
+async def acollect_all_topology_info() -> AggregatedTopologyInfo:
+    """Async ``collect_all_topology_info``, cached under ``snapshot``."""
+
+    async def load() -> AggregatedTopologyInfo:
+        # Raw facts already cached by the sync collectors are reused, and the
+        # ones loaded here are seeded by assemble_topology_snapshot
+        with topology_cache.watch(*SNAPSHOT_WATCH_KEYS) as watch:
+            links = topology_cache.peek("links")
+            if links is None:
+                links = await aread_links()
+                inventory = await adiscover(links)
+            else:
+                inventory = await aget_inventory()
+            semaphore = asyncio.Semaphore(SNAPSHOT_MAX_WORKERS)
+            routing, vms, stp_info = await asyncio.gather(
+                _cached_or("routing", aget_routing_info),
+                _cached_or(
+                    "vm_configs", lambda: aget_vm_configs(inventory.vms, semaphore)
+                ),
+                aget_all_stp_info(inventory.bridges, semaphore),
+            )
+            return assemble_topology_snapshot(
+                links, vms, stp_info, routing, inventory, watch=watch
+            )
+
+    return await topology_cache.aget_or_load(
+        "snapshot", load, depends_on=SNAPSHOT_DEPENDS_ON
+    )
+
+
+async def _cached_or(key: str, load: Callable[[], Awaitable[T]]) -> T:
+    cached = topology_cache.peek(key)
+    return cached if cached is not None else await load()
+
+
+async def abuild_topology_summary() -> NetworkSummary:
+    return summarize_topology(await acollect_all_topology_info())
+
+
+async def aget_path_index() -> PathIndex:
+    async def load() -> PathIndex:
+        return build_path_index((await acollect_all_topology_info()).topology)
+
+    return await topology_cache.aget_or_load(
+        "path_index", load, depends_on=("stp", "topology")
+    )
+
+
+async def acalculate_path_between(source: str, target: str) -> Optional[ForwardingPath]:
+    return (await aget_path_index()).path(source, target)
+
+
+async def acheck_interfaces() -> (
+    Tuple[Inventory, Dict[str, TCSettings], Dict[str, LinkRecord]]
+):
+    """Read the qdisc snapshot and the link table concurrently.
+
+    Returns:
+        The inventory (rediscovered from the same link table if expired), TC
+        settings for all of its interfaces and the link table.
+    """
+    snapshot, links = await asyncio.gather(aget_tc_snapshot(), aread_links())
+    inventory = topology_cache.peek("inventory") or await adiscover(links)
+    return inventory, tc_settings_for(snapshot, inventory.interfaces()), links
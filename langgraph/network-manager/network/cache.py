@@ -0,0 +1,301 @@
+"""Shared TTL cache for topology, STP and TC data.
+
+Entries are keyed by strings with ``:``-separated namespaces, e.g. ``stp``,
+``active_links`` or ``tc:veth-sw1-sw2``. Invalidating a key also drops its
+children (``tc`` drops ``tc:*``), its parents (``tc:veth-sw1-sw2`` drops
+``tc``) and every entry that was loaded with it in ``depends_on``. Listeners
+registered with ``subscribe`` are told which keys were invalidated.
+
+A value loaded while one of its keys (the key itself or a ``depends_on``) is
+invalidated is returned but not stored; invalidating unrelated keys doesn't
+affect it. ``watch`` applies the same rule to values stored with ``put``.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    TypeVar,
+)
+
+from network.metrics import count_cache
+
+T = TypeVar("T")
+
+TOPOLOGY_CACHE_TTL = float(os.environ.get("TOPOLOGY_CACHE_TTL", "5"))
+
+CacheListener = Callable[[Set[str]], None]
+
+
+class CacheWatch:
+    """Keys watched for invalidation, from ``TopologyCache.watch``."""
+
+    def __init__(self, keys: Iterable[str]):
+        self.keys = frozenset(keys)
+        self.stale = False
+
+
+class _Load:
+    """A key's in-progress loads: the lock that coalesces them, and a count
+    of callers using it so it can be dropped afterwards."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.users = 0
+
+
+class TopologyCache:
+    """Thread-safe TTL cache with hierarchical and dependency invalidation.
+
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, ttl: float = TOPOLOGY_CACHE_TTL):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+        self._entries: Dict[str, tuple[float, Any]] = {}
+        self._dependents: Dict[str, Set[str]] = {}
+        self._loads: Dict[str, _Load] = {}
+        self._watches: Set[CacheWatch] = set()
+        self._listeners: List[CacheListener] = []
+
+    def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], T],
+        ttl: Optional[float] = None,
+        depends_on: Iterable[str] = (),
+    ) -> T:
+        """Return the cached value for ``key``, calling ``loader`` on a miss.
+
+        Concurrent misses on the same key share a single ``loader`` call.
+
+        Args:
+            key: Cache key.
+            loader: Zero-argument function producing the value.
+            ttl: Seconds the value stays valid. Defaults to the cache TTL; 0 or
+                less disables caching for this call.
+            depends_on: Keys whose invalidation must also drop this entry.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return loader()
+
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                self.hits += 1
+                count_cache(hit=True)
+                return value
+            load = self._loads.setdefault(key, _Load())
+            load.users += 1
+
+        try:
+            with load.lock:
+                with self._lock:
+                    value = self._lookup(key)
+                    if value is not _MISSING:
+                        self.hits += 1
+                        count_cache(hit=True)
+                        return value
+                    self.misses += 1
+                    count_cache(hit=False)
+                with self.watch(key, *depends_on) as watch:
+                    value = loader()
+                    self.put(key, value, ttl, depends_on, watch=watch)
+                return value
+        finally:
+            with self._lock:
+                load.users -= 1
+                if not load.users:
+                    del self._loads[key]
+
+    async def aget_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[T]],
+        ttl: Optional[float] = None,
+        depends_on: Iterable[str] = (),
+    ) -> T:
+        """Async variant of ``get_or_load`` for coroutine loaders.
+
+        Concurrent async misses on the same key are not coalesced; each awaits
+        its own ``loader`` and the last result is stored.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return await loader()
+
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                self.hits += 1
+                count_cache(hit=True)
+                return value
+            self.misses += 1
+            count_cache(hit=False)
+
+        with self.watch(key, *depends_on) as watch:
+            value = await loader()
+            self.put(key, value, ttl, depends_on, watch=watch)
+        return value
+
+    def peek(self, key: str) -> Any:
+        """Return the cached value for ``key`` or None, without loading."""
+        with self._lock:
+            value = self._lookup(key)
+            return None if value is _MISSING else value
+
+    def remaining_ttl(self, key: str) -> Optional[float]:
+        """Seconds until ``key`` expires, or None if it isn't cached."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            remaining = entry[0] - time.monotonic()
+            return remaining if remaining > 0 else None
+
+    def put(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[float] = None,
+        depends_on: Iterable[str] = (),
+        watch: Optional[CacheWatch] = None,
+        replace: bool = True,
+    ) -> bool:
+        """Store a value directly, replacing any existing entry.
+
+        Args:
+            watch: Skip the store if any key of this watch was invalidated
+                since it started, i.e. ``value`` may be built from stale data.
+            replace: If False, keep an unexpired entry that is already there.
+
+        Returns:
+            Whether the value was stored.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            if watch is not None and watch.stale:
+                return False
+            if not replace and self._lookup(key) is not _MISSING:
+                return False
+            self._entries[key] = (time.monotonic() + ttl, value)
+            for dependency in depends_on:
+                self._dependents.setdefault(dependency, set()).add(key)
+            return True
+
+    @contextmanager
+    def watch(self, *keys: str) -> Iterator[CacheWatch]:
+        """Track invalidations of ``keys`` while values are built from them.
+
+        A key counts as invalidated when ``invalidate`` drops it, one of its
+        parents, or (for keys like ``tc:veth0``) a parent it was dropped with.
+        Pass the watch to ``put`` so that stale values aren't stored.
+        """
+        watch = CacheWatch(keys)
+        with self._lock:
+            self._watches.add(watch)
+        try:
+            yield watch
+        finally:
+            with self._lock:
+                self._watches.discard(watch)
+
+    def invalidate(self, *keys: str) -> Set[str]:
+        """Drop the given keys and everything derived from them.
+
+        Returns:
+            The set of invalidated keys, including derived ones.
+        """
+        with self._lock:
+            pending = [(key, True) for key in keys]
+            affected: Set[str] = set()
+            # Keys dropped together with everything below them
+            subtrees: Set[str] = set()
+            while pending:
+                key, with_children = pending.pop()
+                if with_children:
+                    subtrees.add(key)
+                if key in affected:
+                    continue
+                affected.add(key)
+                pending.extend((k, True) for k in self._dependents.get(key, ()))
+                if with_children:
+                    prefix = f"{key}:"
+                    pending.extend(
+                        (k, True) for k in self._entries if k.startswith(prefix)
+                    )
+                # Parents aggregate this key, but their other children are unaffected
+                parts = key.split(":")
+                pending.extend(
+                    (":".join(parts[:i]), False) for i in range(1, len(parts))
+                )
+            for key in affected:
+                self._entries.pop(key, None)
+                self._dependents.pop(key, None)
+            for watch in self._watches:
+                if any(_covered(key, affected, subtrees) for key in watch.keys):
+                    watch.stale = True
+            listeners = list(self._listeners)
+
+        if affected:
+            for listener in listeners:
+                listener(affected)
+        return affected
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            removed = set(self._entries)
+        self.invalidate(*removed)
+
+    def subscribe(self, listener: CacheListener) -> Callable[[], None]:
+        """Register a listener called with the invalidated keys.
+
+        Returns:
+            A function that unregisters the listener.
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if listener in self._listeners:
+                    self._listeners.remove(listener)
+
+        return unsubscribe
+
+    def _lookup(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return _MISSING
+        return value
+
+
+def _covered(key: str, affected: Set[str], subtrees: Set[str]) -> bool:
+    if key in affected:
+        return True
+    parts = key.split(":")
+    return any(":".join(parts[:i]) in subtrees for i in range(1, len(parts)))
+
+
+_MISSING = object()
+
+topology_cache = TopologyCache()
@@ -0,0 +1,227 @@
+"""Incremental change feed over successive topology snapshots.
+
+Each snapshot (``collect_all_topology_info`` plus the shared qdisc snapshot)
+is flattened into facts keyed by ``(kind, subject)``, e.g.
+``("bridge", "br-sw1") -> "UP"`` or ``("stp", "br-sw2 veth-sw2-sw4") ->
+"blocking"``. Comparing two fact sets yields ``TopologyChange`` records for
+bridges, veths, active links, STP port states, shaping qdiscs and VM states.
+
+``change_log`` numbers every change with a sequence number. Callers keep the
+``cursor`` from their last read and ask only for what happened since, either
+by polling (``changes_since``) or by iterating ``stream_changes``.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from network.aio import acollect_all_topology_info, aget_tc_snapshot
+from network.infrastructure import collect_all_topology_info
+from network.models import (
+    AggregatedTopologyInfo,
+    QdiscInfo,
+    TopologyChange,
+    TopologyChanges,
+)
+from network.shaping import shaping_signature
+from network.tc import SHAPING_QDISCS, get_tc_snapshot
+
+# Changes kept for readers that fall behind
+TOPOLOGY_CHANGE_HISTORY = int(os.environ.get("TOPOLOGY_CHANGE_HISTORY", "1000"))
+# Seconds between snapshots taken by stream_changes
+TOPOLOGY_POLL_INTERVAL = float(os.environ.get("TOPOLOGY_POLL_INTERVAL", "5"))
+
+FactKey = Tuple[str, str]
+
+_LABELS = {
+    "bridge": "Bridge {subject}",
+    "veth": "Veth {subject}",
+    "link": "Active link {subject}",
+    "stp": "STP port {subject}",
+    "tc": "TC on {subject}",
+    "vm": "VM {subject}",
+}
+
+
+def _tc_fact(qdisc: QdiscInfo) -> str:
+    # Built from the parsed settings, not the qdisc line: the line carries the
+    # kernel-assigned handle, which changes whenever a limit is re-applied
+    kind, rate_bps, delay_ms, jitter_ms, loss_percent = shaping_signature(qdisc)
+    settings = (
+        ("rate_bps", rate_bps),
+        ("delay_ms", delay_ms),
+        ("jitter_ms", jitter_ms),
+        ("loss_percent", loss_percent),
+    )
+    return " ".join(
+        [kind, *(f"{name}={value}" for name, value in settings if value is not None)]
+    )
+
+
+def topology_facts(
+    info: AggregatedTopologyInfo, qdiscs: Dict[str, List[QdiscInfo]]
+) -> Dict[FactKey, str]:
+    """Flatten a snapshot into comparable facts."""
+    topology = info.topology
+    facts: Dict[FactKey, str] = {}
+
+    for name, bridge in topology.bridges.items():
+        if bridge.exists:
+            facts[("bridge", name)] = bridge.state
+    for conn in topology.veth_connections:
+        facts[("veth", conn.interface)] = f"{conn.source}-{conn.target}"
+    for link in topology.active_links:
+        facts[("link", f"{link.source}-{link.target}")] = link.interface
+    for bridge_name, stp in topology.stp_info.items():
+        for port in stp.ports:
+            facts[("stp", f"{bridge_name} {port.interface}")] = port.state.lower()
+    for interface, interface_qdiscs in qdiscs.items():
+        shaping = [_tc_fact(q) for q in interface_qdiscs if q.kind in SHAPING_QDISCS]
+        if shaping:
+            facts[("tc", interface)] = "; ".join(shaping)
+    for name, vm in topology.vms.items():
+        if vm.exists:
+            facts[("vm", name)] = vm.state
+    return facts
+
+
+def diff_facts(
+    old: Dict[FactKey, str], new: Dict[FactKey, str]
+) -> List[Tuple[str, str, Optional[str], Optional[str]]]:
+    """Compare two fact sets.
+
+    Returns:
+        (kind, subject, old value, new value) for every added, removed or
+        changed fact, in a stable order.
+    """
+    changes = []
+    for key in sorted(old.keys() | new.keys()):
+        before, after = old.get(key), new.get(key)
+        if before != after:
+            changes.append((key[0], key[1], before, after))
+    return changes
+
+
+def describe_change(
+    kind: str, subject: str, old: Optional[str], new: Optional[str]
+) -> str:
+    label = _LABELS.get(kind, kind + " {subject}").format(subject=subject)
+    if old is None:
+        return f"{label} added: {new}"
+    if new is None:
+        return f"{label} removed (was {old})"
+    return f"{label} changed: {old} -> {new}"
+
+
+class TopologyChangeLog:
+    """Sequence-numbered history of topology changes."""
+
+    def __init__(self, history: int = TOPOLOGY_CHANGE_HISTORY):
+        self._condition = threading.Condition()
+        self._changes: Deque[TopologyChange] = deque(maxlen=history)
+        self._facts: Optional[Dict[FactKey, str]] = None
+        self._seq = 0
+
+    @property
+    def cursor(self) -> int:
+        return self._seq
+
+    def record(self, facts: Dict[FactKey, str]) -> Optional[List[TopologyChange]]:
+        """Diff facts against the previous snapshot and append the changes.
+
+        Returns:
+            The new changes, or None if this call only stored the baseline.
+        """
+        now = time.time()
+        with self._condition:
+            previous, self._facts = self._facts, facts
+            if previous is None:
+                return None
+            changes = []
+            for kind, subject, old, new in diff_facts(previous, facts):
+                self._seq += 1
+                changes.append(
+                    TopologyChange(
+                        seq=self._seq,
+                        timestamp=now,
+                        kind=kind,
+                        subject=subject,
+                        old=old,
+                        new=new,
+                        description=describe_change(kind, subject, old, new),
+                    )
+                )
+            self._changes.extend(changes)
+            if changes:
+                self._condition.notify_all()
+            return changes
+
+    def poll(self) -> Optional[List[TopologyChange]]:
+        """Take a snapshot from the (cached) collectors and record its changes."""
+        return self.record(
+            topology_facts(collect_all_topology_info(), get_tc_snapshot())
+        )
+
+    def since(self, cursor: Optional[int]) -> TopologyChanges:
+        """Return the changes recorded after ``cursor``.
+
+        ``truncated`` is set when older changes have already been discarded.
+        """
+        with self._condition:
+            if cursor is None:
+                return TopologyChanges(cursor=self._seq)
+            changes = [c for c in self._changes if c.seq > cursor]
+            oldest = self._changes[0].seq if self._changes else self._seq + 1
+            return TopologyChanges(
+                cursor=self._seq,
+                changes=changes,
+                truncated=cursor + 1 < oldest and cursor < self._seq,
+            )
+
+    def wait(self, cursor: int, timeout: Optional[float] = None) -> bool:
+        """Block until a change newer than ``cursor`` is recorded."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._seq > cursor, timeout)
+
+
+change_log = TopologyChangeLog()
+
+
+def changes_since(cursor: Optional[int] = None) -> TopologyChanges:
+    """Take a fresh snapshot and return the changes after ``cursor``.
+
+    Without a cursor, only the current cursor is returned (and the baseline is
+    recorded on first use), so the next call reports changes from now on.
+    """
+    baseline = change_log.poll() is None
+    return change_log.since(cursor).model_copy(update={"baseline": baseline})
+
+
+async def achanges_since(cursor: Optional[int] = None) -> TopologyChanges:
+    """Async ``changes_since``."""
+    info, qdiscs = await asyncio.gather(
+        acollect_all_topology_info(), aget_tc_snapshot()
+    )
+    baseline = change_log.record(topology_facts(info, qdiscs)) is None
+    return change_log.since(cursor).model_copy(update={"baseline": baseline})
+
+
+async def stream_changes(
+    since: Optional[int] = None, interval: float = TOPOLOGY_POLL_INTERVAL
+) -> AsyncIterator[TopologyChange]:
+    """Yield topology changes as they are detected.
+
+    A snapshot is taken at least every ``interval`` seconds, and as soon as
+    another poller records a change, which is yielded too.
+    """
+    if since is None:
+        since = (await achanges_since()).cursor
+    while True:
+        result = await achanges_since(since)
+        for change in result.changes:
+            yield change
+        since = result.cursor
+        await asyncio.to_thread(change_log.wait, since, interval)
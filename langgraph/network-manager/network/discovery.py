@@ -0,0 +1,199 @@
+"""Discovery of bridges, veth pairs and libvirt domains.
+
+Instead of a fixed lab layout, the inventory is derived from the kernel
+interface table (``read_links``): every ``bridge`` link is a switch and every
+veth is recorded with its peer and the bridges both ends are enslaved to.
+Domains come from one libvirt ``listAllDomains`` call, or a single
+``virsh list --all --name`` without the bindings.
+
+``inventory_tracker`` keeps the current ``Inventory`` and applies full
+refreshes or single link/domain events incrementally. Whenever the set of
+bridges, veths or VMs changes, the ``inventory`` cache key is invalidated,
+which drops every snapshot derived from the previous inventory.
+
+Set ``TOPOLOGY_DISCOVERY=static`` to use the built-in lab layout below. In the
+default ``auto`` mode the static lists are only used for parts that cannot be
+discovered (no interface table, or virsh unavailable).
+"""
+
+import os
+import re
+import subprocess
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from network import libvirt_backend
+from network.cache import topology_cache
+from network.models import Inventory, LinkRecord, VethLink
+from network.netlink import read_links
+
+TOPOLOGY_DISCOVERY = os.environ.get("TOPOLOGY_DISCOVERY", "auto")
+
+# Static lab layout
+BRIDGES = ["br-sw1", "br-sw2", "br-sw3", "br-sw4", "br-wan", "br-lan"]
+VMS = ["host1", "host2", "host3", "host4", "router1", "router2", "ss"]
+VETH_PAIRS = [
+    "veth-sw1-sw2",
+    "veth-sw2-sw1",
+    "veth-sw1-sw3",
+    "veth-sw3-sw1",
+    "veth-sw2-sw4",
+    "veth-sw4-sw2",
+    "veth-sw3-sw4",
+    "veth-sw4-sw3",
+]
+
+
+def _static_veths() -> Dict[str, VethLink]:
+    veths = {}
+    for veth in VETH_PAIRS:
+        match = re.fullmatch(r"veth-(\w+)-(\w+)", veth)
+        source, target = match.groups()
+        veths[veth] = VethLink(
+            interface=veth,
+            peer=f"veth-{target}-{source}",
+            bridge=f"br-{source}",
+            peer_bridge=f"br-{target}",
+        )
+    return veths
+
+
+def _is_veth(record: LinkRecord) -> bool:
+    return record.kind == "veth"
+
+
+def discover_bridges(links: Dict[str, LinkRecord]) -> List[str]:
+    """Return the names of all bridge interfaces, sorted."""
+    return sorted(name for name, record in links.items() if record.kind == "bridge")
+
+
+def discover_veths(links: Dict[str, LinkRecord]) -> Dict[str, VethLink]:
+    """Return every veth with its peer and the bridges both ends belong to."""
+    veths = {}
+    for name in sorted(links):
+        record = links[name]
+        if not _is_veth(record):
+            continue
+        peer = links.get(record.peer) if record.peer else None
+        veths[name] = VethLink(
+            interface=name,
+            peer=record.peer,
+            bridge=record.master,
+            peer_bridge=peer.master if peer else None,
+        )
+    return veths
+
+
+def list_domains() -> Optional[List[str]]:
+    """List all libvirt domain names, or None if neither libvirt nor virsh work."""
+    names = libvirt_backend.list_domain_names()
+    if names is not None:
+        return names
+    try:
+        result = subprocess.run(
+            ["virsh", "list", "--all", "--name"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+    except Exception:
+        return None
+    if result.returncode != 0:
+        return None
+    return parse_domain_list(result.stdout)
+
+
+def parse_domain_list(output: str) -> List[str]:
+    """Parse ``virsh list --name`` output."""
+    return sorted({line.strip() for line in output.splitlines() if line.strip()})
+
+
+def build_inventory(
+    links: Dict[str, LinkRecord], domains: Optional[Iterable[str]]
+) -> Inventory:
+    """Build an Inventory from an interface table and a domain list.
+
+    Args:
+        links: Interface table from ``read_links()``.
+        domains: Domain names, or None if they could not be listed.
+    """
+    if TOPOLOGY_DISCOVERY == "static":
+        return Inventory(
+            bridges=list(BRIDGES),
+            veths=_static_veths(),
+            vms=list(VMS),
+            source="static",
+        )
+
+    if not links:
+        bridges, veths, source = list(BRIDGES), _static_veths(), "static"
+    else:
+        bridges, veths, source = (
+            discover_bridges(links),
+            discover_veths(links),
+            "discovered",
+        )
+    return Inventory(
+        bridges=bridges,
+        veths=veths,
+        vms=list(VMS) if domains is None else sorted(domains),
+        source=source,
+    )
+
+
+class InventoryTracker:
+    """Holds the current inventory and replaces it on refresh."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inventory: Optional[Inventory] = None
+        self._generation = 0
+
+    @property
+    def current(self) -> Optional[Inventory]:
+        return self._inventory
+
+    def refresh(
+        self,
+        links: Optional[Dict[str, LinkRecord]] = None,
+        domains: Optional[List[str]] = None,
+    ) -> Inventory:
+        """Rediscover everything; pass already read links/domains to reuse them."""
+        if links is None:
+            links = read_links()
+        if domains is None and TOPOLOGY_DISCOVERY != "static":
+            domains = list_domains()
+        return self.update(build_inventory(links, domains))
+
+    def update(self, inventory: Inventory) -> Inventory:
+        """Replace the inventory, invalidating derived data if it changed."""
+        with self._lock:
+            previous = self._inventory
+            changed = previous is not None and (
+                previous.bridges != inventory.bridges
+                or previous.veths != inventory.veths
+                or previous.vms != inventory.vms
+            )
+            if previous is not None and not changed:
+                inventory = previous
+            else:
+                if changed:
+                    self._generation += 1
+                inventory = inventory.model_copy(
+                    update={"generation": self._generation}
+                )
+                self._inventory = inventory
+
+        if changed:
+            topology_cache.invalidate("inventory")
+        topology_cache.put("inventory", inventory)
+        return inventory
+
+
+inventory_tracker = InventoryTracker()
+
+
+def get_inventory() -> Inventory:
+    """Return the cached inventory, rediscovering it once the TTL has expired."""
+    inventory = topology_cache.peek("inventory")
+    return inventory if inventory is not None else inventory_tracker.refresh()
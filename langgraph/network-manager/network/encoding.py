@@ -0,0 +1,196 @@
+"""Compact text encoding of NetworkSummary for LLM prompts.
+
+The JSON form of ``NetworkSummary`` repeats field names on every row, lists
+each port on its bridge and again on the link or VM that uses it, and carries
+the same boilerplate notes on every call. ``encode_topology`` writes one
+line-oriented table per section instead:
+
+- switches are referred to by their short id (``s3``) once bridges are listed,
+- ports are only listed where they are used (links, VMs); bridges only show
+  ports that appear nowhere else,
+- default values (state UP, VM running, STP forwarding) are omitted.
+
+With a ``max_tokens`` budget, the lowest-priority sections are dropped first
+(notes, addresses, example paths), then rows are trimmed from the remaining
+sections. Token counts are estimated at four characters per token.
+"""
+
+import math
+import os
+from typing import List, Optional, Set, Tuple
+
+from network.models import MemoryInfo, NetworkSummary
+from network.paths import switch_id
+
+TOPOLOGY_SUMMARY_MAX_TOKENS = int(os.environ.get("TOPOLOGY_SUMMARY_MAX_TOKENS", "1000"))
+
+# Sections at or above this priority are trimmed row by row instead of dropped
+_TRIM_PRIORITY = 60
+
+NOTES = (
+    "Only FORWARDING links carry traffic; BLOCKED links are dead ends. "
+    "TC on veth/vnet ports of the active path limits it."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting (about four characters per token)."""
+    return math.ceil(len(text) / 4)
+
+
+def _format_memory(memory: Optional[MemoryInfo]) -> Optional[str]:
+    if memory is None:
+        return None
+    value, unit = memory.value, memory.unit
+    if unit == "KiB":
+        for scale, name in ((1024**2, "GiB"), (1024, "MiB")):
+            if value >= scale and value % scale == 0:
+                return f"{value // scale}{name}"
+    return f"{value}{unit}"
+
+
+def _link_key(a: str, b: str) -> Tuple[str, str]:
+    return tuple(sorted((switch_id(a), switch_id(b))))
+
+
+class _Section:
+    def __init__(self, name: str, header: str, rows: List[str], priority: int):
+        self.name = name
+        self.header = header
+        self.rows = rows
+        self.priority = priority
+        self.omitted = 0
+
+    def render(self) -> str:
+        lines = [self.header] + self.rows
+        if self.omitted:
+            lines.append(f"... +{self.omitted} more")
+        return "\n".join(lines)
+
+
+def _sections(summary: NetworkSummary) -> List[_Section]:
+    has_stp = any(stp.ports for stp in summary.stp_info.values())
+    active = {
+        _link_key(link.source, link.target): link for link in summary.active_links
+    }
+
+    used_ports: Set[str] = set()
+    link_rows = []
+    for conn in summary.bridge_connections:
+        link = active.get(_link_key(conn.from_node, conn.to_node))
+        row = f"{switch_id(conn.from_node)}-{switch_id(conn.to_node)} {conn.interface}"
+        used_ports.add(conn.interface)
+        if link is not None:
+            row += f"/{link.reverse_interface}"
+            used_ports.add(link.reverse_interface)
+        elif has_stp:
+            row += " BLOCKED"
+        link_rows.append(row)
+
+    vm_rows = []
+    for vm in summary.vms:
+        ports = []
+        for conn in vm.bridge_connections:
+            ports.append(f"{switch_id(conn.bridge)}/{conn.interface}")
+            used_ports.add(conn.interface)
+        fields = [vm.name, ",".join(ports) or "-"]
+        if vm.state != "running":
+            fields.append(vm.state)
+        if vm.vcpu:
+            fields.append(f"{vm.vcpu}cpu")
+        memory = _format_memory(vm.memory)
+        if memory:
+            fields.append(memory)
+        vm_rows.append(" ".join(fields))
+
+    bridge_rows = []
+    for bridge in summary.bridges:
+        fields = [bridge.name]
+        if switch_id(bridge.name) != bridge.name:
+            fields[0] += f"={switch_id(bridge.name)}"
+        if bridge.state != "UP":
+            fields.append(bridge.state)
+        other = [port for port in bridge.interfaces if port not in used_ports]
+        if other:
+            fields.append("+" + ",".join(other))
+        bridge_rows.append(" ".join(fields))
+
+    stp_rows = []
+    for bridge_name, stp in summary.stp_info.items():
+        ports = [
+            f"{port.interface}={port.state.lower()}"
+            for port in stp.ports
+            if not port.is_forwarding
+        ]
+        if ports:
+            stp_rows.append(f"{bridge_name} {' '.join(ports)}")
+
+    path_rows = [
+        f"{path.host} {'>'.join(path.path_switches)}" for path in summary.example_paths
+    ]
+    root = summary.example_paths[0].path_switches[0] if path_rows else "root"
+
+    ip_rows = [
+        " ".join(
+            [iface.interface]
+            + iface.ips
+            + ([iface.state] if iface.state != "UP" else [])
+        )
+        for iface in summary.key_interfaces
+        if iface.ips or iface.state != "UP"
+    ]
+
+    sections = [
+        _Section(
+            "bridges", "bridges: name=switch [state] [+other ports]", bridge_rows, 90
+        ),
+        _Section("links", "links: a-b iface[/peer] [BLOCKED]", link_rows, 80),
+        _Section("stp", "stp non-forwarding: bridge port=state", stp_rows, 70),
+        _Section("vms", "vms: name switch/port [state] [cpu] [mem]", vm_rows, 60),
+        _Section("paths", f"paths from {root}: host switches", path_rows, 40),
+        _Section("addresses", "addresses: iface ips [state]", ip_rows, 20),
+        _Section("notes", "notes:", [NOTES], 10),
+    ]
+    return [section for section in sections if section.rows]
+
+
+def _render(sections: List[_Section], dropped: List[str]) -> str:
+    lines = ["# topology (omitted defaults: state UP, vm running, stp forwarding)"]
+    lines.extend(section.render() for section in sections)
+    if dropped:
+        lines.append(f"# omitted for size: {', '.join(dropped)}")
+    return "\n".join(lines)
+
+
+def encode_topology(summary: NetworkSummary, max_tokens: Optional[int] = None) -> str:
+    """Encode a NetworkSummary as compact tables within a token budget.
+
+    Args:
+        summary: Summary from ``build_topology_summary``.
+        max_tokens: Approximate token budget. None or 0 disables trimming.
+
+    Returns:
+        The encoded topology. If sections or rows had to be left out, a final
+        line names them.
+    """
+    sections = _sections(summary)
+    dropped: List[str] = []
+    text = _render(sections, dropped)
+    if not max_tokens:
+        return text
+
+    for section in sorted(sections, key=lambda s: s.priority):
+        if estimate_tokens(text) <= max_tokens:
+            break
+        if section.priority < _TRIM_PRIORITY:
+            sections.remove(section)
+            dropped.append(section.name)
+        else:
+            while section.rows and estimate_tokens(text) > max_tokens:
+                excess = estimate_tokens(text) - max_tokens
+                while section.rows and excess > 0:
+                    excess -= estimate_tokens(section.rows.pop() + "\n")
+                    section.omitted += 1
+                text = _render(sections, dropped)
+        text = _render(sections, dropped)
+    return text
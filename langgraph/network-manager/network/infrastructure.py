@@ -1,7 +1,18 @@
+import os
 import re
 import subprocess
-from collections import deque
-from typing import Dict, List
+from concurrent.futures import Future
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+)
 
 from network.models import (
     ActiveLink,
@@ -11,8 +22,12 @@ from network.models import (
     BridgeState,
     BridgeSummary,
     ExamplePath,
+    ForwardingPath,
     InterfaceSettings,
+    InterfaceStats,
+    Inventory,
     KeyInterfaceInfo,
+    LinkRecord,
     MemoryInfo,
     NetworkSettings,
     NetworkSummary,
@@ -24,142 +39,206 @@ from network.models import (
     STPPortSummary,
     STPSummary,
     VethConnection,
+    VethLink,
     VMBridgeConnection,
     VMConfig,
     VMInfoSummary,
     VMInterface,
 )
+from network import libvirt_backend
+from network.cache import CacheWatch, topology_cache
+from network.discovery import get_inventory, inventory_tracker
+from network.metrics import ContextThreadPoolExecutor
+from network.netlink import (
+    bridge_info_from_links,
+    interface_settings_from_link,
+    interface_stats_from_link,
+    read_links,
+    read_port_states,
+)
+from network.paths import PathIndex, switch_id
 
-# Constants
-BRIDGES = ["br-sw1", "br-sw2", "br-sw3", "br-sw4", "br-wan", "br-lan"]
-VMS = ["host1", "host2", "host3", "host4", "router1", "router2", "ss"]
-VETH_PAIRS = [
-    "veth-sw1-sw2",
-    "veth-sw2-sw1",
-    "veth-sw1-sw3",
-    "veth-sw3-sw1",
-    "veth-sw2-sw4",
-    "veth-sw4-sw2",
-    "veth-sw3-sw4",
-    "veth-sw4-sw3",
-]
-
-
-def get_bridge_info(bridge_name: str) -> BridgeInfo:
-    """Collect bridge information including state and connected interfaces."""
-    try:
-        result = subprocess.run(
-            ["ip", "link", "show", bridge_name],
-            capture_output=True,
-            text=True,
-            timeout=5,
+# Upper bound on concurrent virsh/brctl processes during a snapshot
+SNAPSHOT_MAX_WORKERS = int(os.environ.get("SNAPSHOT_MAX_WORKERS", "16"))
+
+# Number of VMs summarize_topology shows root paths for
+EXAMPLE_PATH_COUNT = 4
+
+T = TypeVar("T")
+
+
+def _submit_all(
+    pool: ContextThreadPoolExecutor, func: Callable[[str], T], items: Iterable[str]
+) -> Dict[str, "Future[T]"]:
+    return {item: pool.submit(func, item) for item in items}
+
+
+def _gather(futures: Dict[str, "Future[T]"]) -> Dict[str, T]:
+    return {key: future.result() for key, future in futures.items()}
+
+
+def get_bridge_info(
+    bridge_name: str, links: Optional[Dict[str, LinkRecord]] = None
+) -> BridgeInfo:
+    """Collect bridge information including state and connected interfaces.
+
+    Args:
+        bridge_name: Bridge to describe (e.g., 'br-sw1').
+        links: Interface table from ``read_links()``. Read on demand if omitted.
+    """
+    if links is None:
+        links = read_links()
+    return bridge_info_from_links(bridge_name, links)
+
+
+def parse_vm_config(
+    vm_name: str, dominfo: Optional[str], domiflist: Optional[str]
+) -> VMConfig:
+    """Build a VMConfig from ``virsh dominfo`` and ``virsh domiflist`` output.
+
+    Args:
+        vm_name: Domain name.
+        dominfo: ``virsh dominfo`` stdout, or None if the domain was not found.
+        domiflist: ``virsh domiflist`` stdout, or None if unavailable.
+    """
+    if dominfo is None:
+        return VMConfig(
+            name=vm_name,
+            exists=False,
+            state="unknown",
+            interfaces=[],
+            disks=[],
         )
 
-        exists = result.returncode == 0
-        state = "UP" if "UP" in result.stdout else "DOWN"
-        interfaces: List[str] = []
+    state = "unknown"
+    vcpu = None
+    memory = None
+    interfaces: List[VMInterface] = []
 
-        if exists:
-            result2 = subprocess.run(
-                ["ip", "link", "show", "master", bridge_name],
-                capture_output=True,
-                text=True,
-                timeout=5,
-            )
-            if result2.returncode == 0:
-                interfaces = re.findall(r"\d+:\s+(\w+):", result2.stdout)
-
-        return BridgeInfo(
-            name=bridge_name,
-            exists=exists,
-            state=state,
-            interfaces=interfaces,
+    state_match = re.search(r"State:\s+(.+)", dominfo)
+    if state_match:
+        state = state_match.group(1).strip()
+
+    vcpu_match = re.search(r"CPU\(s\):\s+(\d+)", dominfo)
+    if vcpu_match:
+        vcpu = int(vcpu_match.group(1))
+
+    mem_match = re.search(r"Max memory:\s+(\d+)\s+(\w+)", dominfo)
+    if mem_match:
+        memory = MemoryInfo(
+            value=int(mem_match.group(1)),
+            unit=mem_match.group(2),
         )
-    except Exception:
-        return BridgeInfo(name=bridge_name, exists=False, state="DOWN", interfaces=[])
+
+    if domiflist is not None:
+        lines = domiflist.strip().split("\n")[2:]
+        for line in lines:
+            parts = line.split()
+            if len(parts) >= 3:
+                interfaces.append(
+                    VMInterface(
+                        interface=parts[0],
+                        type=parts[1],
+                        source=parts[2],
+                        model=parts[3] if len(parts) > 3 else None,
+                        mac=parts[4] if len(parts) > 4 else None,
+                    )
+                )
+
+    return VMConfig(
+        name=vm_name,
+        exists=True,
+        state=state,
+        vcpu=vcpu,
+        memory=memory,
+        interfaces=interfaces,
+        disks=[],
+        os_type=None,
+    )
 
 
 def get_vm_config(vm_name: str) -> VMConfig:
-    """Collect VM configuration information using virsh commands."""
-    try:
-        exists = False
-        state = "unknown"
-        vcpu = None
-        memory = None
-        interfaces: List[VMInterface] = []
-        disks: List[dict] = []
-        os_type = None
+    """Collect VM configuration information from libvirt, or virsh as fallback."""
+    config = libvirt_backend.get_vm_config(vm_name)
+    if config is not None:
+        return config
+    return _get_vm_config_virsh(vm_name)
+
 
+def get_vm_configs(vm_names: Iterable[str]) -> Dict[str, VMConfig]:
+    """Collect configurations for several VMs.
+
+    With the libvirt bindings this is one bulk stats call over the shared
+    connection; otherwise each VM is queried with virsh in parallel.
+    """
+    vm_names = list(vm_names)
+    configs = libvirt_backend.get_vm_configs(vm_names)
+    if configs is not None:
+        return configs
+    with ContextThreadPoolExecutor(max_workers=SNAPSHOT_MAX_WORKERS) as pool:
+        return _gather(_submit_all(pool, _get_vm_config_virsh, vm_names))
+
+
+def _get_vm_config_virsh(vm_name: str) -> VMConfig:
+    try:
         result = subprocess.run(
             ["virsh", "dominfo", vm_name],
             capture_output=True,
             text=True,
             timeout=5,
         )
+        if result.returncode != 0:
+            return parse_vm_config(vm_name, None, None)
 
-        if result.returncode == 0:
-            exists = True
-
-            state_match = re.search(r"State:\s+(\w+)", result.stdout)
-            if state_match:
-                state = state_match.group(1)
+        iflist_result = subprocess.run(
+            ["virsh", "domiflist", vm_name],
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+        return parse_vm_config(
+            vm_name,
+            result.stdout,
+            iflist_result.stdout if iflist_result.returncode == 0 else None,
+        )
+    except Exception:
+        return parse_vm_config(vm_name, None, None)
 
-            vcpu_match = re.search(r"CPU\(s\):\s+(\d+)", result.stdout)
-            if vcpu_match:
-                vcpu = int(vcpu_match.group(1))
 
-            mem_match = re.search(r"Max memory:\s+(\d+)\s+(\w+)", result.stdout)
-            if mem_match:
-                memory = MemoryInfo(
-                    value=int(mem_match.group(1)),
-                    unit=mem_match.group(2),
-                )
+def parse_stp_info(bridge_name: str, showstp: str) -> STPInfo:
+    """Build STPInfo from ``brctl showstp`` output."""
+    ports: List[STPPort] = []
+    lines = showstp.split("\n")
+    current_port = None
+    port_section_started = False
+
+    for i, line in enumerate(lines):
+        port_match = re.match(r"^(\S+)\s+\(\d+\)", line)
+        if port_match:
+            current_port = port_match.group(1)
+            port_section_started = True
+            ports.append(STPPort(interface=current_port, state="unknown"))
+            continue
+
+        if port_section_started and current_port:
+            if "port id" in line.lower() and "state" in line.lower():
+                state_match = re.search(r"state\s+(\w+)", line)
+                if state_match:
+                    for port in ports:
+                        if port.interface == current_port:
+                            port.state = state_match.group(1)
+                            port_section_started = False
+                            break
+                continue
 
-            iflist_result = subprocess.run(
-                ["virsh", "domiflist", vm_name],
-                capture_output=True,
-                text=True,
-                timeout=5,
-            )
-            if iflist_result.returncode == 0:
-                lines = iflist_result.stdout.strip().split("\n")[2:]
-                for line in lines:
-                    parts = line.split()
-                    if len(parts) >= 3:
-                        interfaces.append(
-                            VMInterface(
-                                interface=parts[0],
-                                type=parts[1],
-                                source=parts[2],
-                                model=parts[3] if len(parts) > 3 else None,
-                                mac=parts[4] if len(parts) > 4 else None,
-                            )
-                        )
+            if line.strip() == "" and i > 0 and lines[i - 1].strip() != "":
+                port_section_started = False
 
-        return VMConfig(
-            name=vm_name,
-            exists=exists,
-            state=state,
-            vcpu=vcpu,
-            memory=memory,
-            interfaces=interfaces,
-            disks=disks,
-            os_type=os_type,
-        )
-    except Exception:
-        return VMConfig(
-            name=vm_name,
-            exists=False,
-            state="unknown",
-            interfaces=[],
-            disks=[],
-        )
+    return STPInfo(bridge=bridge_name, ports=ports)
 
 
 def get_stp_info(bridge_name: str) -> STPInfo:
     """Collect Spanning Tree Protocol (STP) information for a bridge."""
-    ports: List[STPPort] = []
-
     try:
         result = subprocess.run(
             ["brctl", "showstp", bridge_name],
@@ -167,53 +246,67 @@ def get_stp_info(bridge_name: str) -> STPInfo:
             text=True,
             timeout=5,
         )
-
         if result.returncode == 0:
-            lines = result.stdout.split("\n")
-            current_port = None
-            port_section_started = False
-
-            for i, line in enumerate(lines):
-                port_match = re.match(r"^(\w+-\w+-\w+)\s+\(", line)
-                if port_match:
-                    current_port = port_match.group(1)
-                    port_section_started = True
-                    ports.append(STPPort(interface=current_port, state="unknown"))
-                    continue
-
-                if port_section_started and current_port:
-                    if "port id" in line.lower() and "state" in line.lower():
-                        state_match = re.search(r"state\s+(\w+)", line)
-                        if state_match:
-                            for port in ports:
-                                if port.interface == current_port:
-                                    port.state = state_match.group(1)
-                                    port_section_started = False
-                                    break
-                        continue
-
-                    if line.strip() == "" and i > 0 and lines[i - 1].strip() != "":
-                        port_section_started = False
+            return parse_stp_info(bridge_name, result.stdout)
     except Exception:
         pass
 
-    return STPInfo(bridge=bridge_name, ports=ports)
+    return STPInfo(bridge=bridge_name, ports=[])
+
+
+def stp_info_from_port_states(
+    bridges: Iterable[str], port_states: Dict[str, Dict[str, str]]
+) -> Dict[str, STPInfo]:
+    """Build per-bridge STPInfo from ``read_port_states()`` output."""
+    return {
+        bridge: STPInfo(
+            bridge=bridge,
+            ports=[
+                STPPort(interface=port, state=state)
+                for port, state in port_states.get(bridge, {}).items()
+            ],
+        )
+        for bridge in bridges
+    }
 
 
 def get_all_stp_info() -> STPInfoCollection:
-    """Collect STP information for all bridges in the network."""
-    stp_info: Dict[str, STPInfo] = {}
-    for bridge in BRIDGES:
-        stp_info[bridge] = get_stp_info(bridge)
+    """Collect STP information for all bridges in the network.
+
+    Port states are read from sysfs; ``brctl showstp`` is only run per bridge
+    when sysfs is unavailable. Results are cached in ``topology_cache`` under
+    ``stp``, which ``network.watcher`` keeps current while it runs.
+    """
+    return topology_cache.get_or_load("stp", _load_stp_info, depends_on=("inventory",))
+
+
+def _load_stp_info() -> STPInfoCollection:
+    bridges = get_inventory().bridges
+    port_states = read_port_states()
+    if port_states is not None:
+        return STPInfoCollection(
+            bridges=stp_info_from_port_states(bridges, port_states)
+        )
+    with ContextThreadPoolExecutor(max_workers=SNAPSHOT_MAX_WORKERS) as pool:
+        stp_info = _gather(_submit_all(pool, get_stp_info, bridges))
     return STPInfoCollection(bridges=stp_info)
 
 
-def collect_active_links() -> List[ActiveLink]:
+def collect_active_links(
+    stp_info: Optional[Dict[str, STPInfo]] = None,
+    veths: Optional[Dict[str, VethLink]] = None,
+) -> List[ActiveLink]:
     """Get all active network links based on STP forwarding states.
 
     Only links where both directions are in FORWARDING state are considered active.
     BLOCKING links are excluded as they don't carry traffic.
 
+    Args:
+        stp_info: Already collected STP information per bridge. When omitted, the
+            cached STP state is used and the result is cached as ``active_links``.
+        veths: Discovered veths with their peers. Ports missing from it fall back
+            to the ``veth-<from>-<to>`` naming convention.
+
     Returns:
         List of dictionaries, each representing an active bidirectional link:
         - from: Source switch node (e.g., 'sw1', 'sw2')
@@ -223,7 +316,16 @@ def collect_active_links() -> List[ActiveLink]:
         - state: Always 'forwarding' for active links
         - bridge: Bridge name where the link is connected
     """
-    stp_info = get_all_stp_info().bridges
+    if stp_info is None:
+        return topology_cache.get_or_load(
+            "active_links",
+            lambda: collect_active_links(
+                get_all_stp_info().bridges, get_inventory().veths
+            ),
+            depends_on=("stp", "inventory"),
+        )
+    veths = veths or {}
+
     port_states = {}
     for bridge_name, bridge_stp in stp_info.items():
         for port in bridge_stp.ports:
@@ -243,12 +345,18 @@ def collect_active_links() -> List[ActiveLink]:
             if not interface or state != "forwarding":
                 continue
 
-            match = re.match(r"veth-(\w+)-(\w+)", interface)
-            if not match:
-                continue
-
-            from_node = match.group(1)
-            to_node = match.group(2)
+            veth = veths.get(interface)
+            if veth is not None and veth.peer and veth.peer_bridge:
+                from_node = _node_name(bridge_name)
+                to_node = _node_name(veth.peer_bridge)
+                reverse_interface = veth.peer
+            else:
+                match = re.match(r"veth-(\w+)-(\w+)", interface)
+                if not match:
+                    continue
+                from_node = match.group(1)
+                to_node = match.group(2)
+                reverse_interface = f"veth-{to_node}-{from_node}"
 
             link_key = tuple(sorted([from_node, to_node]))
 
@@ -256,7 +364,6 @@ def collect_active_links() -> List[ActiveLink]:
                 continue
 
             forward_interface = interface
-            reverse_interface = f"veth-{to_node}-{from_node}"
 
             forward_state = port_states.get(forward_interface, "").lower()
             reverse_state = port_states.get(reverse_interface, "").lower()
@@ -277,20 +384,71 @@ def collect_active_links() -> List[ActiveLink]:
     return active_links
 
 
-def get_network_topology() -> NetworkTopology:
-    """Collect complete network topology including bridges, VMs, and connections."""
-    bridges: Dict[str, BridgeInfo] = {}
-    vms: Dict[str, VMConfig] = {}
-    vm_to_bridge: Dict[str, List[VMBridgeConnection]] = {}
-    veth_connections: List[VethConnection] = []
+def _node_name(bridge_name: str) -> str:
+    """Switch node name used in active links ('br-sw1' -> 'sw1')."""
+    return bridge_name[3:] if bridge_name.startswith("br-") else bridge_name
+
+
+def interface_exists(
+    interface: str, links: Optional[Dict[str, LinkRecord]] = None
+) -> bool:
+    """Check whether a network interface exists on the host."""
+    if links is None:
+        links = read_links()
+    return interface in links
+
+
+def get_interface_settings(
+    interface: str, links: Optional[Dict[str, LinkRecord]] = None
+) -> Optional[InterfaceSettings]:
+    """Collect IP addresses, MAC address and link state for an interface."""
+    if links is None:
+        links = read_links()
+    record = links.get(interface)
+    return interface_settings_from_link(record) if record else None
+
+
+def get_interface_stats(
+    interface: str, links: Optional[Dict[str, LinkRecord]] = None
+) -> InterfaceStats:
+    """Collect cumulative traffic counters for an interface."""
+    if links is None:
+        links = read_links()
+    return interface_stats_from_link(interface, links.get(interface))
+
+
+def parse_routing_info(routes_output: str) -> RoutingInfo:
+    """Build RoutingInfo from ``ip route show`` output (first 10 routes)."""
+    routes = routes_output.strip().split("\n")
+    return RoutingInfo(route_count=len(routes), routes=routes[:10])
+
+
+def get_routing_info() -> RoutingInfo:
+    """Collect the host routing table (first 10 routes)."""
+    try:
+        result = subprocess.run(
+            ["ip", "route", "show"],
+            capture_output=True,
+            text=True,
+            timeout=3,
+        )
+        if result.returncode == 0:
+            return parse_routing_info(result.stdout)
+    except Exception:
+        pass
+    return RoutingInfo()
 
-    for bridge in BRIDGES:
-        bridges[bridge] = get_bridge_info(bridge)
 
-    for vm in VMS:
-        vm_config = get_vm_config(vm)
-        vms[vm] = vm_config
+def _build_network_topology(
+    bridges: Dict[str, BridgeInfo],
+    vms: Dict[str, VMConfig],
+    veths: Dict[str, VethLink],
+    stp_info: Dict[str, STPInfo],
+) -> NetworkTopology:
+    vm_to_bridge: Dict[str, List[VMBridgeConnection]] = {}
+    veth_connections: List[VethConnection] = []
 
+    for vm, vm_config in vms.items():
         for iface in vm_config.interfaces:
             if iface.type == "bridge":
                 bridge_name = iface.source
@@ -303,27 +461,16 @@ def get_network_topology() -> NetworkTopology:
                         )
                     )
 
-    for veth in VETH_PAIRS:
-        match = re.match(r"veth-sw(\d+)-sw(\d+)", veth)
-        if match:
-            from_node = "s" + match.group(1)
-            to_node = "s" + match.group(2)
-
-            result = subprocess.run(
-                ["ip", "link", "show", veth],
-                capture_output=True,
-                text=True,
-                timeout=2,
-            )
-            if result.returncode == 0:
-                veth_connections.append(
-                    VethConnection(
-                        source=from_node, target=to_node, interface=veth, type="veth"
-                    )
+    for veth in veths.values():
+        if veth.bridge and veth.peer_bridge:
+            veth_connections.append(
+                VethConnection(
+                    source=switch_id(veth.bridge),
+                    target=switch_id(veth.peer_bridge),
+                    interface=veth.interface,
+                    type="veth",
                 )
-
-    stp_info = get_all_stp_info().bridges
-    active_links = collect_active_links()
+            )
 
     return NetworkTopology(
         bridges=bridges,
@@ -332,73 +479,191 @@ def get_network_topology() -> NetworkTopology:
         bridge_connections=[],
         veth_connections=veth_connections,
         stp_info=stp_info,
-        active_links=active_links,
+        active_links=collect_active_links(stp_info, veths),
     )
 
 
-def get_network_settings() -> NetworkSettings:
-    """Collect network configuration information including IPs, MACs, and routing."""
-    bridges: Dict[str, BridgeState] = {}
-    interfaces: Dict[str, InterfaceSettings] = {}
-
-    for bridge in BRIDGES:
-        bridge_info = get_bridge_info(bridge)
-        bridges[bridge] = BridgeState(
-            state=bridge_info.state,
-            interfaces=bridge_info.interfaces,
-        )
+def _build_network_settings(
+    bridges: Dict[str, BridgeInfo],
+    interfaces: Dict[str, Optional[InterfaceSettings]],
+    routing: RoutingInfo,
+) -> NetworkSettings:
+    return NetworkSettings(
+        bridges={
+            name: BridgeState(state=info.state, interfaces=info.interfaces)
+            for name, info in bridges.items()
+        },
+        interfaces={
+            name: settings
+            for name, settings in interfaces.items()
+            if settings is not None
+        },
+        routing=routing,
+        iptables={},
+    )
+
 
-    all_interfaces = set()
+def _bridge_members(bridges: Dict[str, BridgeInfo]) -> List[str]:
+    members = set()
     for bridge_info in bridges.values():
-        all_interfaces.update(bridge_info.interfaces)
-
-    for iface in all_interfaces:
-        try:
-            result = subprocess.run(
-                ["ip", "addr", "show", iface],
-                capture_output=True,
-                text=True,
-                timeout=3,
-            )
-            if result.returncode == 0:
-                ip_matches = re.findall(r"inet\s+([\d.]+/\d+)", result.stdout)
-                mac_match = re.search(r"link/ether\s+([\da-f:]+)", result.stdout)
-
-                interfaces[iface] = InterfaceSettings(
-                    ips=ip_matches,
-                    mac=mac_match.group(1) if mac_match else None,
-                    state="UP" if "UP" in result.stdout else "DOWN",
-                )
-        except Exception:
-            pass
+        members.update(bridge_info.interfaces)
+    return sorted(members)
+
+
+class _Fact(NamedTuple):
+    load: Callable[[], Any]
+    # Facts that must be loaded first
+    requires: Tuple[str, ...] = ()
+    # Cache keys whose invalidation drops this fact
+    depends_on: Tuple[str, ...] = ()
+
+
+def _load_links() -> Dict[str, LinkRecord]:
+    """Read the interface table once and refresh the inventory from it."""
+    links = read_links()
+    inventory_tracker.refresh(links)
+    return links
+
+
+# Raw facts every derived model is built from, by cache key. VM configs and STP
+# are read for the inventory that the ``links`` fact refreshes.
+_FACTS: Dict[str, _Fact] = {
+    "links": _Fact(_load_links),
+    "vm_configs": _Fact(
+        lambda: get_vm_configs(get_inventory().vms),
+        requires=("links",),
+        depends_on=("inventory",),
+    ),
+    "stp": _Fact(_load_stp_info, requires=("links",), depends_on=("inventory",)),
+    "routing": _Fact(get_routing_info),
+}
+
+# What the derived models are built from
+TOPOLOGY_DEPENDS_ON = ("stp", "inventory", "links", "vm_configs")
+NETWORK_SETTINGS_DEPENDS_ON = ("inventory", "links", "routing")
+SNAPSHOT_DEPENDS_ON = TOPOLOGY_DEPENDS_ON + ("routing",)
+# Everything a snapshot is built from or stores; watched while it is built
+SNAPSHOT_WATCH_KEYS = SNAPSHOT_DEPENDS_ON + (
+    "active_links",
+    "topology",
+    "network_settings",
+)
 
-    routing = RoutingInfo()
-    try:
-        result = subprocess.run(
-            ["ip", "route", "show"],
-            capture_output=True,
-            text=True,
-            timeout=3,
-        )
-        if result.returncode == 0:
-            routes = result.stdout.strip().split("\n")
-            routing = RoutingInfo(route_count=len(routes), routes=routes[:10])
-    except Exception:
-        pass
 
-    return NetworkSettings(
-        bridges=bridges,
-        interfaces=interfaces,
-        routing=routing,
-        iptables={},
+def collect_facts(*names: str) -> Dict[str, Any]:
+    """Return raw facts by name, loading the missing ones concurrently.
+
+    Each fact comes from ``topology_cache`` or is fetched exactly once, after
+    the facts it requires; concurrent callers share a single fetch. Derived
+    models (topology, network settings, snapshot) are all built from these, so
+    building one after another doesn't query anything twice.
+    """
+    futures: Dict[str, Future] = {}
+    with ContextThreadPoolExecutor(max_workers=len(_FACTS)) as pool:
+
+        def submit(name: str) -> Future:
+            if name not in futures:
+                required = [submit(r) for r in _FACTS[name].requires]
+                futures[name] = pool.submit(_load_fact, name, required)
+            return futures[name]
+
+        for name in names:
+            submit(name)
+        return {name: futures[name].result() for name in names}
+
+
+def _load_fact(name: str, required: List[Future]) -> Any:
+    for future in required:
+        future.result()
+    fact = _FACTS[name]
+    return topology_cache.get_or_load(name, fact.load, depends_on=fact.depends_on)
+
+
+def get_network_topology() -> NetworkTopology:
+    """Collect complete network topology including bridges, VMs, and connections.
+
+    Built from the ``links``, ``vm_configs`` and ``stp`` facts (see
+    ``collect_facts``) and cached in ``topology_cache`` under ``topology``.
+    """
+    return topology_cache.get_or_load(
+        "topology", _collect_network_topology, depends_on=TOPOLOGY_DEPENDS_ON
     )
 
 
+def _collect_network_topology() -> NetworkTopology:
+    facts = collect_facts("links", "vm_configs", "stp")
+    return build_topology_from_links(
+        facts["links"], facts["vm_configs"], facts["stp"].bridges, get_inventory()
+    )
+
+
+def build_topology_from_links(
+    links: Dict[str, LinkRecord],
+    vms: Dict[str, VMConfig],
+    stp_info: Dict[str, STPInfo],
+    inventory: Inventory,
+) -> NetworkTopology:
+    return _build_network_topology(
+        bridges={b: get_bridge_info(b, links) for b in inventory.bridges},
+        vms=vms,
+        veths=_present_veths(inventory, links),
+        stp_info=stp_info,
+    )
+
+
+def _present_veths(
+    inventory: Inventory, links: Dict[str, LinkRecord]
+) -> Dict[str, VethLink]:
+    return {name: veth for name, veth in inventory.veths.items() if name in links}
+
+
+def get_network_settings() -> NetworkSettings:
+    """Collect network configuration information including IPs, MACs, and routing.
+
+    Built from the ``links`` and ``routing`` facts and cached in
+    ``topology_cache`` under ``network_settings``.
+    """
+    return topology_cache.get_or_load(
+        "network_settings",
+        _collect_network_settings,
+        depends_on=NETWORK_SETTINGS_DEPENDS_ON,
+    )
+
+
+def _collect_network_settings() -> NetworkSettings:
+    facts = collect_facts("links", "routing")
+    links = facts["links"]
+    bridges = {b: get_bridge_info(b, links) for b in get_inventory().bridges}
+    interfaces = {
+        iface: get_interface_settings(iface, links)
+        for iface in _bridge_members(bridges)
+    }
+    return _build_network_settings(bridges, interfaces, facts["routing"])
+
+
+def get_path_index() -> PathIndex:
+    """Return the forwarding path index for the current topology.
+
+    The index is built from the cached topology and cached under ``path_index``,
+    so it is rebuilt only when the topology or STP state changes.
+    """
+    return topology_cache.get_or_load(
+        "path_index",
+        lambda: build_path_index(get_network_topology()),
+        depends_on=("stp", "topology"),
+    )
+
+
+def build_path_index(topology: NetworkTopology) -> PathIndex:
+    """Index the forwarding paths of a topology's active links."""
+    return PathIndex(topology.active_links, topology.vm_to_bridge)
+
+
 def calculate_path_to_host(host_vm: str) -> List[str]:
     """Calculate the shortest active path from root switch (s1) to a host VM.
 
-    Uses BFS (Breadth-First Search) to find the path through active STP links.
-    Only considers links in FORWARDING state.
+    Only considers links in FORWARDING state. Paths come from the precomputed
+    path index, so repeated calls are lookups.
 
     Args:
         host_vm: The host VM name (e.g., 'host1', 'host2', 'host3', 'host4')
@@ -408,67 +673,136 @@ def calculate_path_to_host(host_vm: str) -> List[str]:
         Example: ['s1', 's3'] means path goes s1 -> s3 -> host
         Returns empty list if host is not found or path cannot be determined.
     """
-    topology = get_network_topology()
-    vm_to_bridge = topology.vm_to_bridge
+    return get_path_index().path_from_root(host_vm)
 
-    host_connections = vm_to_bridge.get(host_vm)
-    if not host_connections:
-        return []
 
-    host_bridge = host_connections[0].bridge
-    if not host_bridge:
-        return []
+def calculate_path_between(source: str, target: str) -> Optional[ForwardingPath]:
+    """Calculate the active forwarding path between two VMs or switches.
 
-    match = re.match(r"br-sw(\d+)", host_bridge)
-    if not match:
-        return []
+    Args:
+        source: VM name (e.g., 'host1') or switch (e.g., 's2', 'br-sw2').
+        target: VM name or switch.
 
-    host_switch = f"s{match.group(1)}"
-    active_links = collect_active_links()
+    Returns:
+        ForwardingPath with the switches traversed, the egress/ingress veth of
+        each hop and every interface on the path, or None if no active path.
+    """
+    return get_path_index().path(source, target)
 
-    if host_switch == "s1":
-        return ["s1"]
 
-    adjacency = {}
-    for link in active_links:
-        from_node = link.source
-        to_node = link.target
-        if from_node not in adjacency:
-            adjacency[from_node] = []
-        if to_node not in adjacency:
-            adjacency[to_node] = []
-        adjacency[from_node].append(to_node)
-        adjacency[to_node].append(from_node)
+def collect_all_topology_info() -> AggregatedTopologyInfo:
+    """Collect all topology and configuration information in one comprehensive structure.
 
-    queue = deque([("s1", ["s1"])])
-    visited = {"s1"}
+    The topology, network settings and VM configs are all derived from the same
+    raw facts (see ``collect_facts``): one interface table read, one query per
+    VM, one STP read and one routing table read, shared with
+    ``get_network_topology`` and ``get_network_settings``, so the parts describe
+    one consistent point in time and nothing is fetched twice.
 
-    while queue:
-        current, path = queue.popleft()
+    The snapshot is cached in ``topology_cache`` under ``snapshot``, and its
+    parts also seed the ``stp``, ``active_links``, ``topology`` and
+    ``network_settings`` entries so later path and link queries reuse it.
+    """
+    return topology_cache.get_or_load(
+        "snapshot", _collect_topology_snapshot, depends_on=SNAPSHOT_DEPENDS_ON
+    )
 
-        if current == host_switch:
-            return path
 
-        for neighbor in adjacency.get(current, []):
-            if neighbor not in visited:
-                visited.add(neighbor)
-                queue.append((neighbor, path + [neighbor]))
+def _collect_topology_snapshot() -> AggregatedTopologyInfo:
+    with topology_cache.watch(*SNAPSHOT_WATCH_KEYS) as watch:
+        facts = collect_facts(*_FACTS)
+        return assemble_topology_snapshot(
+            links=facts["links"],
+            vms=facts["vm_configs"],
+            stp_info=facts["stp"].bridges,
+            routing=facts["routing"],
+            watch=watch,
+        )
 
-    return []
 
+def assemble_topology_snapshot(
+    links: Dict[str, LinkRecord],
+    vms: Dict[str, VMConfig],
+    stp_info: Dict[str, STPInfo],
+    routing: RoutingInfo,
+    inventory: Optional[Inventory] = None,
+    watch: Optional[CacheWatch] = None,
+) -> AggregatedTopologyInfo:
+    """Derive a consistent AggregatedTopologyInfo from raw collected facts.
+
+    Also seeds the ``active_links``, ``topology`` and ``network_settings``
+    cache entries, and the ``links``, ``vm_configs``, ``stp`` and ``routing``
+    facts unless they are already cached.
+
+    Args:
+        inventory: Inventory the facts were collected for. Defaults to the
+            current one.
+        watch: Watch over ``SNAPSHOT_WATCH_KEYS`` started before the facts
+            were read. If any of them was invalidated since (e.g. the topology
+            watcher published newer STP state), nothing is stored, so fresher
+            entries aren't overwritten with data built from old facts.
+    """
+    inventory = inventory or get_inventory()
+    bridges = {b: get_bridge_info(b, links) for b in inventory.bridges}
+    topology = _build_network_topology(
+        bridges=bridges,
+        vms=vms,
+        veths=_present_veths(inventory, links),
+        stp_info=stp_info,
+    )
+    network_settings = _build_network_settings(
+        bridges,
+        {
+            iface: get_interface_settings(iface, links)
+            for iface in _bridge_members(bridges)
+        },
+        routing,
+    )
+
+    facts = {
+        "links": links,
+        "vm_configs": vms,
+        "stp": STPInfoCollection(bridges=stp_info),
+        "routing": routing,
+    }
+    for name, value in facts.items():
+        topology_cache.put(
+            name,
+            value,
+            depends_on=_FACTS[name].depends_on,
+            watch=watch,
+            replace=False,
+        )
+    topology_cache.put(
+        "active_links",
+        topology.active_links,
+        depends_on=("stp", "inventory"),
+        watch=watch,
+    )
+    topology_cache.put(
+        "topology", topology, depends_on=TOPOLOGY_DEPENDS_ON, watch=watch
+    )
+    topology_cache.put(
+        "network_settings",
+        network_settings,
+        depends_on=NETWORK_SETTINGS_DEPENDS_ON,
+        watch=watch,
+    )
 
-def collect_all_topology_info() -> AggregatedTopologyInfo:
-    """Collect all topology and configuration information in one comprehensive structure."""
     return AggregatedTopologyInfo(
-        topology=get_network_topology(),
-        network_settings=get_network_settings(),
-        vm_configs={vm: get_vm_config(vm) for vm in VMS},
+        topology=topology,
+        network_settings=network_settings,
+        vm_configs=topology.vms,
     )
 
 
 def build_topology_summary() -> NetworkSummary:
     """Convert topology information to structured pydantic models optimized for LLMs."""
-    info = collect_all_topology_info()
+    return summarize_topology(collect_all_topology_info())
+
+
+def summarize_topology(info: AggregatedTopologyInfo) -> NetworkSummary:
+    """Build the LLM-oriented NetworkSummary from a topology snapshot."""
     topology = info.topology
     vm_to_bridge = topology.vm_to_bridge
     veth_connections = topology.veth_connections
@@ -500,6 +834,7 @@ def build_topology_summary() -> NetworkSummary:
             )
 
     bridge_connections: List[BridgeConnectionSummary] = []
+    bridge_names = {switch_id(name): name for name in topology.bridges}
     processed_links = set()
     for conn in veth_connections:
         from_node = conn.source
@@ -507,12 +842,10 @@ def build_topology_summary() -> NetworkSummary:
         interface = conn.interface
         link_key = tuple(sorted([from_node, to_node]))
         if link_key not in processed_links:
-            bridge_from = f"br-{from_node}" if from_node.startswith("s") else from_node
-            bridge_to = f"br-{to_node}" if to_node.startswith("s") else to_node
             bridge_connections.append(
                 BridgeConnectionSummary(
-                    from_bridge=bridge_from,
-                    to_bridge=bridge_to,
+                    from_bridge=bridge_names.get(from_node, from_node),
+                    to_bridge=bridge_names.get(to_node, to_node),
                     interface=interface,
                     from_node=from_node,
                     to_node=to_node,
@@ -534,29 +867,22 @@ def build_topology_summary() -> NetworkSummary:
                 ]
             )
 
+    path_index = topology_cache.get_or_load(
+        "path_index",
+        lambda: build_path_index(topology),
+        depends_on=("stp", "topology"),
+    )
     example_paths: List[ExamplePath] = []
-    for vm_name in ["host1", "host2", "host3", "host4"]:
-        if vm_name in vm_to_bridge:
-            path = calculate_path_to_host(vm_name)
-            if path:
-                used_veths: List[str] = []
-                for i in range(len(path) - 1):
-                    current = path[i]
-                    next_node = path[i + 1]
-                    for link in active_links:
-                        if (link.source == current and link.target == next_node) or (
-                            link.source == next_node and link.target == current
-                        ):
-                            used_veths.append(link.interface)
-                            break
-
-                example_paths.append(
-                    ExamplePath(
-                        host=vm_name,
-                        path_switches=path,
-                        interfaces_used=used_veths,
-                    )
+    for vm_name in sorted(topology.vm_to_bridge)[:EXAMPLE_PATH_COUNT]:
+        path = path_index.path(path_index.root, vm_name)
+        if path:
+            example_paths.append(
+                ExamplePath(
+                    host=vm_name,
+                    path_switches=path.switches,
+                    interfaces_used=[hop.interface for hop in path.hops],
                 )
+            )
 
     network_notes = [
         "VM-to-Bridge: VMs connect to bridges via vnet interfaces (e.g., host1 connects to br-sw3 via vnet3)",
@@ -0,0 +1,282 @@
+"""Network-namespace stand-in for the libvirt lab.
+
+``python -m network.lab up`` builds an N-switch lab inside one network
+namespace (``LAB_NAMESPACE``, default ``nmlab``):
+
+- switches are STP-enabled bridges ``br-sw1`` ... ``br-swN``; ``br-sw1`` gets
+  the lowest priority so it becomes the STP root, as in the real lab,
+- switches are joined by veth pairs ``veth-swA-swB`` / ``veth-swB-swA`` along a
+  random spanning tree plus ``--redundancy`` x N extra links, which STP blocks,
+- each VM is its own namespace (``nmlab-host1`` ...) whose ``eth0`` is the
+  peer of a ``vnetK`` port on a switch, with an address in ``10.77.0.0/16``.
+
+The VMs are described in a libvirt test-driver file (``libvirt.xml`` in
+``LAB_STATE_DIR``). ``python -m network.lab run -- <command>`` runs a command
+inside the lab namespace with ``LIBVIRT_URI`` and ``LIBVIRT_DEFAULT_URI``
+pointing at it, so the collectors, tools and agents run unchanged: they see the
+lab's bridges, veths, STP states and qdiscs through ``ip``, ``tc`` and sysfs,
+and its VMs through libvirt or ``virsh``.
+
+Links longer than 15 characters are named ``vswA-swB`` instead, so layouts of
+hundreds of switches fit the kernel's interface name limit. All interfaces are
+created with one ``ip -batch`` process; only the VM namespaces need one more
+process each to set their addresses.
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from typing import List, Optional
+from xml.sax.saxutils import escape
+
+from network.models import LabLayout
+
+LAB_NAMESPACE = os.environ.get("LAB_NAMESPACE", "nmlab")
+LAB_STATE_DIR = os.environ.get("LAB_STATE_DIR", "/tmp/network-lab")
+LAB_SUBNET_PREFIX = "10.77"
+
+# As root the commands run directly (no sudo needed, environment kept)
+SUDO = [] if os.geteuid() == 0 else ["sudo", "-n"]
+IP_COMMAND = SUDO + ["ip"]
+BRIDGE_COMMAND = SUDO + ["bridge"]
+
+# Shortest forward delay the kernel accepts with STP on (centiseconds)
+FORWARD_DELAY = 200
+ROOT_PRIORITY = 4096
+# How long lab_up waits for every bridge port to leave listening/learning
+CONVERGE_TIMEOUT = 60.0
+
+
+def link_name(a: int, b: int) -> str:
+    """Name of the veth on switch ``a`` that leads to switch ``b``."""
+    name = f"veth-sw{a}-sw{b}"
+    return name if len(name) <= 15 else f"vsw{a}-sw{b}"
+
+
+def host_address(index: int) -> str:
+    return f"{LAB_SUBNET_PREFIX}.{index // 250}.{index % 250 + 1}"
+
+
+def generate_layout(
+    switches: int,
+    hosts: int,
+    redundancy: float = 0.25,
+    seed: int = 0,
+    namespace: str = LAB_NAMESPACE,
+) -> LabLayout:
+    """Generate a connected switch graph with redundant links and VM placement.
+
+    Args:
+        switches: Number of switches.
+        hosts: Number of VMs, spread round-robin over the switches, last first.
+        redundancy: Extra links as a fraction of the switch count.
+        seed: Random seed; the same arguments always give the same layout.
+    """
+    rng = random.Random(seed)
+    links = set()
+    for switch in range(2, switches + 1):
+        links.add((rng.randint(1, switch - 1), switch))
+
+    extra = min(int(redundancy * switches), switches * (switches - 1) // 2 - len(links))
+    while extra > 0:
+        a, b = sorted(rng.sample(range(1, switches + 1), 2))
+        if (a, b) not in links:
+            links.add((a, b))
+            extra -= 1
+
+    return LabLayout(
+        switches=switches,
+        links=[list(link) for link in sorted(links)],
+        hosts={f"host{i + 1}": switches - (i % switches) for i in range(hosts)},
+        namespace=namespace,
+    )
+
+
+def lab_commands(layout: LabLayout) -> List[str]:
+    """``ip -batch`` lines (run inside the lab namespace) that build the layout."""
+    lines = ["link set lo up"]
+    for switch in range(1, layout.switches + 1):
+        priority = ROOT_PRIORITY if switch == 1 else 32768
+        lines.append(
+            f"link add br-sw{switch} type bridge stp_state 1 "
+            f"forward_delay {FORWARD_DELAY} priority {priority}"
+        )
+    for a, b in layout.links:
+        lines.append(
+            f"link add {link_name(a, b)} type veth peer name {link_name(b, a)}"
+        )
+        lines.append(f"link set {link_name(a, b)} master br-sw{a} up")
+        lines.append(f"link set {link_name(b, a)} master br-sw{b} up")
+    for index, (host, switch) in enumerate(layout.hosts.items()):
+        lines.append(
+            f"link add vnet{index} type veth peer name eth0 "
+            f"netns {layout.namespace}-{host}"
+        )
+        lines.append(f"link set vnet{index} master br-sw{switch} up")
+    for switch in range(1, layout.switches + 1):
+        lines.append(f"link set br-sw{switch} up")
+    return lines
+
+
+def libvirt_xml(layout: LabLayout) -> str:
+    """libvirt test-driver node definition with one running domain per VM."""
+    domains = []
+    for index, (host, switch) in enumerate(layout.hosts.items()):
+        mac = "52:54:00:" + ":".join(
+            f"{index >> shift & 0xFF:02x}" for shift in (16, 8, 0)
+        )
+        domains.append(f"""  <domain type="test">
+    <name>{escape(host)}</name>
+    <memory unit="KiB">1048576</memory>
+    <vcpu>1</vcpu>
+    <os><type>hvm</type></os>
+    <devices>
+      <interface type="bridge">
+        <source bridge="br-sw{switch}"/>
+        <target dev="vnet{index}"/>
+        <mac address="{mac}"/>
+        <model type="virtio"/>
+      </interface>
+    </devices>
+  </domain>""")
+    return "<node>\n" + "\n".join(domains) + "\n</node>\n"
+
+
+def _run(command: List[str], stdin: Optional[str] = None) -> str:
+    result = subprocess.run(
+        command, input=stdin, capture_output=True, text=True, timeout=600
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} failed: {result.stderr.strip()}")
+    return result.stdout
+
+
+def _namespaces(layout: LabLayout) -> List[str]:
+    return [f"{layout.namespace}-{host}" for host in layout.hosts]
+
+
+def libvirt_uri(state_dir: str = LAB_STATE_DIR) -> str:
+    return f"test://{os.path.abspath(os.path.join(state_dir, 'libvirt.xml'))}"
+
+
+def lab_up(layout: LabLayout, state_dir: str = LAB_STATE_DIR) -> None:
+    """Create the lab described by ``layout`` and wait for STP to converge."""
+    namespaces = [layout.namespace] + _namespaces(layout)
+    _run(
+        IP_COMMAND + ["-batch", "-"], "".join(f"netns add {ns}\n" for ns in namespaces)
+    )
+    try:
+        _run(
+            IP_COMMAND + ["-n", layout.namespace, "-batch", "-"],
+            "\n".join(lab_commands(layout)) + "\n",
+        )
+        for index, namespace in enumerate(_namespaces(layout)):
+            _run(
+                IP_COMMAND + ["-n", namespace, "-batch", "-"],
+                "link set lo up\n"
+                f"addr add {host_address(index)}/16 dev eth0\n"
+                "link set eth0 up\n",
+            )
+    except RuntimeError:
+        lab_down(layout)
+        raise
+
+    os.makedirs(state_dir, exist_ok=True)
+    with open(os.path.join(state_dir, "layout.json"), "w") as f:
+        f.write(layout.model_dump_json())
+    with open(os.path.join(state_dir, "libvirt.xml"), "w") as f:
+        f.write(libvirt_xml(layout))
+    if not wait_converged(layout.namespace, CONVERGE_TIMEOUT):
+        raise RuntimeError(
+            f"STP in {layout.namespace} did not converge within "
+            f"{CONVERGE_TIMEOUT:g}s; the lab is left up for inspection"
+        )
+
+
+def wait_converged(
+    namespace: str = LAB_NAMESPACE, timeout: float = CONVERGE_TIMEOUT
+) -> bool:
+    """Wait until no bridge port is listening or learning."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        ports = json.loads(
+            _run(BRIDGE_COMMAND + ["-n", namespace, "-j", "link", "show"]) or "[]"
+        )
+        if ports and not any(
+            port.get("state") in ("listening", "learning") for port in ports
+        ):
+            return True
+        time.sleep(0.5)
+    return False
+
+
+def load_layout(state_dir: str = LAB_STATE_DIR) -> Optional[LabLayout]:
+    try:
+        with open(os.path.join(state_dir, "layout.json")) as f:
+            return LabLayout.model_validate_json(f.read())
+    except OSError:
+        return None
+
+
+def lab_down(layout: LabLayout) -> None:
+    """Delete the lab and VM namespaces (their interfaces go with them)."""
+    existing = set(os.listdir("/run/netns")) if os.path.isdir("/run/netns") else set()
+    namespaces = [
+        ns for ns in [layout.namespace] + _namespaces(layout) if ns in existing
+    ]
+    if namespaces:
+        _run(
+            IP_COMMAND + ["-force", "-batch", "-"],
+            "".join(f"netns del {ns}\n" for ns in namespaces),
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m network.lab")
+    commands = parser.add_subparsers(dest="command", required=True)
+    up = commands.add_parser("up", help="create the lab")
+    up.add_argument("--switches", type=int, default=4)
+    up.add_argument("--hosts", type=int, default=4)
+    up.add_argument("--redundancy", type=float, default=0.25)
+    up.add_argument("--seed", type=int, default=0)
+    commands.add_parser("down", help="delete the lab")
+    run = commands.add_parser("run", help="run a command inside the lab")
+    run.add_argument("cmd", nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+
+    if args.command == "up":
+        previous = load_layout()
+        if previous is not None:
+            lab_down(previous)
+        layout = generate_layout(args.switches, args.hosts, args.redundancy, args.seed)
+        lab_up(layout)
+        print(
+            f"{layout.switches} switches, {len(layout.links)} links, "
+            f"{len(layout.hosts)} VMs in namespace {layout.namespace}"
+        )
+    elif args.command == "down":
+        layout = load_layout()
+        if layout is not None:
+            lab_down(layout)
+            os.remove(os.path.join(LAB_STATE_DIR, "layout.json"))
+    else:
+        layout = load_layout()
+        if layout is None:
+            sys.exit("no lab is running; use 'python -m network.lab up' first")
+        cmd = args.cmd[1:] if args.cmd[:1] == ["--"] else args.cmd
+        uri = libvirt_uri()
+        os.execvp(
+            IP_COMMAND[0],
+            IP_COMMAND
+            + ["netns", "exec", layout.namespace, "env"]
+            + [f"LIBVIRT_URI={uri}", f"LIBVIRT_DEFAULT_URI={uri}"]
+            + (cmd or [os.environ.get("SHELL", "/bin/sh")]),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""VM inventory and configuration through the libvirt Python bindings.
+
+One shared read-only connection is kept open and reused. Every domain's
+state, vCPU count and memory come from a single ``getAllDomainStats`` call,
+and interfaces come from each domain's XML over that same connection, so a
+snapshot costs no process spawns regardless of the number of VMs.
+
+Functions return None when the bindings are not installed or the hypervisor
+cannot be reached, and callers fall back to ``virsh``. Set ``VM_BACKEND`` to
+``virsh`` to skip libvirt. ``LIBVIRT_URI`` selects the hypervisor (default
+``qemu:///system``).
+"""
+
+import os
+import threading
+import time
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterable, List, Optional
+
+from network.models import MemoryInfo, VMConfig, VMInterface
+
+try:
+    import libvirt
+except ImportError:
+    libvirt = None
+
+VM_BACKEND = os.environ.get("VM_BACKEND", "auto")
+LIBVIRT_URI = os.environ.get("LIBVIRT_URI", "qemu:///system")
+
+# Seconds to wait before retrying a connection that failed to open
+RECONNECT_BACKOFF = 30.0
+
+# virDomainState values, named the way ``virsh dominfo`` prints them
+DOMAIN_STATES = {
+    0: "no state",
+    1: "running",
+    2: "idle",
+    3: "paused",
+    4: "in shutdown",
+    5: "shut off",
+    6: "crashed",
+    7: "pmsuspended",
+}
+
+
+class LibvirtConnection:
+    """Lazily opened, shared read-only libvirt connection.
+
+    libvirt connections are thread-safe, so one connection serves all
+    collector threads. A dead connection is reopened on the next use; a failed
+    open is not retried for ``RECONNECT_BACKOFF`` seconds.
+    """
+
+    def __init__(self, uri: str = LIBVIRT_URI):
+        self.uri = uri
+        self._lock = threading.Lock()
+        self._conn = None
+        self._failed_at: Optional[float] = None
+
+    def get(self):
+        """Return an open connection, or None if libvirt is unavailable."""
+        if libvirt is None or VM_BACKEND == "virsh":
+            return None
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    if self._conn.isAlive():
+                        return self._conn
+                except libvirt.libvirtError:
+                    pass
+                self._close()
+
+            if (
+                self._failed_at is not None
+                and time.monotonic() - self._failed_at < RECONNECT_BACKOFF
+            ):
+                return None
+            try:
+                self._conn = libvirt.openReadOnly(self.uri)
+                self._failed_at = None
+            except libvirt.libvirtError:
+                self._conn = None
+                self._failed_at = time.monotonic()
+            return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except libvirt.libvirtError:
+                pass
+        self._conn = None
+
+
+connection = LibvirtConnection()
+
+
+def _stats_flags() -> int:
+    return (
+        libvirt.VIR_DOMAIN_STATS_STATE
+        | libvirt.VIR_DOMAIN_STATS_VCPU
+        | libvirt.VIR_DOMAIN_STATS_BALLOON
+    )
+
+
+def list_domain_names() -> Optional[List[str]]:
+    """List all domain names (active and inactive) in one call."""
+    conn = connection.get()
+    if conn is None:
+        return None
+    try:
+        return sorted(domain.name() for domain in conn.listAllDomains(0))
+    except libvirt.libvirtError:
+        return None
+
+
+def parse_domain_interfaces(xml: str) -> List[VMInterface]:
+    """Extract interfaces from domain XML, matching ``virsh domiflist`` fields."""
+    interfaces = []
+    for iface in ET.fromstring(xml).findall("./devices/interface"):
+        iface_type = iface.get("type")
+        source = iface.find("source")
+        target = iface.find("target")
+        model = iface.find("model")
+        mac = iface.find("mac")
+        source_name = None
+        if source is not None:
+            source_name = (
+                source.get("bridge") or source.get("network") or source.get("dev")
+            )
+        interfaces.append(
+            VMInterface(
+                interface=target.get("dev") if target is not None else "-",
+                type=iface_type,
+                source=source_name,
+                model=model.get("type") if model is not None else None,
+                mac=mac.get("address") if mac is not None else None,
+            )
+        )
+    return interfaces
+
+
+def vm_config_from_stats(domain, stats: dict) -> VMConfig:
+    """Build a VMConfig from one ``getAllDomainStats`` record."""
+    vcpu = stats.get("vcpu.current")
+    memory_kib = stats.get("balloon.maximum")
+    try:
+        interfaces = parse_domain_interfaces(domain.XMLDesc(0))
+    except (libvirt.libvirtError, ET.ParseError):
+        interfaces = []
+    return VMConfig(
+        name=domain.name(),
+        exists=True,
+        state=DOMAIN_STATES.get(stats.get("state.state"), "unknown"),
+        vcpu=int(vcpu) if vcpu is not None else None,
+        memory=(
+            MemoryInfo(value=int(memory_kib), unit="KiB")
+            if memory_kib is not None
+            else None
+        ),
+        interfaces=interfaces,
+        disks=[],
+        os_type=None,
+    )
+
+
+def get_vm_configs(vm_names: Iterable[str]) -> Optional[Dict[str, VMConfig]]:
+    """Fetch configurations for the given domains with one bulk stats call.
+
+    Returns:
+        Dictionary mapping every requested name to its VMConfig (``exists`` is
+        False for unknown domains), or None if libvirt is unavailable.
+    """
+    conn = connection.get()
+    if conn is None:
+        return None
+    try:
+        records = conn.getAllDomainStats(_stats_flags())
+    except libvirt.libvirtError:
+        return None
+
+    found = {domain.name(): (domain, stats) for domain, stats in records}
+    configs = {}
+    for name in vm_names:
+        if name in found:
+            configs[name] = vm_config_from_stats(*found[name])
+        else:
+            configs[name] = VMConfig(
+                name=name, exists=False, state="unknown", interfaces=[], disks=[]
+            )
+    return configs
+
+
+def get_vm_config(vm_name: str) -> Optional[VMConfig]:
+    """Fetch one domain's configuration, or None if libvirt is unavailable."""
+    conn = connection.get()
+    if conn is None:
+        return None
+    try:
+        domain = conn.lookupByName(vm_name)
+    except libvirt.libvirtError as e:
+        if e.get_error_code() == libvirt.VIR_ERR_NO_DOMAIN:
+            return VMConfig(
+                name=vm_name, exists=False, state="unknown", interfaces=[], disks=[]
+            )
+        return None
+    try:
+        records = conn.domainListGetStats([domain], _stats_flags())
+    except libvirt.libvirtError:
+        return None
+    return vm_config_from_stats(*records[0])
@@ -0,0 +1,394 @@
+"""Per-tool call metrics.
+
+``ToolMetrics.track`` measures one tool call: wall time, the processes it
+started, the topology cache hits and misses it caused, and the size of its
+output as the model will see it (bytes and estimated tokens). Per-call counters
+live in a context variable:
+
+- processes are counted by a ``subprocess.Popen`` hook, which also sees
+  ``asyncio`` subprocesses; it is installed only while a ``counting`` block
+  (e.g. a tracked call) is active,
+- ``TopologyCache`` reports hits and misses through ``count_cache``,
+- ``ContextThreadPoolExecutor`` runs pool work in the caller's context, so
+  collectors that fan out over threads are attributed to the calling tool.
+
+Work done outside a tool call (the sampler and watcher threads) is not counted.
+
+Other components count events with a ``LabeledCounter`` (e.g. routing
+decisions by agent and how they were obtained).
+
+The totals are exported as Prometheus text or JSON. When ``TOOL_METRICS_PORT``
+is set, ``start_metrics_server`` serves them on ``/metrics`` and
+``/metrics.json`` (bound to ``TOOL_METRICS_HOST``, default ``127.0.0.1``).
+"""
+
+import bisect
+import contextvars
+import json
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from network.encoding import estimate_tokens
+
+TOOL_METRICS_PORT = int(os.environ.get("TOOL_METRICS_PORT", "0"))
+TOOL_METRICS_HOST = os.environ.get("TOOL_METRICS_HOST", "127.0.0.1")
+
+# Upper bounds of the latency histogram buckets (seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+_BOUNDS = LATENCY_BUCKETS + (float("inf"),)
+
+_COUNTERS = (
+    "calls",
+    "errors",
+    "subprocesses",
+    "output_bytes",
+    "output_tokens",
+    "cache_hits",
+    "cache_misses",
+)
+
+
+class CallCounters:
+    """Counters of the tool call running in the current context.
+
+    Events are also added to the counters of the enclosing call, if any.
+    """
+
+    def __init__(self, parent: Optional["CallCounters"] = None):
+        self.subprocesses = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.parent = parent
+        self._lock = threading.Lock()
+
+    def add(self, field: str) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+        if self.parent is not None:
+            self.parent.add(field)
+
+
+_current: contextvars.ContextVar[Optional[CallCounters]] = contextvars.ContextVar(
+    "tool_call_counters", default=None
+)
+
+
+def count_cache(hit: bool) -> None:
+    """Record a topology cache hit or miss for the current tool call."""
+    counters = _current.get()
+    if counters is not None:
+        counters.add("cache_hits" if hit else "cache_misses")
+
+
+_popen_lock = threading.Lock()
+_popen_users = 0
+_popen_init = subprocess.Popen.__init__
+
+
+def _counting_popen_init(popen, *args, **kwargs):
+    counters = _current.get()
+    if counters is not None:
+        counters.add("subprocesses")
+    _popen_init(popen, *args, **kwargs)
+
+
+def _hook_popen() -> None:
+    global _popen_users, _popen_init
+    with _popen_lock:
+        if _popen_users == 0:
+            _popen_init = subprocess.Popen.__init__
+            subprocess.Popen.__init__ = _counting_popen_init
+        _popen_users += 1
+
+
+def _unhook_popen() -> None:
+    global _popen_users
+    with _popen_lock:
+        _popen_users -= 1
+        if _popen_users == 0:
+            subprocess.Popen.__init__ = _popen_init
+
+
+@contextmanager
+def counting() -> Iterator[CallCounters]:
+    """Count the processes and cache lookups of the code run inside the block.
+
+    Blocks nest; the counts of an inner block are included in the outer one.
+    """
+    counters = CallCounters(parent=_current.get())
+    token = _current.set(counters)
+    _hook_popen()
+    try:
+        yield counters
+    finally:
+        _unhook_popen()
+        _current.reset(token)
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """Thread pool whose tasks run in a copy of the submitter's context."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        context = contextvars.copy_context()
+        return super().submit(context.run, fn, *args, **kwargs)
+
+
+class CallRecord:
+    def __init__(self):
+        self.counters = CallCounters()
+        self.output: Optional[str] = None
+        self.failed = False
+
+
+class ToolStats:
+    """Totals and latency histogram of one tool."""
+
+    def __init__(self):
+        for name in _COUNTERS:
+            setattr(self, name, 0)
+        self.latency_sum = 0.0
+        # One count per bucket in LATENCY_BUCKETS plus +Inf, not cumulative
+        self.latency_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def latency_quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the ``q`` quantile.
+
+        None without calls, or if the quantile is above the largest bucket.
+        """
+        rank, seen = q * self.calls, 0
+        for bound, count in zip(LATENCY_BUCKETS, self.latency_counts):
+            seen += count
+            if self.calls and seen >= rank:
+                return bound
+        return None
+
+    def to_dict(self) -> dict:
+        lookups = self.cache_hits + self.cache_misses
+        cumulative, buckets = 0, {}
+        for bound, count in zip(_BOUNDS, self.latency_counts):
+            cumulative += count
+            buckets[_le(bound)] = cumulative
+        return {
+            **{name: getattr(self, name) for name in _COUNTERS},
+            "cache_hit_rate": round(self.cache_hits / lookups, 4) if lookups else None,
+            "latency_seconds": {
+                "sum": round(self.latency_sum, 6),
+                "mean": round(self.latency_sum / self.calls, 6) if self.calls else None,
+                "p50": self.latency_quantile(0.5),
+                "p95": self.latency_quantile(0.95),
+                "buckets": buckets,
+            },
+        }
+
+
+class ToolMetrics:
+    """Thread-safe registry of per-(agent, tool) statistics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], ToolStats] = {}
+
+    @contextmanager
+    def track(self, agent: str, tool: str) -> Iterator[CallRecord]:
+        """Measure the tool call run inside the ``with`` block.
+
+        The caller sets ``output`` on the yielded record to the text the model
+        receives.
+        """
+        record = CallRecord()
+        started = time.perf_counter()
+        try:
+            with counting() as record.counters:
+                yield record
+        except BaseException:
+            record.failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self._record(agent, tool, elapsed, record)
+
+    def _record(
+        self, agent: str, tool: str, elapsed: float, record: CallRecord
+    ) -> None:
+        output = record.output or ""
+        with self._lock:
+            stats = self._stats.setdefault((agent, tool), ToolStats())
+            stats.calls += 1
+            stats.errors += record.failed
+            stats.subprocesses += record.counters.subprocesses
+            stats.cache_hits += record.counters.cache_hits
+            stats.cache_misses += record.counters.cache_misses
+            stats.output_bytes += len(output.encode())
+            stats.output_tokens += estimate_tokens(output)
+            stats.latency_sum += elapsed
+            stats.latency_counts[bisect.bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def to_json(self) -> dict:
+        """``{agent: {tool: stats}}``."""
+        with self._lock:
+            result: Dict[str, Dict[str, dict]] = {}
+            for (agent, tool), stats in sorted(self._stats.items()):
+                result.setdefault(agent, {})[tool] = stats.to_dict()
+            return result
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            items = sorted(self._stats.items())
+            for name in _COUNTERS:
+                metric = f"network_tool_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                for (agent, tool), stats in items:
+                    lines.append(
+                        f"{metric}{_labels(agent, tool)} {getattr(stats, name)}"
+                    )
+
+            metric = "network_tool_latency_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for (agent, tool), stats in items:
+                cumulative = 0
+                for bound, count in zip(_BOUNDS, stats.latency_counts):
+                    cumulative += count
+                    labels = _labels(agent, tool, le=_le(bound))
+                    lines.append(f"{metric}_bucket{labels} {cumulative}")
+                lines.append(
+                    f"{metric}_sum{_labels(agent, tool)} {stats.latency_sum:.6f}"
+                )
+                lines.append(f"{metric}_count{_labels(agent, tool)} {stats.calls}")
+        return "\n".join(lines) + "\n"
+
+
+def _le(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else f"{bound:g}"
+
+
+def _labels(agent: str, tool: str, **extra: str) -> str:
+    return _format_labels({"agent": agent, "tool": tool, **extra})
+
+
+def _format_labels(pairs: Dict[str, str]) -> str:
+    escaped = {
+        key: value.replace("\\", "\\\\").replace('"', '\\"')
+        for key, value in pairs.items()
+    }
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped.items()) + "}"
+
+
+class LabeledCounter:
+    """Prometheus-style counter with labels."""
+
+    def __init__(self, name: str, labels: Tuple[str, ...], description: str = ""):
+        self.name = name
+        self.labels = labels
+        self.description = description
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], int] = {}
+        with _counters_lock:
+            _counters.append(self)
+
+    def inc(self, *values: str) -> None:
+        if len(values) != len(self.labels):
+            raise ValueError(f"{self.name} takes labels {self.labels}")
+        with self._lock:
+            self._values[values] = self._values.get(values, 0) + 1
+
+    def value(self, *values: str) -> int:
+        with self._lock:
+            return self._values.get(values, 0)
+
+    def to_json(self) -> dict:
+        """Counts nested by label value, in label order."""
+        result: dict = {}
+        with self._lock:
+            for values, count in sorted(self._values.items()):
+                node = result
+                for value in values[:-1]:
+                    node = node.setdefault(value, {})
+                node[values[-1]] = count
+        return result
+
+    def to_prometheus(self) -> str:
+        lines = []
+        if self.description:
+            lines.append(f"# HELP {self.name} {self.description}")
+        lines.append(f"# TYPE {self.name} counter")
+        with self._lock:
+            for values, count in sorted(self._values.items()):
+                labels = _format_labels(dict(zip(self.labels, values)))
+                lines.append(f"{self.name}{labels} {count}")
+        return "\n".join(lines) + "\n"
+
+
+_counters: List[LabeledCounter] = []
+_counters_lock = threading.Lock()
+
+tool_metrics = ToolMetrics()
+
+
+def metrics_text() -> str:
+    """Tool metrics and every ``LabeledCounter`` in Prometheus text format."""
+    with _counters_lock:
+        counters = list(_counters)
+    return tool_metrics.to_prometheus() + "".join(c.to_prometheus() for c in counters)
+
+
+def metrics_json() -> dict:
+    """``{"tools": {agent: {tool: stats}}, <counter name>: {...}}``."""
+    with _counters_lock:
+        counters = list(_counters)
+    return {
+        "tools": tool_metrics.to_json(),
+        **{counter.name: counter.to_json() for counter in counters},
+    }
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            body = metrics_text().encode()
+            content_type = "text/plain; version=0.0.4"
+        elif path == "/metrics.json":
+            body = json.dumps(metrics_json()).encode()
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(
+    port: int = TOOL_METRICS_PORT, host: str = TOOL_METRICS_HOST
+) -> Optional[ThreadingHTTPServer]:
+    """Serve the metrics over HTTP on first use; port 0 leaves it off."""
+    global _server
+    with _server_lock:
+        if _server is None and port:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            _server.daemon_threads = True
+            threading.Thread(
+                target=_server.serve_forever, name="tool-metrics", daemon=True
+            ).start()
+        return _server
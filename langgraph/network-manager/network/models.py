@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Literal, Optional
 
 from pydantic import BaseModel
 
@@ -70,6 +70,21 @@ class VethConnection(BaseModel):
     type: str
 
 
+class PathHop(BaseModel):
+    source: str
+    target: str
+    interface: str
+    peer_interface: str
+
+
+class ForwardingPath(BaseModel):
+    source: str
+    target: str
+    switches: List[str] = []
+    hops: List[PathHop] = []
+    interfaces: List[str] = []
+
+
 class NetworkTopology(BaseModel):
     bridges: Dict[str, BridgeInfo]
     vms: Dict[str, VMConfig]
@@ -91,6 +106,109 @@ class InterfaceSettings(BaseModel):
     state: str = "DOWN"
 
 
+class InterfaceStats(BaseModel):
+    interface: str
+    exists: bool
+    rx_bytes: int = 0
+    tx_bytes: int = 0
+    rx_packets: int = 0
+    tx_packets: int = 0
+    rx_errors: int = 0
+    tx_errors: int = 0
+
+
+class RateStats(BaseModel):
+    mean: float = 0.0
+    p50: float = 0.0
+    p95: float = 0.0
+    p99: float = 0.0
+    max: float = 0.0
+
+
+class InterfaceRates(BaseModel):
+    interface: str
+    exists: bool
+    samples: int = 0
+    window_seconds: float = 0.0
+    rx_bps: RateStats = RateStats()
+    tx_bps: RateStats = RateStats()
+    rx_pps: RateStats = RateStats()
+    tx_pps: RateStats = RateStats()
+    rx_errors_per_sec: RateStats = RateStats()
+    tx_errors_per_sec: RateStats = RateStats()
+    rx_dropped_per_sec: RateStats = RateStats()
+    tx_dropped_per_sec: RateStats = RateStats()
+
+
+class LinkRecord(BaseModel):
+    name: str
+    ifindex: Optional[int] = None
+    flags: List[str] = []
+    operstate: Optional[str] = None
+    mac: Optional[str] = None
+    master: Optional[str] = None
+    kind: Optional[str] = None
+    peer: Optional[str] = None
+    qdisc: Optional[str] = None
+    ips: List[str] = []
+    rx_bytes: int = 0
+    tx_bytes: int = 0
+    rx_packets: int = 0
+    tx_packets: int = 0
+    rx_errors: int = 0
+    tx_errors: int = 0
+    rx_dropped: int = 0
+    tx_dropped: int = 0
+
+
+class VethLink(BaseModel):
+    interface: str
+    peer: Optional[str] = None
+    bridge: Optional[str] = None
+    peer_bridge: Optional[str] = None
+
+
+class Inventory(BaseModel):
+    bridges: List[str] = []
+    veths: Dict[str, VethLink] = {}
+    vms: List[str] = []
+    source: str = "discovered"
+    generation: int = 0
+
+    def interfaces(self) -> List[str]:
+        """Bridges followed by veths, the interfaces scanned for TC and state."""
+        return self.bridges + list(self.veths)
+
+
+class QdiscInfo(BaseModel):
+    interface: str
+    kind: str
+    handle: Optional[str] = None
+    parent: Optional[str] = None
+    root: bool = False
+    line: str
+    rate_bps: Optional[int] = None
+    burst_bytes: Optional[int] = None
+    latency_ms: Optional[float] = None
+    delay_ms: Optional[float] = None
+    jitter_ms: Optional[float] = None
+    loss_percent: Optional[float] = None
+
+
+class TCSettings(BaseModel):
+    interface: str
+    has_tc: bool
+    qdiscs: List[str] = []
+    bandwidth_limit: Optional[str] = None
+    burst: Optional[str] = None
+    has_netem: Optional[bool] = None
+    rate_bps: Optional[int] = None
+    burst_bytes: Optional[int] = None
+    delay_ms: Optional[float] = None
+    jitter_ms: Optional[float] = None
+    loss_percent: Optional[float] = None
+
+
 class RoutingInfo(BaseModel):
     route_count: int = 0
     routes: List[str] = []
@@ -163,3 +281,81 @@ class NetworkSummary(BaseModel):
     example_paths: List[ExamplePath]
     network_notes: List[str]
     key_interfaces: List[KeyInterfaceInfo]
+
+
+class TopologyChange(BaseModel):
+    seq: int
+    timestamp: float
+    kind: str
+    subject: str
+    old: Optional[str] = None
+    new: Optional[str] = None
+    description: str
+
+
+class TopologyChanges(BaseModel):
+    cursor: int
+    changes: List[TopologyChange] = []
+    baseline: bool = False
+    truncated: bool = False
+
+
+class ShapingSpec(BaseModel):
+    interface: str
+    action: Literal["limit", "remove"] = "limit"
+    rate: str = "1Mbit"
+    burst: str = "32Kb"
+    latency: str = "50ms"
+
+
+class TCBatchResult(BaseModel):
+    success: bool
+    details: str
+    interfaces: List[str] = []
+    commands: List[str] = []
+    rolled_back: bool = False
+    error: Optional[str] = None
+
+
+class PathShapingResult(BaseModel):
+    source: str
+    target: str
+    switches: List[str] = []
+    batch: TCBatchResult
+
+
+class LatencyStats(BaseModel):
+    mean: float = 0.0
+    p50: float = 0.0
+    p95: float = 0.0
+    p99: float = 0.0
+    max: float = 0.0
+
+
+class ProbeEndpoint(BaseModel):
+    bridge: str
+    namespace: str
+    port: str
+    address: str
+
+
+class ProbeResult(BaseModel):
+    source: str
+    target: str
+    switches: List[str] = []
+    duration_seconds: float = 0.0
+    bytes_received: int = 0
+    throughput_bps: Optional[float] = None
+    throughput: Optional[str] = None
+    rtt_ms: LatencyStats = LatencyStats()
+    probes_sent: int = 0
+    probes_received: int = 0
+    loss_percent: Optional[float] = None
+    error: Optional[str] = None
+
+
+class LabLayout(BaseModel):
+    switches: int
+    links: List[List[int]] = []
+    hosts: Dict[str, int] = {}
+    namespace: str = "nmlab"
@@ -0,0 +1,347 @@
+"""Bulk interface reader backed by rtnetlink.
+
+Link, address, bridge-membership and counter data for every interface on the
+host is read in one pass and returned as ``LinkRecord`` models keyed by
+interface name. Backends, in order of preference:
+
+- ``pyroute2``: one rtnetlink socket, a link dump and an address dump.
+- ``ip``: a single ``ip -json -s -d addr show`` process.
+- ``sysfs``: ``/sys/class/net`` files; no process at all, but no IP addresses,
+  and the only kinds it knows are bridge and veth (from the ethtool driver).
+
+Set ``NETLINK_BACKEND`` to one of the names above to pin a backend; the default
+``auto`` uses the first one that works.
+"""
+
+import array
+import fcntl
+import json
+import os
+import socket
+import struct
+import subprocess
+from typing import Callable, Dict, List, Optional
+
+from network.models import (
+    BridgeInfo,
+    InterfaceSettings,
+    InterfaceStats,
+    LinkRecord,
+)
+
+try:
+    from pyroute2 import IPRoute
+except ImportError:
+    IPRoute = None
+
+NETLINK_BACKEND = os.environ.get("NETLINK_BACKEND", "auto")
+SYSFS_NET = "/sys/class/net"
+
+_COUNTERS = (
+    "rx_bytes",
+    "tx_bytes",
+    "rx_packets",
+    "tx_packets",
+    "rx_errors",
+    "tx_errors",
+    "rx_dropped",
+    "tx_dropped",
+)
+
+# Values of /sys/class/net/<port>/brport/state, named the way brctl prints them
+STP_PORT_STATES = {
+    0: "disabled",
+    1: "listening",
+    2: "learning",
+    3: "forwarding",
+    4: "blocking",
+}
+
+IFF_UP = 0x1
+IFF_FLAG_NAMES = {
+    0x1: "UP",
+    0x2: "BROADCAST",
+    0x8: "LOOPBACK",
+    0x80: "NOARP",
+    0x100: "PROMISC",
+    0x1000: "MULTICAST",
+    0x10000: "LOWER_UP",
+}
+
+
+def _flag_names(flags: int) -> List[str]:
+    return [name for bit, name in IFF_FLAG_NAMES.items() if flags & bit]
+
+
+def _read_links_pyroute2() -> Dict[str, LinkRecord]:
+    if IPRoute is None:
+        raise RuntimeError("pyroute2 is not installed")
+
+    with IPRoute() as ipr:
+        links = ipr.get_links()
+        addrs = ipr.get_addr(family=2)  # AF_INET
+
+    names = {link["index"]: link.get_attr("IFLA_IFNAME") for link in links}
+    ips: Dict[int, List[str]] = {}
+    for addr in addrs:
+        address = addr.get_attr("IFA_LOCAL") or addr.get_attr("IFA_ADDRESS")
+        if address:
+            ips.setdefault(addr["index"], []).append(f"{address}/{addr['prefixlen']}")
+
+    records: Dict[str, LinkRecord] = {}
+    for link in links:
+        index = link["index"]
+        name = names[index]
+        linkinfo = link.get_attr("IFLA_LINKINFO")
+        stats = link.get_attr("IFLA_STATS64") or link.get_attr("IFLA_STATS") or {}
+        peer_index = link.get_attr("IFLA_LINK")
+        records[name] = LinkRecord(
+            name=name,
+            ifindex=index,
+            flags=_flag_names(link["flags"]),
+            operstate=link.get_attr("IFLA_OPERSTATE"),
+            mac=link.get_attr("IFLA_ADDRESS"),
+            master=names.get(link.get_attr("IFLA_MASTER")),
+            kind=linkinfo.get_attr("IFLA_INFO_KIND") if linkinfo else None,
+            peer=names.get(peer_index) if peer_index != index else None,
+            qdisc=link.get_attr("IFLA_QDISC"),
+            ips=ips.get(index, []),
+            **{counter: stats.get(counter, 0) for counter in _COUNTERS},
+        )
+    return records
+
+
+def _read_links_ip() -> Dict[str, LinkRecord]:
+    result = subprocess.run(
+        ["ip", "-json", "-s", "-d", "addr", "show"],
+        capture_output=True,
+        text=True,
+        timeout=5,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or "ip -json addr show failed")
+    return parse_ip_links(result.stdout)
+
+
+def parse_ip_links(output: str) -> Dict[str, LinkRecord]:
+    """Parse ``ip -json -s -d addr show`` output into LinkRecords."""
+    records: Dict[str, LinkRecord] = {}
+    for entry in json.loads(output or "[]"):
+        stats = entry.get("stats64") or entry.get("stats") or {}
+        rx = stats.get("rx", {})
+        tx = stats.get("tx", {})
+        name = entry["ifname"]
+        records[name] = LinkRecord(
+            name=name,
+            ifindex=entry.get("ifindex"),
+            flags=entry.get("flags", []),
+            operstate=entry.get("operstate"),
+            mac=entry.get("address"),
+            master=entry.get("master"),
+            kind=entry.get("linkinfo", {}).get("info_kind"),
+            peer=entry.get("link"),
+            qdisc=entry.get("qdisc"),
+            ips=[
+                f"{addr['local']}/{addr['prefixlen']}"
+                for addr in entry.get("addr_info", [])
+                if addr.get("family") == "inet"
+            ],
+            rx_bytes=rx.get("bytes", 0),
+            tx_bytes=tx.get("bytes", 0),
+            rx_packets=rx.get("packets", 0),
+            tx_packets=tx.get("packets", 0),
+            rx_errors=rx.get("errors", 0),
+            tx_errors=tx.get("errors", 0),
+            rx_dropped=rx.get("dropped", 0),
+            tx_dropped=tx.get("dropped", 0),
+        )
+    return records
+
+
+def _read_sysfs(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+SIOCETHTOOL = 0x8946
+ETHTOOL_GDRVINFO = 0x00000003
+# struct ethtool_drvinfo; the driver name follows the 4-byte command
+_DRVINFO_SIZE = 196
+
+
+def _ethtool_driver(sock: socket.socket, name: str) -> Optional[str]:
+    """Driver name as ``ethtool -i`` reports it, read with an ioctl."""
+    drvinfo = array.array(
+        "B", struct.pack("I", ETHTOOL_GDRVINFO) + bytes(_DRVINFO_SIZE - 4)
+    )
+    address, _ = drvinfo.buffer_info()
+    try:
+        fcntl.ioctl(
+            sock.fileno(), SIOCETHTOOL, struct.pack("16sP", name.encode(), address)
+        )
+    except OSError:
+        return None
+    return drvinfo[4:36].tobytes().split(b"\0", 1)[0].decode() or None
+
+
+def _read_links_sysfs() -> Dict[str, LinkRecord]:
+    entries = os.listdir(SYSFS_NET)
+    names_by_index: Dict[int, str] = {}
+    raw: Dict[str, Dict[str, Optional[str]]] = {}
+
+    for name in entries:
+        base = os.path.join(SYSFS_NET, name)
+        fields = {
+            field: _read_sysfs(os.path.join(base, field))
+            for field in ("ifindex", "iflink", "flags", "operstate", "address")
+        }
+        raw[name] = fields
+        if fields["ifindex"]:
+            names_by_index[int(fields["ifindex"])] = name
+
+    records: Dict[str, LinkRecord] = {}
+    # sysfs has no link kind, and iflink of a vlan, macvlan or ipvlan points at
+    # its parent just like a veth's points at its peer; only the driver tells
+    # them apart. Devices that aren't bridges or veths get no kind or peer.
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as ethtool:
+        for name, fields in raw.items():
+            base = os.path.join(SYSFS_NET, name)
+            ifindex = int(fields["ifindex"]) if fields["ifindex"] else None
+            iflink = int(fields["iflink"]) if fields["iflink"] else None
+            if os.path.isdir(os.path.join(base, "bridge")):
+                kind = "bridge"
+            elif iflink != ifindex and _ethtool_driver(ethtool, name) == "veth":
+                kind = "veth"
+            else:
+                kind = None
+            master_link = os.path.join(base, "master")
+            operstate = fields["operstate"]
+            counters = {
+                counter: int(
+                    _read_sysfs(os.path.join(base, "statistics", counter)) or 0
+                )
+                for counter in _COUNTERS
+            }
+            records[name] = LinkRecord(
+                name=name,
+                ifindex=ifindex,
+                flags=_flag_names(int(fields["flags"], 16)) if fields["flags"] else [],
+                operstate=operstate.upper() if operstate else None,
+                mac=fields["address"],
+                master=(
+                    os.path.basename(os.readlink(master_link))
+                    if os.path.islink(master_link)
+                    else None
+                ),
+                kind=kind,
+                peer=names_by_index.get(iflink) if kind == "veth" else None,
+                **counters,
+            )
+    return records
+
+
+def read_port_states() -> Optional[Dict[str, Dict[str, str]]]:
+    """Read the STP state of every bridge port from sysfs, without a process.
+
+    Returns:
+        Dictionary mapping bridge names to {port: state}, or None if
+        ``/sys/class/net`` is not available.
+    """
+    try:
+        names = sorted(os.listdir(SYSFS_NET))
+    except OSError:
+        return None
+
+    states: Dict[str, Dict[str, str]] = {}
+    for name in names:
+        brport = os.path.join(SYSFS_NET, name, "brport")
+        state = _read_sysfs(os.path.join(brport, "state"))
+        if state is None or not state.isdigit():
+            continue
+        try:
+            bridge = os.path.basename(os.readlink(os.path.join(brport, "bridge")))
+        except OSError:
+            continue
+        states.setdefault(bridge, {})[name] = STP_PORT_STATES.get(int(state), "unknown")
+    return states
+
+
+# Backend name -> reader, in the order "auto" tries them
+LINK_BACKENDS: Dict[str, Callable[[], Dict[str, LinkRecord]]] = {
+    "pyroute2": _read_links_pyroute2,
+    "ip": _read_links_ip,
+    "sysfs": _read_links_sysfs,
+}
+
+
+def read_links(backend: Optional[str] = None) -> Dict[str, LinkRecord]:
+    """Read every interface on the host in one pass.
+
+    Args:
+        backend: Backend name ('pyroute2', 'ip', 'sysfs' or 'auto'). Defaults to
+            the NETLINK_BACKEND environment variable.
+
+    Returns:
+        Dictionary mapping interface names to their LinkRecord. Empty if no
+        backend could read the interface table.
+    """
+    backend = backend or NETLINK_BACKEND
+    names = list(LINK_BACKENDS) if backend == "auto" else [backend]
+    for name in names:
+        try:
+            return LINK_BACKENDS[name]()
+        except Exception:
+            continue
+    return {}
+
+
+def is_up(record: LinkRecord) -> bool:
+    return "UP" in record.flags or record.operstate == "UP"
+
+
+def bridge_info_from_links(
+    bridge_name: str, links: Dict[str, LinkRecord]
+) -> BridgeInfo:
+    """Build a BridgeInfo from an already read interface table."""
+    record = links.get(bridge_name)
+    if record is None:
+        return BridgeInfo(name=bridge_name, exists=False, state="DOWN", interfaces=[])
+    return BridgeInfo(
+        name=bridge_name,
+        exists=True,
+        state="UP" if is_up(record) else "DOWN",
+        interfaces=sorted(
+            (link.name for link in links.values() if link.master == bridge_name),
+            key=lambda name: links[name].ifindex or 0,
+        ),
+    )
+
+
+def interface_settings_from_link(record: LinkRecord) -> InterfaceSettings:
+    """Build InterfaceSettings from a LinkRecord."""
+    return InterfaceSettings(
+        ips=record.ips,
+        mac=record.mac,
+        state="UP" if is_up(record) else "DOWN",
+    )
+
+
+def interface_stats_from_link(
+    interface: str, record: Optional[LinkRecord]
+) -> InterfaceStats:
+    """Build InterfaceStats from a LinkRecord, or a not-found entry if missing."""
+    if record is None:
+        return InterfaceStats(interface=interface, exists=False)
+    return InterfaceStats(
+        interface=interface,
+        exists=True,
+        rx_bytes=record.rx_bytes,
+        tx_bytes=record.tx_bytes,
+        rx_packets=record.rx_packets,
+        tx_packets=record.tx_packets,
+        rx_errors=record.rx_errors,
+        tx_errors=record.tx_errors,
+    )
@@ -0,0 +1,164 @@
+"""All-pairs forwarding path index over the STP active topology.
+
+A ``PathIndex`` is built once per topology snapshot. Construction runs one BFS
+per switch over the FORWARDING links, so every switch-to-switch path, with the
+egress and ingress veth of each hop already resolved, is stored up front.
+VM-to-VM and VM-to-switch paths are assembled from those on first use and
+memoized, so repeated queries are dictionary lookups.
+
+Switch nodes are named ``s<N>``: bridge ``br-sw3``, link endpoint ``sw3`` and
+``s3`` all refer to the same switch.
+"""
+
+import re
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from network.models import (
+    ActiveLink,
+    ForwardingPath,
+    PathHop,
+    VMBridgeConnection,
+)
+
+ROOT_SWITCH = "s1"
+
+
+def switch_id(name: str) -> str:
+    """Normalize a bridge or switch name ('br-sw3', 'sw3', 's3') to 's3'."""
+    if name.startswith("br-"):
+        name = name[3:]
+    match = re.fullmatch(r"sw(\d+)", name)
+    return f"s{match.group(1)}" if match else name
+
+
+class PathIndex:
+    """Precomputed shortest forwarding paths between switches and VMs."""
+
+    def __init__(
+        self,
+        active_links: List[ActiveLink],
+        vm_to_bridge: Dict[str, List[VMBridgeConnection]],
+        root: str = ROOT_SWITCH,
+    ):
+        self.root = switch_id(root)
+        self._edges: Dict[str, Dict[str, PathHop]] = {}
+        for link in active_links:
+            source = switch_id(link.source)
+            target = switch_id(link.target)
+            self._edges.setdefault(source, {})[target] = PathHop(
+                source=source,
+                target=target,
+                interface=link.interface,
+                peer_interface=link.reverse_interface,
+            )
+            self._edges.setdefault(target, {})[source] = PathHop(
+                source=target,
+                target=source,
+                interface=link.reverse_interface,
+                peer_interface=link.interface,
+            )
+
+        # First bridge connection of each VM decides its switch and access port
+        self._vm_ports: Dict[str, Tuple[str, Optional[str]]] = {}
+        for vm, connections in vm_to_bridge.items():
+            for connection in connections:
+                if connection.bridge:
+                    self._vm_ports[vm] = (
+                        switch_id(connection.bridge),
+                        connection.interface,
+                    )
+                    break
+
+        switches = set(self._edges)
+        switches.update(switch for switch, _ in self._vm_ports.values())
+        self._switch_paths: Dict[Tuple[str, str], Tuple[PathHop, ...]] = {}
+        for switch in switches:
+            self._index_from(switch)
+
+        self._paths: Dict[Tuple[str, str], Optional[ForwardingPath]] = {}
+
+    def _index_from(self, source: str) -> None:
+        self._switch_paths[(source, source)] = ()
+        queue = deque([source])
+        while queue:
+            current = queue.popleft()
+            hops = self._switch_paths[(source, current)]
+            for neighbor, hop in self._edges.get(current, {}).items():
+                if (source, neighbor) not in self._switch_paths:
+                    self._switch_paths[(source, neighbor)] = hops + (hop,)
+                    queue.append(neighbor)
+
+    @property
+    def switches(self) -> List[str]:
+        return sorted({source for source, _ in self._switch_paths})
+
+    @property
+    def vms(self) -> List[str]:
+        return sorted(self._vm_ports)
+
+    def switch_for_vm(self, vm: str) -> Optional[str]:
+        """Return the switch a VM is attached to, or None if unknown."""
+        port = self._vm_ports.get(vm)
+        return port[0] if port else None
+
+    def switch_path(self, source: str, target: str) -> Optional[List[PathHop]]:
+        """Return the hops between two switches, or None if unreachable."""
+        hops = self._switch_paths.get((switch_id(source), switch_id(target)))
+        return list(hops) if hops is not None else None
+
+    def path(self, source: str, target: str) -> Optional[ForwardingPath]:
+        """Return the forwarding path between two VMs and/or switches.
+
+        Args:
+            source: VM name (e.g., 'host1') or switch ('s1', 'sw1', 'br-sw1').
+            target: VM name or switch.
+
+        Returns:
+            ForwardingPath with the switches traversed, each hop's egress and
+            ingress veth, and every interface on the path in order (VM access
+            ports included). None if either end is unknown or unreachable.
+        """
+        key = (source, target)
+        if key not in self._paths:
+            self._paths[key] = self._build_path(source, target)
+        return self._paths[key]
+
+    def path_from_root(self, vm: str) -> List[str]:
+        """Return the switches from the root switch to a VM's switch."""
+        path = self.path(self.root, vm)
+        return path.switches if path else []
+
+    def _endpoint(self, name: str) -> Tuple[Optional[str], Optional[str]]:
+        if name in self._vm_ports:
+            return self._vm_ports[name]
+        switch = switch_id(name)
+        if (switch, switch) in self._switch_paths:
+            return switch, None
+        return None, None
+
+    def _build_path(self, source: str, target: str) -> Optional[ForwardingPath]:
+        source_switch, source_port = self._endpoint(source)
+        target_switch, target_port = self._endpoint(target)
+        if source_switch is None or target_switch is None:
+            return None
+
+        hops = self._switch_paths.get((source_switch, target_switch))
+        if hops is None:
+            return None
+
+        interfaces: List[str] = []
+        if source_port:
+            interfaces.append(source_port)
+        for hop in hops:
+            interfaces.extend([hop.interface, hop.peer_interface])
+        if target_port:
+            interfaces.append(target_port)
+
+        return ForwardingPath(
+            source=source,
+            target=target,
+            switches=[source_switch] + [hop.target for hop in hops],
+            hops=list(hops),
+            interfaces=interfaces,
+        )
@@ -0,0 +1,321 @@
+"""Throughput and latency measurement across the bridged lab.
+
+A probe endpoint is a network namespace (``probe-s2``) plugged into a bridge
+through a veth port (``prb-s2``) and given an address from ``PROBE_SUBNET``.
+``measure_path`` removes its endpoints when it is done, so the extra bridge
+ports don't cause STP topology changes or show up in discovery. With
+``keep=True`` they stay, and later probes don't wait again for STP to move a
+new port to forwarding; ``remove_probe_endpoints`` deletes them.
+
+``measure_path`` resolves the forwarding path between two VMs or switches,
+attaches endpoints to the switches at both ends and runs ``network.probe_peer``
+in each namespace: the target side receives a TCP stream and echoes UDP
+probes, the source side sends them. Throughput is measured by the receiver,
+RTT and loss from the UDP echoes on an otherwise idle path.
+
+The probe traffic crosses the same bridges and veth pairs as VM traffic, so TC
+on any switch-to-switch hop shows up in the result. The VMs' own vnet ports are
+not on the probe path.
+
+Tunables: ``PROBE_SUBNET`` (default ``10.254.254.0/24``) and ``PROBE_DURATION``
+(seconds of TCP streaming, default 3).
+"""
+
+import ipaddress
+import json
+import os
+import select
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from network.discovery import get_inventory
+from network.infrastructure import calculate_path_between
+from network.models import LatencyStats, ProbeEndpoint, ProbeResult
+from network.paths import switch_id
+from network.probe_peer import DEFAULT_COUNT, PROBE_INTERVAL, PROBE_TIMEOUT
+from network.stats import summarize_series
+
+PROBE_SUBNET = os.environ.get("PROBE_SUBNET", "10.254.254.0/24")
+PROBE_DURATION = float(os.environ.get("PROBE_DURATION", "3"))
+
+# As root the commands run directly (no sudo needed, environment kept)
+SUDO = [] if os.geteuid() == 0 else ["sudo", "-n"]
+IP_COMMAND = SUDO + ["ip"]
+NETNS_DIR = "/run/netns"
+NAMESPACE_PREFIX = "probe-"
+PORT_PREFIX = "prb-"
+# Interface name of the endpoint inside its namespace
+NAMESPACE_PORT = "probe0"
+# How long the receiver may take to report that it is listening
+READY_TIMEOUT = 10.0
+
+# network.probe_peer is run from the directory that contains the package
+_PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_endpoint_lock = threading.Lock()
+
+
+def _ip(args: str) -> str:
+    """Run ``ip`` with space-separated arguments (names never contain spaces)."""
+    result = subprocess.run(
+        IP_COMMAND + args.split(), capture_output=True, text=True, timeout=10
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ip {args} failed: {result.stderr.strip()}")
+    return result.stdout
+
+
+def _probe_namespaces() -> List[str]:
+    try:
+        names = os.listdir(NETNS_DIR)
+    except OSError:
+        return []
+    return sorted(name for name in names if name.startswith(NAMESPACE_PREFIX))
+
+
+def _endpoint_address(namespace: str) -> Optional[str]:
+    try:
+        output = _ip(f"-n {namespace} -j addr show dev {NAMESPACE_PORT}")
+    except RuntimeError:
+        return None
+    for entry in json.loads(output or "[]"):
+        for addr in entry.get("addr_info", []):
+            if addr.get("family") == "inet":
+                return addr.get("local")
+    return None
+
+
+def _wait_forwarding(port: str, bridge: str) -> None:
+    """Wait until STP lets the new port forward (2 x forward delay)."""
+    try:
+        with open(f"/sys/class/net/{bridge}/bridge/forward_delay") as f:
+            forward_delay = int(f.read()) / 100.0
+    except (OSError, ValueError):
+        forward_delay = 15.0
+    deadline = time.monotonic() + 2 * forward_delay + 2
+    while True:
+        try:
+            with open(f"/sys/class/net/{port}/brport/state") as f:
+                if f.read().strip() == "3":
+                    return
+        except OSError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"probe port {port} did not reach forwarding")
+        time.sleep(0.2)
+
+
+def probe_endpoint(bridge: str) -> ProbeEndpoint:
+    """Return the probe endpoint attached to ``bridge``, creating it if needed."""
+    name = switch_id(bridge)
+    namespace = NAMESPACE_PREFIX + name
+    port = (PORT_PREFIX + name)[:15]
+
+    with _endpoint_lock:
+        address = None
+        if namespace in _probe_namespaces() and os.path.exists(
+            f"/sys/class/net/{port}"
+        ):
+            address = _endpoint_address(namespace)
+
+        if address is None:
+            network = ipaddress.ip_network(PROBE_SUBNET)
+            used = {_endpoint_address(ns) for ns in _probe_namespaces()}
+            address = next(str(h) for h in network.hosts() if str(h) not in used)
+
+            # Leftovers of a half-created endpoint
+            if namespace in _probe_namespaces():
+                _ip(f"netns del {namespace}")
+            if os.path.exists(f"/sys/class/net/{port}"):
+                _ip(f"link del {port}")
+
+            _ip(f"netns add {namespace}")
+            try:
+                _ip(
+                    f"link add {port} type veth "
+                    f"peer name {NAMESPACE_PORT} netns {namespace}"
+                )
+                _ip(
+                    f"-n {namespace} addr add {address}/{network.prefixlen} "
+                    f"dev {NAMESPACE_PORT}"
+                )
+                _ip(f"-n {namespace} link set {NAMESPACE_PORT} up")
+                _ip(f"-n {namespace} link set lo up")
+                _ip(f"link set {port} master {bridge} up")
+            except RuntimeError:
+                _ip(f"netns del {namespace}")
+                raise
+
+    _wait_forwarding(port, bridge)
+    return ProbeEndpoint(bridge=bridge, namespace=namespace, port=port, address=address)
+
+
+def remove_probe_endpoint(endpoint: ProbeEndpoint) -> None:
+    """Delete one probe endpoint: its bridge port, then its namespace."""
+    with _endpoint_lock:
+        # Deleting the namespace alone removes the port only once the kernel
+        # gets round to cleaning it up
+        if os.path.exists(f"/sys/class/net/{endpoint.port}"):
+            _ip(f"link del {endpoint.port}")
+        if endpoint.namespace in _probe_namespaces():
+            _ip(f"netns del {endpoint.namespace}")
+
+
+def remove_probe_endpoints() -> List[str]:
+    """Delete every probe namespace (and with it, its bridge port)."""
+    with _endpoint_lock:
+        namespaces = _probe_namespaces()
+        for namespace in namespaces:
+            _ip(f"netns del {namespace}")
+    return namespaces
+
+
+def _format_bps(bits_per_second: float) -> str:
+    for scale, unit in ((1e9, "Gbit"), (1e6, "Mbit"), (1e3, "Kbit")):
+        if bits_per_second >= scale:
+            return f"{bits_per_second / scale:.3g}{unit}"
+    return f"{bits_per_second:.0f}bit"
+
+
+def _peer_command(endpoint: ProbeEndpoint, mode: str, *args: str) -> List[str]:
+    return IP_COMMAND + [
+        "netns",
+        "exec",
+        endpoint.namespace,
+        sys.executable,
+        "-m",
+        "network.probe_peer",
+        mode,
+        *args,
+    ]
+
+
+def _last_json(output: str) -> Dict:
+    lines = [line for line in output.splitlines() if line.startswith("{")]
+    return json.loads(lines[-1]) if lines else {}
+
+
+def _wait_ready(server: subprocess.Popen, timeout: float) -> bool:
+    """Wait for the receiver's ``ready`` line, at most ``timeout`` seconds."""
+    ready, _, _ = select.select([server.stdout], [], [], timeout)
+    return bool(ready) and server.stdout.readline().strip() == "ready"
+
+
+def run_probe(
+    source: ProbeEndpoint,
+    target: ProbeEndpoint,
+    duration: float = PROBE_DURATION,
+    count: int = DEFAULT_COUNT,
+) -> ProbeResult:
+    """Measure throughput, RTT and loss from one endpoint to another."""
+    result = ProbeResult(source=source.bridge, target=target.bridge)
+    timeout = duration + count * (PROBE_INTERVAL + PROBE_TIMEOUT) + 30
+    server = subprocess.Popen(
+        _peer_command(target, "serve", target.address, "--duration", str(duration)),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        cwd=_PROJECT_DIR,
+    )
+    try:
+        if not _wait_ready(server, READY_TIMEOUT):
+            server.kill()
+            _, stderr = server.communicate()
+            result.error = f"receiver failed to start: {stderr.strip()}"
+            return result
+        sender = subprocess.run(
+            _peer_command(
+                source,
+                "send",
+                target.address,
+                "--duration",
+                str(duration),
+                "--count",
+                str(count),
+            ),
+            capture_output=True,
+            text=True,
+            cwd=_PROJECT_DIR,
+            timeout=timeout,
+        )
+        stdout, _ = server.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        result.error = "probe timed out"
+        return result
+    finally:
+        if server.poll() is None:
+            server.kill()
+            server.wait()
+
+    received, sent = _last_json(stdout), _last_json(sender.stdout)
+    if not received or not sent:
+        result.error = (sender.stderr or "probe produced no result").strip()
+        return result
+
+    rtts = np.array(sent["rtt_ms"], dtype=np.float64)
+    result.duration_seconds = received["seconds"]
+    result.bytes_received = received["bytes"]
+    if received["seconds"] > 0:
+        result.throughput_bps = received["bytes"] * 8 / received["seconds"]
+        result.throughput = _format_bps(result.throughput_bps)
+    result.rtt_ms = LatencyStats(**summarize_series(rtts))
+    result.probes_sent = sent["probes"]
+    result.probes_received = int(rtts.size)
+    if sent["probes"]:
+        result.loss_percent = round(100.0 * (1 - rtts.size / sent["probes"]), 2)
+    return result
+
+
+def measure_path(
+    source: str, target: str, duration: float = PROBE_DURATION, keep: bool = False
+) -> ProbeResult:
+    """Measure the forwarding path between two VMs or switches.
+
+    Probe endpoints are attached to the first and last switch of the active
+    path, so the measured traffic crosses every switch-to-switch hop on it.
+    They are removed afterwards unless ``keep`` is set.
+    """
+    path = calculate_path_between(source, target)
+    if path is None:
+        return ProbeResult(
+            source=source,
+            target=target,
+            error=f"No active forwarding path between {source} and {target}",
+        )
+    result = ProbeResult(source=source, target=target, switches=path.switches)
+    if len(path.switches) < 2:
+        result.error = "Both ends are on the same switch; no hop to measure"
+        return result
+
+    bridges = {switch_id(bridge): bridge for bridge in get_inventory().bridges}
+    endpoints: List[ProbeEndpoint] = []
+    teardown_errors: List[str] = []
+    try:
+        try:
+            for switch in (path.switches[0], path.switches[-1]):
+                endpoints.append(probe_endpoint(bridges[switch]))
+        except (KeyError, RuntimeError) as e:
+            result.error = f"Could not set up probe endpoints: {e}"
+        else:
+            measured = run_probe(*endpoints, duration=duration)
+            result = measured.model_copy(
+                update={"source": source, "target": target, "switches": path.switches}
+            )
+    finally:
+        if not keep:
+            for endpoint in endpoints:
+                try:
+                    remove_probe_endpoint(endpoint)
+                except RuntimeError as e:
+                    teardown_errors.append(str(e))
+
+    if teardown_errors:
+        # The measurement is still valid; report the leftover endpoints with it
+        message = f"Could not remove probe endpoints: {'; '.join(teardown_errors)}"
+        result.error = f"{result.error}; {message}" if result.error else message
+    return result
@@ -0,0 +1,162 @@
+"""Minimal iperf-like sender and receiver used by ``network.probe``.
+
+Runs inside a probe namespace as ``python -m network.probe_peer``:
+
+- ``serve ADDRESS`` accepts one TCP stream and counts the bytes that arrive
+  during the test window, and echoes UDP probes until the sender says
+  ``done``. It prints ``ready`` once listening and a JSON result at the end.
+- ``send ADDRESS`` streams TCP to the server for ``--duration`` seconds, then
+  sends ``--count`` numbered UDP probes one at a time and times their echoes.
+  It prints a JSON result.
+
+Only the standard library is used, so starting a peer stays cheap.
+"""
+
+import argparse
+import json
+import socket
+import struct
+import threading
+import time
+from typing import List, Optional
+
+DEFAULT_PORT = 5201
+DEFAULT_DURATION = 3.0
+DEFAULT_COUNT = 20
+PROBE_INTERVAL = 0.05
+PROBE_TIMEOUT = 1.0
+
+_CHUNK = 64 * 1024
+# A small send buffer keeps the sender from queueing seconds of data behind a
+# slow TC limit, which would otherwise keep arriving after the window ends
+_SEND_BUFFER = 128 * 1024
+
+
+def serve(address: str, port: int, duration: float) -> dict:
+    """Receive one TCP stream and echo UDP probes.
+
+    Returns:
+        {"bytes": bytes received within the window, "seconds": window length}
+    """
+    tcp = socket.create_server((address, port))
+    udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    udp.bind((address, port))
+    print("ready", flush=True)
+
+    done = threading.Event()
+
+    def echo() -> None:
+        udp.settimeout(0.2)
+        while not done.is_set():
+            try:
+                data, peer = udp.recvfrom(64)
+            except socket.timeout:
+                continue
+            if data == b"done":
+                done.set()
+            else:
+                udp.sendto(data, peer)
+
+    threading.Thread(target=echo, daemon=True).start()
+
+    received, window = 0, 0.0
+    tcp.settimeout(duration + 10)
+    try:
+        conn, _ = tcp.accept()
+        with conn:
+            conn.settimeout(duration + 5)
+            first: Optional[float] = None
+            while True:
+                try:
+                    data = conn.recv(_CHUNK)
+                except OSError:
+                    break
+                now = time.monotonic()
+                if not data:
+                    break
+                if first is None:
+                    first = now
+                if now - first > duration:
+                    break
+                received += len(data)
+                window = now - first
+    except socket.timeout:
+        pass
+
+    done.wait(DEFAULT_COUNT * (PROBE_INTERVAL + PROBE_TIMEOUT) + 5)
+    done.set()
+    return {"bytes": received, "seconds": window}
+
+
+def send(address: str, port: int, duration: float, count: int) -> dict:
+    """Stream TCP for ``duration`` seconds, then time ``count`` UDP probes.
+
+    Returns:
+        {"sent": TCP bytes sent, "probes": count, "rtt_ms": echo round trips}
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, _SEND_BUFFER)
+    sock.settimeout(PROBE_TIMEOUT * 5)
+    sock.connect((address, port))
+    sock.settimeout(0.5)
+
+    payload = bytes(_CHUNK)
+    sent = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        try:
+            sent += sock.send(payload)
+        except socket.timeout:
+            continue
+        except OSError:
+            break
+    # Drop whatever is still queued instead of draining it through the limit
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+    sock.close()
+
+    udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    udp.connect((address, port))
+    udp.settimeout(PROBE_TIMEOUT)
+    rtts: List[float] = []
+    for seq in range(count):
+        started = time.monotonic()
+        try:
+            udp.send(seq.to_bytes(4, "big"))
+            while True:
+                data = udp.recv(64)
+                if int.from_bytes(data[:4], "big") == seq:
+                    rtts.append((time.monotonic() - started) * 1000.0)
+                    break
+        except OSError:
+            pass
+        time.sleep(PROBE_INTERVAL)
+    for _ in range(3):
+        try:
+            udp.send(b"done")
+        except OSError:
+            pass
+    udp.close()
+    return {"sent": sent, "probes": count, "rtt_ms": rtts}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m network.probe_peer")
+    modes = parser.add_subparsers(dest="mode", required=True)
+    for mode in ("serve", "send"):
+        sub = modes.add_parser(mode)
+        sub.add_argument("address")
+        sub.add_argument("--port", type=int, default=DEFAULT_PORT)
+        sub.add_argument("--duration", type=float, default=DEFAULT_DURATION)
+        if mode == "send":
+            sub.add_argument("--count", type=int, default=DEFAULT_COUNT)
+    args = parser.parse_args(argv)
+
+    if args.mode == "serve":
+        result = serve(args.address, args.port, args.duration)
+    else:
+        result = send(args.address, args.port, args.duration, args.count)
+    print(json.dumps(result), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Field selection and size caps for tool outputs.
+
+Tool results are turned into plain JSON data (``None`` fields dropped), then:
+
+1. ``select`` keeps only the parts named by dotted field paths. A path step
+   names a dict key or ``*`` for every key; lists are stepped through, so
+   ``topology.active_links.bridge`` keeps the bridge of every active link.
+2. ``cap`` keeps at most ``max_items`` entries of every list and mapping (a
+   ``Dict`` field or result, not a model's own fields) and appends a marker
+   saying how many were left out (``"... 12 more"`` in lists, an ``"_omitted"``
+   key in mappings).
+3. ``shape_output`` halves ``max_items`` until the JSON fits in ``max_tokens``.
+
+Tunables: ``TOOL_OUTPUT_MAX_ITEMS`` (default 50) and ``TOOL_OUTPUT_MAX_TOKENS``
+(default 2000).
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+from pydantic import BaseModel
+
+from network.encoding import estimate_tokens
+
+TOOL_OUTPUT_MAX_ITEMS = int(os.environ.get("TOOL_OUTPUT_MAX_ITEMS", "50"))
+TOOL_OUTPUT_MAX_TOKENS = int(os.environ.get("TOOL_OUTPUT_MAX_TOKENS", "2000"))
+
+OMITTED_KEY = "_omitted"
+UNKNOWN_FIELDS_KEY = "_unknown_fields"
+
+_MISSING = object()
+
+# Path trie: {step: subtrie}; an empty trie selects everything below it
+Trie = Dict[str, "Trie"]
+
+
+class Map(dict):
+    """A ``Dict`` from the data (e.g. interface -> settings), not a record."""
+
+
+def to_data(value: Any) -> Any:
+    """Plain JSON data for a tool result, without ``None`` fields."""
+    if isinstance(value, BaseModel):
+        fields = {name: getattr(value, name) for name in type(value).model_fields}
+        return {
+            name: to_data(item) for name, item in fields.items() if item is not None
+        }
+    if isinstance(value, dict):
+        return Map((key, to_data(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return [to_data(item) for item in value]
+    return value
+
+
+def _trie(paths: Iterable[str]) -> Trie:
+    root: Trie = {}
+    for path in paths:
+        node = root
+        for step in path.split("."):
+            node = node.setdefault(step, {})
+        # A path that ends here selects everything below, even if a longer
+        # path through it was given too
+        node.clear()
+        node["*"] = {}
+    return root
+
+
+def _everything(trie: Trie) -> bool:
+    return not trie or trie == {"*": {}}
+
+
+def _union(a: Optional[Trie], b: Optional[Trie]) -> Optional[Trie]:
+    if a is None or b is None:
+        return a if b is None else b
+    if _everything(a) or _everything(b):
+        return {}
+    merged = dict(a)
+    for key, subtrie in b.items():
+        merged[key] = _union(merged.get(key), subtrie)
+    return merged
+
+
+def _select(data: Any, trie: Trie) -> Any:
+    if _everything(trie):
+        return data
+    if isinstance(data, list):
+        items = [_select(item, trie) for item in data]
+        selected = [item for item in items if item is not _MISSING]
+        return selected if selected or not data else _MISSING
+    if isinstance(data, dict):
+        result = type(data)()
+        for key, value in data.items():
+            subtrie = _union(trie.get(str(key)), trie.get("*"))
+            if subtrie is None:
+                continue
+            selected = _select(value, subtrie)
+            if selected is not _MISSING:
+                result[key] = selected
+        return result if result else _MISSING
+    # Path goes deeper than the data
+    return _MISSING
+
+
+def select(data: Any, fields: Iterable[str]) -> Any:
+    """Keep the parts of ``data`` named by ``fields``.
+
+    Paths that match nothing are listed under ``_unknown_fields`` when ``data``
+    is a dict, so the caller can correct them.
+    """
+    fields = [field for field in fields if field]
+    if not fields:
+        return data
+    selected = _select(data, _trie(fields))
+    unknown = [f for f in fields if _select(data, _trie([f])) is _MISSING]
+    if selected is _MISSING:
+        selected = {} if isinstance(data, dict) else []
+    if unknown and isinstance(selected, dict):
+        selected[UNKNOWN_FIELDS_KEY] = unknown
+    return selected
+
+
+def cap(data: Any, max_items: int) -> Any:
+    """Keep at most ``max_items`` entries of every list and mapping."""
+    if isinstance(data, list):
+        kept = [cap(item, max_items) for item in data[:max_items]]
+        if len(data) > max_items:
+            kept.append(f"... {len(data) - max_items} more")
+        return kept
+    if isinstance(data, Map):
+        keys = list(data)
+        kept = Map((key, cap(data[key], max_items)) for key in keys[:max_items])
+        if len(keys) > max_items:
+            kept[OMITTED_KEY] = f"{len(keys) - max_items} more entries"
+        return kept
+    if isinstance(data, dict):
+        return {key: cap(value, max_items) for key, value in data.items()}
+    return data
+
+
+def shape_output(
+    value: Any,
+    fields: Optional[List[str]] = None,
+    max_items: int = TOOL_OUTPUT_MAX_ITEMS,
+    max_tokens: int = TOOL_OUTPUT_MAX_TOKENS,
+) -> Any:
+    """Select ``fields`` of a tool result and cap it to the size limits.
+
+    Args:
+        value: Tool result (pydantic models, dicts and lists of them).
+        fields: Dotted field paths to keep; None or empty keeps everything.
+        max_items: Entries kept per list or dict.
+        max_tokens: Approximate budget for the JSON output; ``max_items`` is
+            halved until it fits (down to one entry per collection).
+    """
+    data = select(to_data(value), fields or [])
+    items = max(1, max_items)
+    while True:
+        capped = cap(data, items)
+        if items == 1 or estimate_tokens(json.dumps(capped)) <= max_tokens:
+            return capped
+        items //= 2
@@ -0,0 +1,225 @@
+"""Background interface-counter sampler.
+
+A daemon thread reads the counters of every bridge, veth pair and vnet
+interface at a fixed interval (one ``read_links()`` pass per tick) and appends
+them to a fixed-size NumPy ring buffer per interface. Ticks never fork: the
+sampler reads through pyroute2 when it is installed and from
+``/sys/class/net/*/statistics`` otherwise, whatever ``NETLINK_BACKEND`` says
+(unless it pins one of those two). Throughput, packet and
+error rates over a time window are computed from the buffers, so queries never
+touch the kernel or fork a process.
+
+Tunables: ``INTERFACE_SAMPLER_INTERVAL`` (seconds, default 1) and
+``INTERFACE_SAMPLER_CAPACITY`` (samples kept per interface, default 600).
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from network.discovery import discover_bridges, discover_veths
+from network.models import InterfaceRates, LinkRecord, RateStats
+from network.netlink import NETLINK_BACKEND, IPRoute, read_links
+from network.stats import summarize_series
+
+INTERFACE_SAMPLER_INTERVAL = float(os.environ.get("INTERFACE_SAMPLER_INTERVAL", "1"))
+INTERFACE_SAMPLER_CAPACITY = int(os.environ.get("INTERFACE_SAMPLER_CAPACITY", "600"))
+
+# Backends that read counters without starting a process
+if NETLINK_BACKEND in ("pyroute2", "sysfs"):
+    SAMPLER_BACKEND = NETLINK_BACKEND
+else:
+    SAMPLER_BACKEND = "pyroute2" if IPRoute is not None else "sysfs"
+
+COUNTERS = (
+    "rx_bytes",
+    "tx_bytes",
+    "rx_packets",
+    "tx_packets",
+    "rx_errors",
+    "tx_errors",
+    "rx_dropped",
+    "tx_dropped",
+)
+
+# InterfaceRates field -> (counter column, multiplier)
+_RATE_FIELDS = {
+    "rx_bps": (0, 8.0),
+    "tx_bps": (1, 8.0),
+    "rx_pps": (2, 1.0),
+    "tx_pps": (3, 1.0),
+    "rx_errors_per_sec": (4, 1.0),
+    "tx_errors_per_sec": (5, 1.0),
+    "rx_dropped_per_sec": (6, 1.0),
+    "tx_dropped_per_sec": (7, 1.0),
+}
+
+
+class CounterRing:
+    """Fixed-size ring buffer of timestamped counter samples."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.values = np.zeros((capacity, len(COUNTERS)), dtype=np.float64)
+        self.head = 0
+        self.size = 0
+
+    def append(self, timestamp: float, counters: Iterable[float]) -> None:
+        self.timestamps[self.head] = timestamp
+        self.values[self.head] = counters
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def ordered(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (timestamps, values) oldest first."""
+        if self.size < self.capacity:
+            return self.timestamps[: self.size], self.values[: self.size]
+        order = np.roll(np.arange(self.capacity), -self.head)
+        return self.timestamps[order], self.values[order]
+
+
+def _default_interfaces(links: Dict[str, LinkRecord]) -> List[str]:
+    # Discovered from the same table, so new bridges and veths are picked up
+    wanted = set(discover_bridges(links)) | set(discover_veths(links))
+    return [name for name in links if name in wanted or name.startswith("vnet")]
+
+
+class CounterSampler:
+    """Polls interface counters in the background into per-interface rings."""
+
+    def __init__(
+        self,
+        interval: float = INTERFACE_SAMPLER_INTERVAL,
+        capacity: int = INTERFACE_SAMPLER_CAPACITY,
+        select_interfaces: Callable[
+            [Dict[str, LinkRecord]], Iterable[str]
+        ] = _default_interfaces,
+    ):
+        self.interval = interval
+        self.capacity = capacity
+        self.select_interfaces = select_interfaces
+        self._rings: Dict[str, CounterRing] = {}
+        self._lock = threading.Lock()
+        self._sampled = threading.Condition(self._lock)
+        self._samples_taken = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the sampling thread if it is not already running."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="interface-counter-sampler", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval * 2)
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.sample_once()
+            except Exception:
+                pass
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def sample_once(self) -> None:
+        """Read all counters once and append them to the ring buffers."""
+        links = read_links(SAMPLER_BACKEND)
+        if not links:
+            # A failed read, not interfaces that all went away: keep the rings
+            # and don't count the tick as a sample
+            return
+        timestamp = time.monotonic()
+        names = list(self.select_interfaces(links))
+        with self._lock:
+            for name in names:
+                record = links[name]
+                ring = self._rings.get(name)
+                if ring is None:
+                    ring = self._rings[name] = CounterRing(self.capacity)
+                ring.append(timestamp, [getattr(record, c) for c in COUNTERS])
+            for name in set(self._rings) - set(names):
+                del self._rings[name]
+            self._samples_taken += 1
+            self._sampled.notify_all()
+
+    def wait_for_samples(self, count: int = 2, timeout: Optional[float] = None) -> bool:
+        """Block until the sampler has taken at least ``count`` samples."""
+        timeout = self.interval * (count + 1) if timeout is None else timeout
+        with self._sampled:
+            return self._sampled.wait_for(
+                lambda: self._samples_taken >= count, timeout=timeout
+            )
+
+    @property
+    def interfaces(self) -> List[str]:
+        with self._lock:
+            return sorted(self._rings)
+
+    def rates(self, interface: str, window_seconds: float = 60.0) -> InterfaceRates:
+        """Compute per-second rates for an interface over the recent window.
+
+        Rates are taken between consecutive samples; counter resets (negative
+        deltas) count as zero.
+        """
+        with self._lock:
+            ring = self._rings.get(interface)
+            if ring is None:
+                return InterfaceRates(interface=interface, exists=False)
+            timestamps, values = ring.ordered()
+            timestamps, values = timestamps.copy(), values.copy()
+
+        in_window = timestamps >= timestamps[-1] - window_seconds
+        timestamps, values = timestamps[in_window], values[in_window]
+        if timestamps.size < 2:
+            return InterfaceRates(
+                interface=interface, exists=True, samples=int(timestamps.size)
+            )
+
+        elapsed = np.diff(timestamps)
+        deltas = np.clip(np.diff(values, axis=0), 0, None)
+        per_second = deltas / elapsed[:, None]
+
+        return InterfaceRates(
+            interface=interface,
+            exists=True,
+            samples=int(timestamps.size),
+            window_seconds=float(timestamps[-1] - timestamps[0]),
+            **{
+                field: RateStats(**summarize_series(per_second[:, column] * multiplier))
+                for field, (column, multiplier) in _RATE_FIELDS.items()
+            },
+        )
+
+    def all_rates(self, window_seconds: float = 60.0) -> Dict[str, InterfaceRates]:
+        return {name: self.rates(name, window_seconds) for name in self.interfaces}
+
+
+_sampler: Optional[CounterSampler] = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler() -> CounterSampler:
+    """Return the shared sampler, starting it on first use."""
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = CounterSampler()
+        _sampler.start()
+        return _sampler
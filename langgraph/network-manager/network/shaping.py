@@ -0,0 +1,306 @@
+"""Transactional traffic control changes.
+
+``apply_tc_batch`` shapes several interfaces with one ``tc -batch`` process
+instead of one or two ``tc`` calls per interface:
+
+1. The qdiscs of every target interface are snapshotted from a single fresh
+   ``tc -json qdisc show`` read.
+2. All changes are written as one batch (``qdisc replace ... root tbf`` to
+   limit, ``qdisc del ... root`` to remove) and run together. tc stops at the
+   first failing line, leaving the earlier lines applied.
+3. If the batch fails, one ``tc -force -batch`` puts every target interface
+   back to its snapshot, and the qdiscs are read again to confirm it.
+
+Kernel default qdiscs (handle ``0:``) are restored by deleting the root qdisc;
+TBF and netem qdiscs are re-added with their rate, burst, latency, delay,
+jitter and loss. Only the root egress tree is snapshotted: ingress and clsact
+qdiscs are untouched by ``qdisc del ... root`` and are left as they are.
+Batches touching interfaces with any other root qdisc (e.g. HTB with classes)
+are refused before anything runs, and the result says which one.
+
+``shape_path`` resolves the STP forwarding path between two endpoints and
+applies one action to every interface on it as a single batch.
+"""
+
+import re
+import subprocess
+from typing import Dict, Iterable, List, Literal, Tuple
+
+from network.cache import topology_cache
+from network.infrastructure import calculate_path_between
+from network.models import (
+    ForwardingPath,
+    PathShapingResult,
+    QdiscInfo,
+    ShapingSpec,
+    TCBatchResult,
+)
+from network.tc import collect_qdiscs
+
+TC_COMMAND = ["sudo", "-n", "tc"]
+BATCH_TIMEOUT = 30
+
+# Interface names and tc arguments end up on batch lines; no spaces or newlines
+_TOKEN = re.compile(r"[\w.:@%-]+")
+
+
+# Ingress-side qdiscs: ``tc qdisc del ... root`` leaves them alone, so batches
+# neither snapshot nor restore them
+_INGRESS_KINDS = ("ingress", "clsact")
+_INGRESS_PARENTS = ("ffff:", "ffff:fff1")
+
+
+def _configured(qdiscs: Iterable[QdiscInfo]) -> List[QdiscInfo]:
+    """User-created qdiscs of the root egress tree, root first.
+
+    Kernel defaults (handle 0:) and ingress/clsact qdiscs are left out.
+    """
+    configured = [
+        q
+        for q in qdiscs
+        if q.handle not in (None, "0:")
+        and q.kind not in _INGRESS_KINDS
+        and q.parent not in _INGRESS_PARENTS
+    ]
+    return sorted(configured, key=lambda q: not q.root)
+
+
+def _rounded(value, unit=1.0):
+    # The kernel stores burst and latency in scheduler ticks, so they come back
+    # slightly different from what was set
+    return None if value is None else round(value / unit)
+
+
+def shaping_signature(qdisc: QdiscInfo) -> tuple:
+    """What a qdisc does to traffic, independent of its handle and placement.
+
+    Re-adding the same limit gives the qdisc a new kernel-assigned handle and
+    may round its burst differently; neither shows up here.
+    """
+    return (
+        qdisc.kind,
+        qdisc.rate_bps,
+        _rounded(qdisc.delay_ms),
+        _rounded(qdisc.jitter_ms),
+        qdisc.loss_percent,
+    )
+
+
+def _signature(qdisc: QdiscInfo) -> tuple:
+    return (
+        qdisc.handle,
+        qdisc.root,
+        qdisc.parent,
+        *shaping_signature(qdisc),
+        _rounded(qdisc.burst_bytes, 1024),
+        _rounded(qdisc.latency_ms),
+    )
+
+
+def _check_tokens(spec: ShapingSpec) -> None:
+    for value in (spec.interface, spec.rate, spec.burst, spec.latency):
+        if not _TOKEN.fullmatch(value):
+            raise ValueError(f"invalid tc argument {value!r}")
+
+
+def restore_commands(interface: str, qdiscs: Iterable[QdiscInfo]) -> List[str]:
+    """Batch lines that re-create ``qdiscs`` once the root qdisc was deleted.
+
+    Raises:
+        ValueError: If a configured qdisc can't be re-created from its fields.
+    """
+    lines = []
+    for qdisc in _configured(qdiscs):
+        where = "root" if qdisc.root else f"parent {qdisc.parent}"
+        line = f"qdisc add dev {interface} {where} handle {qdisc.handle} {qdisc.kind}"
+        if (
+            qdisc.kind == "tbf"
+            and qdisc.rate_bps is not None
+            and qdisc.burst_bytes is not None
+        ):
+            line += f" rate {qdisc.rate_bps}bit burst {qdisc.burst_bytes}b"
+            line += f" latency {qdisc.latency_ms or 50:g}ms"
+        elif qdisc.kind == "netem":
+            if qdisc.delay_ms is not None:
+                line += f" delay {qdisc.delay_ms:g}ms"
+                if qdisc.jitter_ms:
+                    line += f" {qdisc.jitter_ms:g}ms"
+            if qdisc.loss_percent is not None:
+                line += f" loss {qdisc.loss_percent:g}%"
+            if qdisc.rate_bps is not None:
+                line += f" rate {qdisc.rate_bps}bit"
+        else:
+            raise ValueError(
+                f"{interface} has a {qdisc.kind} qdisc on its root, which can't "
+                "be restored if the batch fails; only tbf and netem can. Change "
+                "or remove it with tc first"
+            )
+        lines.append(line)
+    return lines
+
+
+def change_commands(spec: ShapingSpec, qdiscs: Iterable[QdiscInfo]) -> List[str]:
+    """Batch lines that apply one spec to an interface with ``qdiscs``."""
+    if spec.action == "limit":
+        return [
+            f"qdisc replace dev {spec.interface} root tbf rate {spec.rate} "
+            f"burst {spec.burst} latency {spec.latency}"
+        ]
+    # Deleting a kernel default qdisc is an error that would abort the batch
+    return [f"qdisc del dev {spec.interface} root"] if _configured(qdiscs) else []
+
+
+def run_tc_batch(lines: List[str], force: bool = False) -> Tuple[int, str]:
+    """Run batch lines through one tc process.
+
+    Returns:
+        (returncode, error output). A missing or hung tc counts as a failure.
+    """
+    cmd = TC_COMMAND + (["-force"] if force else []) + ["-batch", "-"]
+    try:
+        result = subprocess.run(
+            cmd,
+            input="\n".join(lines) + "\n",
+            capture_output=True,
+            text=True,
+            timeout=BATCH_TIMEOUT,
+        )
+    except Exception as e:
+        return -1, str(e)
+    return result.returncode, (result.stderr or result.stdout).strip()
+
+
+def _invalidate(interfaces: Iterable[str]) -> None:
+    topology_cache.invalidate(*(f"tc:{interface}" for interface in interfaces))
+
+
+def _rollback(interfaces: List[str], snapshot: Dict[str, List[QdiscInfo]]) -> bool:
+    """Restore interfaces to ``snapshot`` and report whether that succeeded."""
+    lines = []
+    for interface in interfaces:
+        lines.append(f"qdisc del dev {interface} root")
+        lines.extend(restore_commands(interface, snapshot[interface]))
+    try:
+        # -force keeps going past deletes of qdiscs the batch never created
+        run_tc_batch(lines, force=True)
+    finally:
+        _invalidate(interfaces)
+
+    current = collect_qdiscs()
+    return all(
+        [_signature(q) for q in _configured(current.get(interface, []))]
+        == [_signature(q) for q in _configured(snapshot[interface])]
+        for interface in interfaces
+    )
+
+
+def apply_tc_batch(specs: Iterable[ShapingSpec]) -> TCBatchResult:
+    """Apply shaping specs to several interfaces as one transaction.
+
+    Either every spec is applied, or every target interface is put back the way
+    it was (``rolled_back``). Nothing runs if an interface is unknown, listed
+    twice, or has qdiscs that couldn't be restored.
+    """
+    specs = list(specs)
+    interfaces = [spec.interface for spec in specs]
+    snapshot = collect_qdiscs()
+    try:
+        if len(set(interfaces)) != len(interfaces):
+            raise ValueError("each interface may only appear once")
+        for spec in specs:
+            _check_tokens(spec)
+            if spec.interface not in snapshot:
+                raise ValueError(f"interface {spec.interface} not found")
+            restore_commands(spec.interface, snapshot[spec.interface])
+    except ValueError as e:
+        return TCBatchResult(
+            success=False,
+            details=f"No changes made: {e}",
+            interfaces=interfaces,
+            error=str(e),
+        )
+
+    commands = [
+        line
+        for spec in specs
+        for line in change_commands(spec, snapshot[spec.interface])
+    ]
+    if not commands:
+        return TCBatchResult(
+            success=True, details="Nothing to change", interfaces=interfaces
+        )
+
+    try:
+        returncode, error = run_tc_batch(commands)
+    finally:
+        _invalidate(interfaces)
+    if returncode == 0:
+        return TCBatchResult(
+            success=True,
+            details=f"Applied {len(commands)} TC changes to {len(interfaces)} interfaces",
+            interfaces=interfaces,
+            commands=commands,
+        )
+
+    error = error or f"tc exited with status {returncode}"
+    rolled_back = _rollback(interfaces, snapshot)
+    return TCBatchResult(
+        success=False,
+        details=(
+            "TC batch failed; all interfaces were restored"
+            if rolled_back
+            else "TC batch failed and restoring the previous qdiscs did not fully succeed"
+        ),
+        interfaces=interfaces,
+        commands=commands,
+        rolled_back=rolled_back,
+        error=error,
+    )
+
+
+def path_specs(
+    path: ForwardingPath,
+    action: Literal["limit", "remove"],
+    rate: str = "1Mbit",
+    burst: str = "32Kb",
+) -> List[ShapingSpec]:
+    """One spec per interface on a path: both veths of every hop and VM ports."""
+    return [
+        ShapingSpec(interface=interface, action=action, rate=rate, burst=burst)
+        for interface in dict.fromkeys(path.interfaces)
+    ]
+
+
+def shape_path(
+    source: str,
+    target: str,
+    action: Literal["limit", "remove"],
+    rate: str = "1Mbit",
+    burst: str = "32Kb",
+) -> PathShapingResult:
+    """Apply or clear TC on every interface of the active path between two ends.
+
+    Args:
+        source: VM name or switch.
+        target: VM name or switch.
+        action: 'limit' applies a TBF limit, 'remove' clears TC.
+        rate: TBF rate for 'limit'.
+        burst: TBF burst for 'limit'.
+    """
+    path = calculate_path_between(source, target)
+    if path is None:
+        return PathShapingResult(
+            source=source,
+            target=target,
+            batch=TCBatchResult(
+                success=False,
+                details=f"No active forwarding path between {source} and {target}",
+                error="no path",
+            ),
+        )
+    return PathShapingResult(
+        source=source,
+        target=target,
+        switches=path.switches,
+        batch=apply_tc_batch(path_specs(path, action, rate, burst)),
+    )
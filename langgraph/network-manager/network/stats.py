@@ -0,0 +1,22 @@
+"""Summary statistics shared by the sampler and the path probe."""
+
+from typing import Dict
+
+import numpy as np
+
+
+def summarize_series(values: np.ndarray) -> Dict[str, float]:
+    """Mean, p50, p95, p99 and max of a series; all zero when it is empty.
+
+    The keys match the fields of ``RateStats`` and ``LatencyStats``.
+    """
+    if values.size == 0:
+        return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "mean": float(values.mean()),
+        "p50": float(p50),
+        "p95": float(p95),
+        "p99": float(p99),
+        "max": float(values.max()),
+    }
@@ -0,0 +1,331 @@
+"""Traffic control (TC) inspection.
+
+Every qdisc on the host is read with a single ``tc -json qdisc show`` call, or
+one plain ``tc qdisc show`` call on iproute2 builds without JSON support, and
+parsed into ``QdiscInfo`` models with rate, burst, delay, jitter and loss in
+fixed units. ``TCSettings`` for any interface are derived from that shared
+snapshot, which is cached in ``topology_cache`` under ``tc``.
+"""
+
+import json
+import re
+import subprocess
+from typing import Dict, Iterable, List, Optional
+
+from network.cache import topology_cache
+from network.models import QdiscInfo, TCSettings
+
+# Qdiscs that count as deliberate shaping; kernel defaults such as noqueue,
+# pfifo_fast, mq or fq_codel are ignored
+SHAPING_QDISCS = {"tbf", "netem", "htb"}
+
+_RATE_UNITS = {
+    "bit": 1,
+    "kbit": 1_000,
+    "mbit": 1_000_000,
+    "gbit": 1_000_000_000,
+    "tbit": 1_000_000_000_000,
+    "bps": 8,
+    "kbps": 8_000,
+    "mbps": 8_000_000,
+    "gbps": 8_000_000_000,
+}
+_SIZE_UNITS = {
+    "b": 1,
+    "kb": 1024,
+    "k": 1024,
+    "mb": 1024**2,
+    "m": 1024**2,
+    "gb": 1024**3,
+}
+_TIME_UNITS = {
+    "s": 1000.0,
+    "sec": 1000.0,
+    "ms": 1.0,
+    "msec": 1.0,
+    "us": 0.001,
+    "usec": 0.001,
+}
+
+
+def parse_rate(value: str) -> Optional[int]:
+    """Parse a tc rate such as '1Mbit' or '500kbit' into bits per second."""
+    match = re.fullmatch(r"([\d.]+)([a-zA-Z]*)", value.strip())
+    if not match:
+        return None
+    unit = match.group(2).lower() or "bit"
+    if unit not in _RATE_UNITS:
+        return None
+    return int(float(match.group(1)) * _RATE_UNITS[unit])
+
+
+def parse_size(value: str) -> Optional[int]:
+    """Parse a tc size such as '32Kb' or '1600b' into bytes."""
+    match = re.fullmatch(r"([\d.]+)([a-zA-Z]*)", value.strip())
+    if not match:
+        return None
+    unit = match.group(2).lower() or "b"
+    if unit not in _SIZE_UNITS:
+        return None
+    return int(float(match.group(1)) * _SIZE_UNITS[unit])
+
+
+def parse_time(value: str) -> Optional[float]:
+    """Parse a tc time such as '50ms' or '1s' into milliseconds."""
+    match = re.fullmatch(r"([\d.]+)([a-zA-Z]*)", value.strip())
+    if not match:
+        return None
+    unit = match.group(2).lower() or "us"
+    if unit not in _TIME_UNITS:
+        return None
+    return float(match.group(1)) * _TIME_UNITS[unit]
+
+
+def format_rate(bits_per_second: int) -> str:
+    """Format a rate the way tc prints it (e.g. 1000000 -> '1Mbit')."""
+    rate = bits_per_second
+    units = ["bit", "Kbit", "Mbit", "Gbit", "Tbit"]
+    i = 0
+    while i < len(units) - 1 and rate >= 1000 and rate % 1000 == 0:
+        rate //= 1000
+        i += 1
+    return f"{rate}{units[i]}"
+
+
+def format_size(size_bytes: int) -> str:
+    """Format a size the way tc prints it (e.g. 32768 -> '32Kb')."""
+    if size_bytes >= 1024**2 and size_bytes % 1024**2 == 0:
+        return f"{size_bytes // 1024**2}Mb"
+    if size_bytes >= 1024 and size_bytes % 1024 == 0:
+        return f"{size_bytes // 1024}Kb"
+    return f"{size_bytes}b"
+
+
+def _format_ms(value: float) -> str:
+    return f"{value:g}ms"
+
+
+def _describe(qdisc: QdiscInfo) -> str:
+    parts = ["qdisc", qdisc.kind]
+    if qdisc.handle:
+        parts.append(qdisc.handle)
+    parts.append(f"dev {qdisc.interface}")
+    parts.append("root" if qdisc.root else f"parent {qdisc.parent}")
+    if qdisc.rate_bps is not None:
+        parts.append(f"rate {format_rate(qdisc.rate_bps)}")
+    if qdisc.burst_bytes is not None:
+        parts.append(f"burst {format_size(qdisc.burst_bytes)}")
+    if qdisc.latency_ms is not None:
+        parts.append(f"lat {_format_ms(qdisc.latency_ms)}")
+    if qdisc.delay_ms is not None:
+        delay = f"delay {_format_ms(qdisc.delay_ms)}"
+        if qdisc.jitter_ms:
+            delay += f" {_format_ms(qdisc.jitter_ms)}"
+        parts.append(delay)
+    if qdisc.loss_percent is not None:
+        parts.append(f"loss {qdisc.loss_percent:g}%")
+    return " ".join(parts)
+
+
+def parse_qdisc_json(entry: dict, interface: Optional[str] = None) -> QdiscInfo:
+    """Parse one entry of ``tc -json qdisc show`` output.
+
+    JSON rates are bytes per second, TBF latency is microseconds, netem delay
+    and jitter are seconds and netem loss is a fraction.
+    """
+    kind = entry.get("kind", "unknown")
+    options = entry.get("options") or {}
+    qdisc = QdiscInfo(
+        interface=interface or entry.get("dev", ""),
+        kind=kind,
+        handle=entry.get("handle"),
+        parent=entry.get("parent"),
+        root=bool(entry.get("root")),
+        line="",
+    )
+
+    if kind == "tbf":
+        if options.get("rate") is not None:
+            qdisc.rate_bps = int(options["rate"]) * 8
+        if options.get("burst") is not None:
+            qdisc.burst_bytes = int(options["burst"])
+        if options.get("lat") is not None:
+            qdisc.latency_ms = options["lat"] / 1000.0
+    elif kind == "netem":
+        delay = options.get("delay") or {}
+        if delay.get("delay"):
+            qdisc.delay_ms = delay["delay"] * 1000.0
+        if delay.get("jitter"):
+            qdisc.jitter_ms = delay["jitter"] * 1000.0
+        loss = options.get("loss-random") or {}
+        if loss.get("loss"):
+            qdisc.loss_percent = round(loss["loss"] * 100.0, 4)
+        if options.get("rate") is not None:
+            rate = options["rate"]
+            rate = rate.get("rate") if isinstance(rate, dict) else rate
+            if rate is not None:
+                qdisc.rate_bps = int(rate) * 8
+
+    qdisc.line = _describe(qdisc)
+    return qdisc
+
+
+def parse_qdisc_line(line: str) -> Optional[QdiscInfo]:
+    """Parse one line of plain ``tc qdisc show`` output."""
+    tokens = line.split()
+    if len(tokens) < 3 or tokens[0] != "qdisc":
+        return None
+
+    def value_after(keyword: str) -> Optional[str]:
+        if keyword in tokens:
+            index = tokens.index(keyword)
+            if index + 1 < len(tokens):
+                return tokens[index + 1]
+        return None
+
+    qdisc = QdiscInfo(
+        interface=value_after("dev") or "",
+        kind=tokens[1],
+        handle=tokens[2],
+        parent=value_after("parent"),
+        root="root" in tokens,
+        line=line.strip(),
+    )
+
+    rate = value_after("rate")
+    if rate:
+        qdisc.rate_bps = parse_rate(rate)
+    burst = value_after("burst")
+    if burst:
+        qdisc.burst_bytes = parse_size(burst)
+    latency = value_after("lat") or value_after("latency")
+    if latency:
+        qdisc.latency_ms = parse_time(latency)
+    delay = value_after("delay")
+    if delay:
+        qdisc.delay_ms = parse_time(delay)
+        jitter_index = tokens.index("delay") + 2
+        if jitter_index < len(tokens):
+            qdisc.jitter_ms = parse_time(tokens[jitter_index])
+    loss = value_after("loss")
+    if loss and loss.endswith("%"):
+        qdisc.loss_percent = float(loss.rstrip("%"))
+    return qdisc
+
+
+def parse_qdiscs_json(output: str) -> Dict[str, List[QdiscInfo]]:
+    """Parse ``tc -json qdisc show`` output, grouped by interface."""
+    qdiscs: Dict[str, List[QdiscInfo]] = {}
+    for entry in json.loads(output):
+        qdisc = parse_qdisc_json(entry)
+        qdiscs.setdefault(qdisc.interface, []).append(qdisc)
+    return qdiscs
+
+
+def parse_qdiscs_text(output: str) -> Dict[str, List[QdiscInfo]]:
+    """Parse plain ``tc qdisc show`` output, grouped by interface."""
+    qdiscs: Dict[str, List[QdiscInfo]] = {}
+    for line in output.splitlines():
+        qdisc = parse_qdisc_line(line)
+        if qdisc is not None:
+            qdiscs.setdefault(qdisc.interface, []).append(qdisc)
+    return qdiscs
+
+
+def collect_qdiscs() -> Dict[str, List[QdiscInfo]]:
+    """Read and parse every qdisc on the host with a single tc call.
+
+    Returns:
+        Dictionary mapping interface names to their qdiscs, root first.
+    """
+    try:
+        result = subprocess.run(
+            ["tc", "-json", "qdisc", "show"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+        if result.returncode == 0 and result.stdout.strip().startswith("["):
+            return parse_qdiscs_json(result.stdout)
+
+        result = subprocess.run(
+            ["tc", "qdisc", "show"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+        if result.returncode == 0:
+            return parse_qdiscs_text(result.stdout)
+    except Exception:
+        pass
+    return {}
+
+
+def get_tc_snapshot() -> Dict[str, List[QdiscInfo]]:
+    """Return the cached host-wide qdisc snapshot (``tc`` cache key)."""
+    return topology_cache.get_or_load("tc", collect_qdiscs)
+
+
+def tc_settings_from_qdiscs(interface: str, qdiscs: Iterable[QdiscInfo]) -> TCSettings:
+    """Summarize an interface's qdiscs into TCSettings.
+
+    Only TBF, netem and HTB qdiscs count as TC configuration.
+    """
+    settings = TCSettings(interface=interface, has_tc=False)
+    for qdisc in qdiscs:
+        if qdisc.kind not in SHAPING_QDISCS:
+            continue
+
+        settings.has_tc = True
+        settings.qdiscs.append(qdisc.line)
+
+        if qdisc.rate_bps is not None and settings.rate_bps is None:
+            settings.rate_bps = qdisc.rate_bps
+            settings.bandwidth_limit = format_rate(qdisc.rate_bps)
+        if qdisc.burst_bytes is not None and settings.burst_bytes is None:
+            settings.burst_bytes = qdisc.burst_bytes
+            settings.burst = format_size(qdisc.burst_bytes)
+        if qdisc.kind == "netem":
+            settings.delay_ms = qdisc.delay_ms
+            settings.jitter_ms = qdisc.jitter_ms
+            settings.loss_percent = qdisc.loss_percent
+            if qdisc.delay_ms is not None or qdisc.loss_percent is not None:
+                settings.has_netem = True
+    return settings
+
+
+def read_tc_settings(interface: str) -> TCSettings:
+    """Return TCSettings for one interface from the shared snapshot."""
+    return tc_settings_from_qdiscs(interface, get_tc_snapshot().get(interface, []))
+
+
+def read_all_tc_settings(
+    interfaces: Iterable[str], shaped_only: bool = False
+) -> Dict[str, TCSettings]:
+    """Return TCSettings for several interfaces from one shared snapshot.
+
+    Args:
+        interfaces: Interfaces to report.
+        shaped_only: Only return interfaces that have a shaping qdisc.
+    """
+    return tc_settings_for(get_tc_snapshot(), interfaces, shaped_only)
+
+
+def tc_settings_for(
+    snapshot: Dict[str, List[QdiscInfo]],
+    interfaces: Iterable[str],
+    shaped_only: bool = False,
+) -> Dict[str, TCSettings]:
+    """Derive TCSettings for interfaces from a qdisc snapshot."""
+    if shaped_only:
+        # Only the few shaped interfaces are visited, not the whole inventory
+        shaped = {
+            interface
+            for interface, qdiscs in snapshot.items()
+            if any(qdisc.kind in SHAPING_QDISCS for qdisc in qdiscs)
+        }
+        interfaces = [interface for interface in interfaces if interface in shaped]
+    return {
+        interface: tc_settings_from_qdiscs(interface, snapshot.get(interface, []))
+        for interface in interfaces
+    }
@@ -0,0 +1,262 @@
+"""Event-driven topology updates from rtnetlink link notifications.
+
+A daemon thread subscribes to rtnetlink link events (``RTMGRP_LINK``, which
+also carries the bridge port notifications sent on STP state changes) through
+pyroute2, or follows ``ip monitor link`` when pyroute2 is not installed. After
+each burst of events it rereads the interface table and the bridge port
+states, both in-process, and republishes the inventory and the ``stp`` and
+``active_links`` cache entries. While the watcher runs those two entries never
+expire, and a cached topology snapshot is rebuilt from the new state instead
+of being dropped, so ``collect_active_links`` and path queries stay current
+without running ``brctl`` or any other process.
+
+``TOPOLOGY_WATCHER`` selects the event source: ``auto`` (default, pyroute2
+then ``ip monitor``), ``pyroute2``, ``ip`` or ``off``.
+"""
+
+import math
+import os
+import select
+import subprocess
+import threading
+import time
+from typing import Callable, List, Optional
+
+from network.cache import topology_cache
+from network.discovery import build_inventory, inventory_tracker
+from network.infrastructure import (
+    SNAPSHOT_DEPENDS_ON,
+    TOPOLOGY_DEPENDS_ON,
+    assemble_topology_snapshot,
+    build_topology_from_links,
+    collect_active_links,
+    stp_info_from_port_states,
+)
+from network.models import STPInfoCollection
+from network.netlink import read_links, read_port_states
+
+try:
+    from pyroute2 import IPRoute
+    from pyroute2.netlink.rtnl import RTMGRP_LINK
+except ImportError:
+    IPRoute = None
+
+TOPOLOGY_WATCHER = os.environ.get("TOPOLOGY_WATCHER", "auto")
+
+# Quiet period that ends a burst of events, and the longest a burst may delay
+# an update (STP reconvergence flips several ports in quick succession)
+DEBOUNCE_SECONDS = 0.1
+MAX_BURST_SECONDS = 1.0
+# How often the event loop checks whether it should stop
+STOP_CHECK_INTERVAL = 0.5
+# After the watcher fails, start() waits this long before trying again,
+# doubling with each consecutive failure up to WATCHER_MAX_RETRY_SECONDS;
+# meanwhile the cache falls back to TTL expiry
+WATCHER_RETRY_SECONDS = float(os.environ.get("WATCHER_RETRY_SECONDS", "30"))
+WATCHER_MAX_RETRY_SECONDS = float(os.environ.get("WATCHER_MAX_RETRY_SECONDS", "600"))
+
+# Blocks until an event arrives or the timeout passes; True if one arrived
+EventWaiter = Callable[[float], bool]
+
+
+class TopologyWatcher:
+    """Keeps cached link, STP and topology state in sync with kernel events."""
+
+    def __init__(self, backend: str = TOPOLOGY_WATCHER):
+        self.backend = backend
+        self.events = 0
+        self.updates = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self._failures = 0
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._process: Optional[subprocess.Popen] = None
+
+    def start(self) -> None:
+        """Start the watcher thread if it is enabled and not already running."""
+        with self._lock:
+            if self.backend == "off" or self.running:
+                return
+            if time.monotonic() < self._retry_at:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="topology-watcher", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        process = self._process
+        if process is not None:
+            process.terminate()
+        if self._thread:
+            self._thread.join(timeout=STOP_CHECK_INTERVAL * 2)
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def _sources(self) -> List[str]:
+        if self.backend == "auto":
+            return ["pyroute2", "ip"]
+        return [self.backend]
+
+    def _run(self) -> None:
+        try:
+            self.publish()
+            for source in self._sources():
+                try:
+                    if source == "pyroute2":
+                        self._watch_netlink()
+                    else:
+                        self._watch_ip_monitor()
+                    return
+                except Exception as e:
+                    if self._stop.is_set():
+                        return
+                    self._record_error(e)
+            self._failed()
+        except Exception as e:
+            self._record_error(e)
+            self._failed()
+        finally:
+            # Without events the entries would never expire; hand back to the TTL
+            topology_cache.invalidate("stp")
+
+    def _record_error(self, error: Exception) -> None:
+        self.errors += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+
+    def _failed(self) -> None:
+        """Back off before start() runs the watcher again."""
+        delay = min(
+            WATCHER_RETRY_SECONDS * 2**self._failures, WATCHER_MAX_RETRY_SECONDS
+        )
+        self._failures += 1
+        self._retry_at = time.monotonic() + delay
+
+    def _watch_netlink(self) -> None:
+        if IPRoute is None:
+            raise RuntimeError("pyroute2 is not installed")
+        with IPRoute() as ipr:
+            ipr.bind(groups=RTMGRP_LINK)
+
+            def wait(timeout: float) -> bool:
+                ready, _, _ = select.select([ipr], [], [], timeout)
+                if ready:
+                    ipr.get()
+                return bool(ready)
+
+            self._watch(wait)
+
+    def _watch_ip_monitor(self) -> None:
+        self._process = subprocess.Popen(
+            ["ip", "monitor", "link"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        fd = self._process.stdout.fileno()
+
+        def wait(timeout: float) -> bool:
+            ready, _, _ = select.select([fd], [], [], timeout)
+            # Every line is an event and the whole state is reread, so the
+            # output itself is not parsed
+            if ready and not os.read(fd, 65536):
+                raise RuntimeError("ip monitor exited")
+            return bool(ready)
+
+        try:
+            self._watch(wait)
+        finally:
+            self._process.terminate()
+            self._process.wait()
+            self._process = None
+
+    def _watch(self, wait: EventWaiter) -> None:
+        while not self._stop.is_set():
+            if not wait(STOP_CHECK_INTERVAL):
+                continue
+            self.events += 1
+            deadline = time.monotonic() + MAX_BURST_SECONDS
+            while time.monotonic() < deadline and wait(DEBOUNCE_SECONDS):
+                self.events += 1
+            try:
+                self.publish()
+            except Exception as e:
+                # The cached state is now behind the kernel; let the TTL
+                # collectors reread it until a later burst publishes again
+                self._record_error(e)
+                topology_cache.invalidate("stp")
+
+    def publish(self) -> None:
+        """Reread links and port states and republish the derived cache entries."""
+        links = read_links()
+        port_states = read_port_states()
+        if not links or port_states is None:
+            raise RuntimeError("interface table or port states unavailable")
+
+        current = inventory_tracker.current
+        if current is None:
+            inventory = inventory_tracker.refresh(links)
+        else:
+            inventory = inventory_tracker.update(build_inventory(links, current.vms))
+        stp = STPInfoCollection(
+            bridges=stp_info_from_port_states(inventory.bridges, port_states)
+        )
+
+        # VM configs and routes don't change with link events; reuse them
+        snapshot = topology_cache.peek("snapshot")
+        snapshot_ttl = topology_cache.remaining_ttl("snapshot")
+        topology = topology_cache.peek("topology")
+        topology_ttl = topology_cache.remaining_ttl("topology")
+
+        topology_cache.invalidate("stp")
+        topology_cache.put("stp", stp, ttl=math.inf, depends_on=("inventory",))
+        topology_cache.put("links", links)
+        if snapshot is not None and snapshot_ttl:
+            snapshot = assemble_topology_snapshot(
+                links,
+                snapshot.vm_configs,
+                stp.bridges,
+                snapshot.network_settings.routing,
+                inventory,
+            )
+            topology_cache.put(
+                "snapshot",
+                snapshot,
+                ttl=snapshot_ttl,
+                depends_on=SNAPSHOT_DEPENDS_ON,
+            )
+        elif topology is not None and topology_ttl:
+            topology = build_topology_from_links(
+                links, topology.vms, stp.bridges, inventory
+            )
+            topology_cache.put(
+                "topology", topology, ttl=topology_ttl, depends_on=TOPOLOGY_DEPENDS_ON
+            )
+        topology_cache.put(
+            "active_links",
+            collect_active_links(stp.bridges, inventory.veths),
+            ttl=math.inf,
+            depends_on=("stp", "inventory"),
+        )
+        self.updates += 1
+        self._failures = 0
+
+
+_watcher: Optional[TopologyWatcher] = None
+_watcher_lock = threading.Lock()
+
+
+def get_watcher() -> TopologyWatcher:
+    """Return the shared watcher, starting it on first use."""
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = TopologyWatcher()
+        _watcher.start()
+        return _watcher
@@ -0,0 +1,92 @@
+import threading
+
+from network.cache import TopologyCache
+
+
+def test_unrelated_invalidation_keeps_loaded_value():
+    cache = TopologyCache(ttl=60)
+
+    def loader():
+        cache.invalidate("tc:vnet3")
+        return "snapshot"
+
+    assert cache.get_or_load("snapshot", loader, depends_on=("stp",)) == "snapshot"
+    assert cache.peek("snapshot") == "snapshot"
+
+
+def test_dependency_invalidated_during_load_is_not_stored():
+    cache = TopologyCache(ttl=60)
+
+    def loader():
+        cache.invalidate("stp")
+        return "stale"
+
+    assert cache.get_or_load("snapshot", loader, depends_on=("stp",)) == "stale"
+    assert cache.peek("snapshot") is None
+
+
+def test_transitive_dependent_invalidated_during_load_is_not_stored():
+    cache = TopologyCache(ttl=60)
+    cache.put("topology", "t", depends_on=("stp",))
+
+    def loader():
+        cache.invalidate("stp")
+        return "stale"
+
+    cache.get_or_load("path_index", loader, depends_on=("topology",))
+    assert cache.peek("path_index") is None
+
+
+def test_parent_and_child_invalidation_reach_loads_in_progress():
+    cache = TopologyCache(ttl=60)
+
+    cache.get_or_load("tc:veth0", lambda: cache.invalidate("tc") and "child")
+    assert cache.peek("tc:veth0") is None
+
+    cache.get_or_load("tc", lambda: cache.invalidate("tc:veth0") and "parent")
+    assert cache.peek("tc") is None
+
+    cache.get_or_load("tc:veth1", lambda: cache.invalidate("tc:veth0") and "other")
+    assert cache.peek("tc:veth1") == "other"
+
+
+def test_watch_skips_put_after_invalidation():
+    cache = TopologyCache(ttl=60)
+    with cache.watch("stp", "links") as watch:
+        assert cache.put("active_links", "fresh", watch=watch)
+        cache.invalidate("links")
+        assert not cache.put("active_links", "stale", watch=watch)
+    assert cache.peek("active_links") == "fresh"
+
+
+def test_load_locks_are_dropped_after_loads():
+    cache = TopologyCache(ttl=60)
+    for i in range(100):
+        cache.get_or_load(f"tc:veth{i}", lambda: i)
+    assert cache._loads == {} and cache._watches == set()
+
+
+def test_concurrent_misses_share_one_load():
+    cache = TopologyCache(ttl=60)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "value"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_load("k", loader)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    started.wait(5)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == ["value"] * 4 and len(calls) == 1
+    assert cache._loads == {}
@@ -0,0 +1,13 @@
+import pytest
+
+from network import lab
+
+
+def test_lab_up_raises_when_stp_does_not_converge(monkeypatch, tmp_path):
+    monkeypatch.setattr(lab, "_run", lambda command, stdin=None: "")
+    monkeypatch.setattr(lab, "wait_converged", lambda namespace, timeout: False)
+    layout = lab.generate_layout(2, hosts=1, namespace="nmtest")
+
+    with pytest.raises(RuntimeError, match="did not converge"):
+        lab.lab_up(layout, state_dir=str(tmp_path))
+    assert (tmp_path / "layout.json").exists()
@@ -0,0 +1,31 @@
+import subprocess
+import sys
+
+from network.metrics import ToolMetrics, counting
+
+
+def _spawn():
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+
+
+def test_popen_hook_is_installed_only_while_counting():
+    original = subprocess.Popen.__init__
+    with counting() as counters:
+        assert subprocess.Popen.__init__ is not original
+        _spawn()
+    assert subprocess.Popen.__init__ is original
+    assert counters.subprocesses == 1
+
+    _spawn()
+    assert counters.subprocesses == 1
+
+
+def test_tracked_call_counts_towards_enclosing_block():
+    metrics = ToolMetrics()
+    with counting() as outer:
+        _spawn()
+        with metrics.track("network_manager", "tool") as record:
+            _spawn()
+    assert record.counters.subprocesses == 1
+    assert outer.subprocesses == 2
+    assert metrics.to_json()["network_manager"]["tool"]["subprocesses"] == 1
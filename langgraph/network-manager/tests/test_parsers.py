@@ -0,0 +1,93 @@
+"""Parsers against output captured from the four-switch lab.
+
+The netem entries were written in iproute2's format by hand: the kernel the
+fixtures were captured on has no sch_netem.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from network.models import ShapingSpec
+from network.netlink import parse_ip_links
+from network.shaping import change_commands, restore_commands
+from network.tc import parse_qdiscs_json, parse_qdiscs_text, tc_settings_for
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _fixture(name: str) -> str:
+    return (FIXTURES / name).read_text()
+
+
+@pytest.fixture(
+    params=[
+        ("tc_qdisc_show.json", parse_qdiscs_json),
+        ("tc_qdisc_show.txt", parse_qdiscs_text),
+    ],
+    ids=["json", "text"],
+)
+def snapshot(request):
+    name, parse = request.param
+    return parse(_fixture(name))
+
+
+def test_tbf_rate_burst_and_latency(snapshot):
+    (tbf,) = snapshot["veth-sw1-sw2"]
+    assert (tbf.kind, tbf.handle, tbf.root) == ("tbf", "8022:", True)
+    # tc -json reports 125000 bytes/s, the text output 1Mbit
+    assert tbf.rate_bps == 1_000_000
+    assert tbf.burst_bytes == 32 * 1024
+    assert tbf.latency_ms == 50.0
+
+
+def test_netem_delay_jitter_loss_and_rate(snapshot):
+    (netem,) = snapshot["veth-sw1-sw3"]
+    assert netem.kind == "netem"
+    assert (netem.delay_ms, netem.jitter_ms) == (20.0, 5.0)
+    assert netem.loss_percent == 1.0
+    assert netem.rate_bps == 10_000_000
+
+
+def test_ingress_and_clsact_are_parsed_but_not_shaping(snapshot):
+    kinds = {
+        interface: [q.kind for q in snapshot[interface]]
+        for interface in ("veth-sw2-sw4", "veth-sw3-sw4")
+    }
+    assert kinds == {
+        "veth-sw2-sw4": ["noqueue", "clsact"],
+        "veth-sw3-sw4": ["noqueue", "ingress"],
+    }
+    assert snapshot["veth-sw3-sw4"][1].parent == "ffff:fff1"
+
+    interfaces = ["veth-sw1-sw2", "veth-sw1-sw3", "veth-sw2-sw4", "veth-sw3-sw4"]
+    settings = tc_settings_for(snapshot, interfaces)
+    assert not settings["veth-sw2-sw4"].has_tc
+    assert not settings["veth-sw3-sw4"].has_tc
+    assert settings["veth-sw1-sw2"].bandwidth_limit == "1Mbit"
+    assert settings["veth-sw1-sw3"].has_netem
+    assert set(tc_settings_for(snapshot, interfaces, shaped_only=True)) == {
+        "veth-sw1-sw2",
+        "veth-sw1-sw3",
+    }
+
+
+def test_shaping_batches_leave_ingress_qdiscs_alone(snapshot):
+    qdiscs = snapshot["veth-sw3-sw4"]
+    assert restore_commands("veth-sw3-sw4", qdiscs) == []
+    remove = ShapingSpec(interface="veth-sw3-sw4", action="remove")
+    assert change_commands(remove, qdiscs) == []
+
+
+def test_parse_ip_links():
+    links = parse_ip_links(_fixture("ip_addr_show.json"))
+
+    assert {"lo", "br-sw1", "br-sw4", "veth-sw1-sw2", "veth-sw4-sw3"} <= set(links)
+    bridge = links["br-sw1"]
+    assert (bridge.kind, bridge.master, bridge.ips) == ("bridge", None, ["10.0.0.1/24"])
+    veth = links["veth-sw1-sw2"]
+    assert (veth.kind, veth.master, veth.peer) == ("veth", "br-sw1", "veth-sw2-sw1")
+    assert veth.qdisc == "tbf"
+    assert "UP" in veth.flags and veth.operstate == "UP"
+    assert (veth.rx_bytes, veth.tx_packets, veth.tx_dropped) == (260509686, 9053, 16)
+    assert links["lo"].kind is None
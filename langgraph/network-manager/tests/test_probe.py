@@ -0,0 +1,63 @@
+import subprocess
+import sys
+import time
+
+from network import probe
+from network.models import ForwardingPath, Inventory, ProbeEndpoint, ProbeResult
+
+
+def _receiver(script):
+    return subprocess.Popen(
+        [sys.executable, "-c", script], stdout=subprocess.PIPE, text=True
+    )
+
+
+def test_wait_ready_gives_up_after_timeout():
+    server = _receiver("import time; time.sleep(30)")
+    try:
+        started = time.monotonic()
+        assert not probe._wait_ready(server, 0.2)
+        assert time.monotonic() - started < 5
+    finally:
+        server.kill()
+        server.wait()
+
+
+def test_wait_ready_reads_ready_line():
+    server = _receiver("print('ready', flush=True)")
+    try:
+        assert probe._wait_ready(server, 5)
+    finally:
+        server.wait()
+
+
+def test_teardown_error_is_reported_with_the_measurement(monkeypatch):
+    path = ForwardingPath(source="vm1", target="vm2", switches=["s1", "s2"])
+    monkeypatch.setattr(probe, "calculate_path_between", lambda s, t: path)
+    monkeypatch.setattr(
+        probe, "get_inventory", lambda: Inventory(bridges=["br-sw1", "br-sw2"])
+    )
+    monkeypatch.setattr(
+        probe,
+        "probe_endpoint",
+        lambda bridge: ProbeEndpoint(
+            bridge=bridge, namespace="probe-x", port="prb-x", address="10.0.0.1"
+        ),
+    )
+    monkeypatch.setattr(
+        probe,
+        "run_probe",
+        lambda source, target, duration: ProbeResult(
+            source=source.bridge, target=target.bridge, throughput_bps=1e6
+        ),
+    )
+
+    def remove(endpoint):
+        raise RuntimeError(f"{endpoint.port} busy")
+
+    monkeypatch.setattr(probe, "remove_probe_endpoint", remove)
+
+    result = probe.measure_path("vm1", "vm2")
+    assert result.throughput_bps == 1e6
+    assert result.switches == ["s1", "s2"]
+    assert result.error == "Could not remove probe endpoints: prb-x busy; prb-x busy"
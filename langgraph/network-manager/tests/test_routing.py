@@ -0,0 +1,165 @@
+from typing import Any
+
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from agents import common
+from agents.common import RoutingDecision, routing_decisions
+
+AGENT = "network_manager"
+
+
+class ScriptedModel(BaseChatModel):
+    """Chat model that returns the given replies in order."""
+
+    replies: list
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs) -> "ScriptedModel":
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return ChatResult(generations=[ChatGeneration(message=self.replies.pop(0))])
+
+
+class RoutingModel:
+    """Stands in for routing_llm, the second-inference fallback."""
+
+    def __init__(self, decision: Any = None):
+        self.decision = decision
+        self.calls = 0
+
+    def invoke(self, prompt: str) -> RoutingDecision:
+        self.calls += 1
+        if self.decision is None:
+            raise ValueError("model unavailable")
+        return self.decision
+
+
+def ping(host: str) -> str:
+    """Ping a host."""
+    return f"{host} is reachable"
+
+
+def routing_call(call_id: str, **args) -> dict:
+    return {"name": "RoutingDecision", "args": args, "id": call_id}
+
+
+@pytest.fixture
+def run_agent(monkeypatch):
+    def run(replies, tools=(), mode="auto", fallback=None):
+        monkeypatch.setattr(common, "ROUTING_MODE", mode)
+        monkeypatch.setattr(common, "llm", ScriptedModel(replies=list(replies)))
+        monkeypatch.setattr(common, "routing_llm", fallback or RoutingModel())
+        agent = common.make_agent("Answer: {user_query}", list(tools), AGENT)
+        return agent.invoke({"messages": [HumanMessage("is vm1 reachable?")]})
+
+    return run
+
+
+def count(mode: str, source: str) -> int:
+    return routing_decisions.value(AGENT, mode, source)
+
+
+def test_routing_call_mixed_with_tool_calls(run_agent):
+    first = AIMessage(
+        "",
+        tool_calls=[
+            {"name": "ping", "args": {"host": "vm1"}, "id": "1"},
+            routing_call("2", next_agent="__end__", reasoning="too early"),
+        ],
+    )
+    final = AIMessage(
+        "vm1 is reachable",
+        tool_calls=[routing_call("3", next_agent="tech_reporter", reasoning="report")],
+    )
+    before = count("tool", "tool_call")
+
+    out = run_agent([first, final], tools=[ping])
+
+    # The routing call never reaches the ToolNode; only ping is run
+    assert [call["name"] for call in out["messages"][1].tool_calls] == ["ping"]
+    assert out["messages"][2].content == "vm1 is reachable"
+    assert (out["next_agent"], out["reasoning"]) == ("tech_reporter", "report")
+    assert count("tool", "tool_call") == before + 1
+
+
+def test_invalid_routing_args_fall_back_to_the_marker(run_agent):
+    reply = AIMessage(
+        'vm1 is reachable\nROUTING_DECISION: {"next_agent": "traffic_controller", '
+        '"reasoning": "shape it"}',
+        tool_calls=[routing_call("1", next_agent="nobody", reasoning="?")],
+    )
+    fallback = RoutingModel()
+    before = count("tool", "marker")
+
+    out = run_agent([reply], tools=[ping], fallback=fallback)
+
+    assert out["messages"][-1].content == "vm1 is reachable"
+    assert out["messages"][-1].tool_calls == []
+    assert out["next_agent"] == "traffic_controller"
+    assert fallback.calls == 0
+    assert count("tool", "marker") == before + 1
+
+
+def test_invalid_routing_args_without_marker_ask_the_model(run_agent):
+    reply = AIMessage(
+        "vm1 is reachable",
+        tool_calls=[routing_call("1", next_agent="nobody", reasoning="?")],
+    )
+    fallback = RoutingModel(
+        RoutingDecision(next_agent="tech_reporter", reasoning="summarize")
+    )
+    before = count("tool", "llm")
+
+    out = run_agent([reply], tools=[ping], fallback=fallback)
+
+    assert (out["next_agent"], out["reasoning"]) == ("tech_reporter", "summarize")
+    assert fallback.calls == 1
+    assert count("tool", "llm") == before + 1
+
+
+def test_json_reply(run_agent):
+    reply = AIMessage(
+        '{"response": "Hello!", "next_agent": "__end__", "reasoning": "greeting"}'
+    )
+    before = count("json", "json")
+
+    out = run_agent([reply])
+
+    assert out["messages"][-1].content == "Hello!"
+    assert out["next_agent"] is None
+    assert out["reasoning"] == "greeting"
+    assert count("json", "json") == before + 1
+
+
+def test_marker_reply(run_agent):
+    reply = AIMessage(
+        'Checked.\nROUTING_DECISION: {"next_agent": "network_manager", '
+        '"reasoning": "needs diagnostics"}'
+    )
+    before = count("marker", "marker")
+
+    out = run_agent([reply], mode="marker")
+
+    assert out["messages"][-1].content == "Checked."
+    assert out["next_agent"] == "network_manager"
+    assert count("marker", "marker") == before + 1
+
+
+def test_no_decision_and_failing_fallback_ends(run_agent):
+    fallback = RoutingModel()
+    before = count("json", "default")
+
+    out = run_agent([AIMessage("just text")], fallback=fallback)
+
+    assert out["messages"][-1].content == "just text"
+    assert out["next_agent"] is None
+    assert out["reasoning"] == "Unable to determine next step"
+    assert fallback.calls == 1
+    assert count("json", "default") == before + 1
@@ -0,0 +1,25 @@
+from network import sampler as sampler_module
+from network.models import LinkRecord
+from network.sampler import CounterSampler
+
+
+def test_empty_read_skips_the_tick(monkeypatch):
+    reads = iter(
+        [
+            {"br-sw1": LinkRecord(name="br-sw1", rx_bytes=100)},
+            {},
+            {"br-sw1": LinkRecord(name="br-sw1", rx_bytes=300)},
+        ]
+    )
+    monkeypatch.setattr(sampler_module, "read_links", lambda backend: next(reads))
+    sampler = CounterSampler(select_interfaces=lambda links: links)
+
+    sampler.sample_once()
+    sampler.sample_once()
+    assert sampler.interfaces == ["br-sw1"]
+    assert not sampler.wait_for_samples(2, timeout=0)
+
+    sampler.sample_once()
+    assert sampler.wait_for_samples(2, timeout=0)
+    timestamps, _ = sampler._rings["br-sw1"].ordered()
+    assert timestamps.size == 2
@@ -0,0 +1,40 @@
+from network.cache import topology_cache
+from network.infrastructure import SNAPSHOT_WATCH_KEYS, assemble_topology_snapshot
+from network.models import Inventory, RoutingInfo
+
+
+def _assemble(watch=None):
+    return assemble_topology_snapshot(
+        links={},
+        vms={},
+        stp_info={},
+        routing=RoutingInfo(),
+        inventory=Inventory(),
+        watch=watch,
+    )
+
+
+def test_snapshot_built_before_watcher_publish_is_not_stored():
+    topology_cache.clear()
+    with topology_cache.watch(*SNAPSHOT_WATCH_KEYS) as watch:
+        # The watcher publishes newer STP state while the facts are read
+        topology_cache.invalidate("stp")
+        topology_cache.put("stp", "fresh stp", depends_on=("inventory",))
+        topology_cache.put("active_links", "fresh", depends_on=("stp",))
+        _assemble(watch)
+
+    assert topology_cache.peek("active_links") == "fresh"
+    assert topology_cache.peek("stp") == "fresh stp"
+    assert topology_cache.peek("topology") is None
+    assert topology_cache.peek("routing") is None
+
+
+def test_snapshot_seeds_missing_facts_only():
+    topology_cache.clear()
+    topology_cache.put("routing", RoutingInfo(route_count=3))
+    with topology_cache.watch(*SNAPSHOT_WATCH_KEYS) as watch:
+        _assemble(watch)
+
+    assert topology_cache.peek("routing").route_count == 3
+    assert topology_cache.peek("links") == {}
+    assert topology_cache.peek("topology") is not None
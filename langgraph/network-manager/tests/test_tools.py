@@ -0,0 +1,6 @@
+from agents.network_manager import tools
+
+
+def test_async_impl_returns_the_coroutine():
+    assert tools._aget_tc_settings is not None
+    assert tools.get_tc_settings.coroutine is tools._aget_tc_settings
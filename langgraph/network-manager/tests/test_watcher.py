@@ -0,0 +1,60 @@
+import time
+
+from network import watcher as watcher_module
+from network.cache import topology_cache
+from network.watcher import TopologyWatcher
+
+
+def _failing_watcher(monkeypatch):
+    watcher = TopologyWatcher(backend="ip")
+
+    def publish():
+        raise RuntimeError("interface table or port states unavailable")
+
+    monkeypatch.setattr(watcher, "publish", publish)
+    return watcher
+
+
+def test_failed_publish_backs_off_instead_of_restarting(monkeypatch):
+    monkeypatch.setattr(watcher_module, "WATCHER_RETRY_SECONDS", 30)
+    watcher = _failing_watcher(monkeypatch)
+
+    watcher.start()
+    watcher._thread.join(timeout=5)
+    assert not watcher.running
+    assert watcher.errors == 1
+    assert "unavailable" in watcher.last_error
+
+    first = watcher._thread
+    watcher.start()
+    assert watcher._thread is first
+    assert watcher._retry_at - time.monotonic() > 25
+
+
+def test_backoff_doubles_up_to_the_limit(monkeypatch):
+    monkeypatch.setattr(watcher_module, "WATCHER_RETRY_SECONDS", 30)
+    monkeypatch.setattr(watcher_module, "WATCHER_MAX_RETRY_SECONDS", 100)
+    watcher = TopologyWatcher(backend="ip")
+
+    delays = []
+    for _ in range(4):
+        watcher._failed()
+        delays.append(round(watcher._retry_at - time.monotonic()))
+    assert delays == [30, 60, 100, 100]
+
+
+def test_publish_error_in_event_loop_keeps_watching(monkeypatch):
+    watcher = _failing_watcher(monkeypatch)
+    topology_cache.put("stp", "old", ttl=float("inf"))
+    events = iter([True, False])
+
+    def wait(timeout):
+        try:
+            return next(events)
+        except StopIteration:
+            watcher._stop.set()
+            return False
+
+    watcher._watch(wait)
+    assert watcher.errors == 1
+    assert topology_cache.peek("stp") is None
@@ -0,0 +1,88 @@
+import time
+
+import pytest
+
+from agents import workflow
+from agents.workflow import REPORTER, detect_loop, route_to_next_agent, start_session
+from langgraph.graph import END
+
+NM, TC = "network_manager", "traffic_controller"
+
+
+@pytest.fixture
+def state():
+    return dict(start_session({}))
+
+
+def hand_off(state, agent, next_agent, reasoning):
+    """One agent turn followed by the routing supervisor; returns the route."""
+    state.update(current_agent=agent, next_agent=next_agent, reasoning=reasoning)
+    state.update(workflow.supervise_routing(state))
+    return route_to_next_agent(state)
+
+
+def test_investigate_shape_verify_flow_passes(state):
+    steps = [
+        (NM, TC, "path found, limit the congested link"),
+        (TC, NM, "limit applied, verify the path"),
+        (NM, TC, "still congested, lower the limit"),
+        (TC, NM, "limit lowered, verify again"),
+    ]
+    for agent, next_agent, reasoning in steps:
+        assert hand_off(state, agent, next_agent, reasoning) == next_agent
+    assert state["routing_stop_reason"] is None
+    assert state["hop_count"] == 4
+
+
+def test_three_repeated_hand_off_cycles_stop(state, monkeypatch):
+    monkeypatch.setattr(workflow, "ROUTING_CYCLE_REPEATS", 3)
+    for i in range(2):
+        assert hand_off(state, NM, TC, f"check {i}") == TC
+        assert hand_off(state, TC, NM, f"verify {i}") == NM
+    assert hand_off(state, NM, TC, "check 2") == TC
+    assert hand_off(state, TC, NM, "verify 2") == REPORTER
+    assert state["routing_stop_reason"] == (
+        f"hand-offs {NM} -> {TC} -> {NM} repeated 3 times"
+    )
+
+
+def test_same_hand_off_for_the_same_reason_stops(state):
+    assert hand_off(state, NM, TC, "Limit veth-sw1-sw2.") == TC
+    assert hand_off(state, TC, NM, "done") == NM
+    assert hand_off(state, NM, TC, "limit veth sw1 sw2") == REPORTER
+    assert state["routing_stop_reason"] == (
+        f"{NM} routed to {TC} again for the same reason"
+    )
+
+
+def test_hop_budget_goes_to_reporter_once_then_ends(state, monkeypatch):
+    monkeypatch.setattr(workflow, "ROUTING_MAX_HOPS", 2)
+    assert hand_off(state, NM, TC, "a") == TC
+    assert hand_off(state, TC, NM, "b") == NM
+    assert hand_off(state, NM, TC, "c") == REPORTER
+    assert state["routing_stop_reason"] == "hop budget of 2 hand-offs spent"
+    assert "Summarize the findings" in state["reasoning"]
+    assert hand_off(state, REPORTER, NM, "more to check") == END
+
+
+def test_time_budget_goes_to_reporter_once_then_ends(state, monkeypatch):
+    monkeypatch.setattr(workflow, "ROUTING_TIME_BUDGET", 10)
+    state["session_started_at"] = time.time() - 11
+    assert hand_off(state, NM, TC, "a") == REPORTER
+    assert state["routing_stop_reason"] == "time budget of 10s spent"
+    assert hand_off(state, REPORTER, None, "") == END
+
+
+def test_reporter_hitting_a_budget_ends_the_run(state, monkeypatch):
+    monkeypatch.setattr(workflow, "ROUTING_MAX_HOPS", 0)
+    assert hand_off(state, REPORTER, NM, "a") == END
+    assert workflow.routing_stops.value("hops", END) >= 1
+
+
+def test_detect_loop_needs_consecutive_repeats(monkeypatch):
+    monkeypatch.setattr(workflow, "ROUTING_CYCLE_REPEATS", 3)
+    history = [[NM, TC, "a"], [TC, NM, "b"], [NM, TC, "c"], [TC, NM, "d"]]
+    assert detect_loop(history) is None
+    assert detect_loop([[NM, NM, "x"], [NM, NM, "y"], [NM, NM, "z"]]) == (
+        f"hand-offs {NM} -> {NM} repeated 3 times"
+    )